@@ -0,0 +1,90 @@
+import http.client
+import json
+import queue
+
+
+class Client():
+    """
+        Talks to a tink Server.
+        Connections are kept alive and pooled so that consecutive calls don't pay for a new handshake.
+        Every method accepts a single text or a list of texts; a list goes to the server as one batch.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, pool_size=4, timeout=60):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _get_connection(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _release(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def _request(self, method, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        # a pooled connection may have been closed by the server in the meantime, in which case it's retried once
+        for attempt in range(2):
+            connection = self._get_connection()
+            try:
+                connection.request(method, path, body=data, headers=headers)
+                response = connection.getresponse()
+                payload = json.loads(response.read().decode("utf-8"))
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if attempt == 1:
+                    raise
+                continue
+            except Exception:
+                connection.close()
+                raise
+            self._release(connection)
+            if response.status != 200:
+                raise Exception(payload.get("error", f"The server answered with status {response.status}."))
+            return payload
+
+    def _call(self, path, items):
+        if isinstance(items, list):
+            return self._request("POST", path, {"items": items})["results"]
+        return self._request("POST", path, items)["result"]
+
+    @staticmethod
+    def _items(texts, **kwargs):
+        if isinstance(texts, list):
+            return [dict(text=t, **kwargs) for t in texts]
+        return dict(text=texts, **kwargs)
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def tokens(self, texts, lang="en"):
+        return self._call("/tokens", Client._items(texts, lang=lang))
+
+    def dependency(self, texts, lang="en"):
+        return self._call("/dependency", Client._items(texts, lang=lang))
+
+    def svo(self, texts, lang="en"):
+        return self._call("/svo", Client._items(texts, lang=lang))
+
+    def entities(self, texts, lang="en"):
+        return self._call("/entities", Client._items(texts, lang=lang))
+
+    def synonyms(self, words, lang="en"):
+        if isinstance(words, list):
+            return self._call("/synonyms", [{"word": w, "lang": lang} for w in words])
+        return self._call("/synonyms", {"word": words, "lang": lang})
+
+    def fit(self, pattern, texts, lang="en"):
+        return self._call("/fit", Client._items(texts, pattern=pattern, lang=lang))
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
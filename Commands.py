@@ -0,0 +1,228 @@
+import argparse
+import contextlib
+import json
+import sys
+import time
+from multiprocessing import Pool
+
+from .Language import Language
+from .Patterns import PatternSet
+from .Understanding import Understanding, SVOExtractor
+
+
+class Commands():
+    """
+        The command-line interface, see 'python -m tink --help'.
+
+        Every command reads its input from the given files or stdin, one item per line or, with --documents,
+        one item per block of lines separated by an empty line. Items are processed in batches, optionally
+        across worker processes, and only a bounded window of batches is held in memory.
+    """
+
+    # the pattern sets of the match command, built once per run and inherited by forked workers
+    _pattern_sets = {}
+
+    # region Operations
+    @staticmethod
+    def get_pattern_set(lang, options):
+        """
+            Returns the PatternSet of the match options, compiled the first time.
+        """
+        key = (tuple(options["patterns"]), lang, options.get("tokenizer", "spacy"))
+        found = Commands._pattern_sets.get(key)
+        if found is None:
+            found = PatternSet(options["patterns"], lang, options.get("tokenizer", "spacy"))
+            Commands._pattern_sets[key] = found
+        return found
+
+    @staticmethod
+    def parse(text, lang, options):
+        if options["format"] == "conllu":
+            return [Understanding.get_conllu(text, lang).rstrip("\n") + "\n"]
+        return [{"sentence": i, "tokens": [t.to_dict() for t in nodes]} for i, nodes in enumerate(Understanding.get_sentences(text, lang))]
+
+    @staticmethod
+    def svo(text, lang, options):
+        records = []
+        for i, tree in enumerate(Understanding.get_document(text, lang)):
+            for subjects, verb, objects in SVOExtractor(tree, lang).extract_svo():
+                records.append({"sentence": i, "subjects": subjects, "verb": verb, "objects": objects})
+        return records
+
+    @staticmethod
+    def entities(text, lang, options):
+        return [{"entities": [e.to_dict() for e in Understanding.get_entities(text, lang)]}]
+
+    @staticmethod
+    def synonyms(text, lang, options):
+        return [{"word": word, "synonyms": Language.get_synonyms(word, lang)} for word in text.split()]
+
+    @staticmethod
+    def match(text, lang, options):
+        m = Commands.get_pattern_set(lang, options).fit(text)
+        if m is not None:
+            return [{"pattern": m.pattern, "parameters": m.as_dict()}]
+        return [{"pattern": None, "parameters": None}]
+
+    # endregion
+
+    @staticmethod
+    def _run_batch(task):
+        """
+            Runs a command over a batch of items; this is what the worker processes execute.
+            Records are turned into JSON lines carrying the number of the item they belong to.
+        """
+        command, lang, options, start, batch = task
+        operation = getattr(Commands, command)
+        results = []
+        for i, text in enumerate(batch):
+            try:
+                records = operation(text, lang, options)
+            except Exception as e:
+                if options.get("format") == "conllu":
+                    # a comment keeps the CoNLL-U output parseable
+                    records = ["# item = %d\n# error = %s\n" % (start + i, " ".join(str(e).split()))]
+                else:
+                    records = [{"error": str(e)}]
+            lines = []
+            for record in records:
+                if isinstance(record, dict):
+                    record = dict(item=start + i, **record)
+                    lines.append(json.dumps(record, ensure_ascii=False))
+                else:
+                    lines.append(record)
+            results.append(lines)
+        return results
+
+    @staticmethod
+    def read_items(streams, documents=False):
+        """
+            Yields the non-empty lines of the streams or, for documents, the blocks of lines separated by an empty line.
+            The lines of a block keep their line breaks.
+        """
+        for stream in streams:
+            block = []
+            for line in stream:
+                line = line.strip()
+                if not documents:
+                    if len(line) > 0:
+                        yield line
+                elif len(line) == 0:
+                    if len(block) > 0:
+                        yield "\n".join(block)
+                        block = []
+                else:
+                    block.append(line)
+            if len(block) > 0:
+                yield "\n".join(block)
+
+    @staticmethod
+    def _windows(items, batch_size, batches):
+        """
+            Groups the items in windows of batches so that no more than one window is read ahead.
+        """
+        window = []
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                window.append(batch)
+                batch = []
+                if len(window) >= batches:
+                    yield window
+                    window = []
+        if len(batch) > 0:
+            window.append(batch)
+        if len(window) > 0:
+            yield window
+
+    @staticmethod
+    def run(command, items, output, lang="en", workers=1, batch_size=32, options=None):
+        """
+            Runs a command over the items and writes the output lines in input order.
+
+        :param command: One of parse, svo, entities, synonyms or match.
+        :param items: An iterable of texts.
+        :param output: A writable text stream.
+        :param lang: The language of the texts.
+        :param workers: The amount of worker processes.
+        :param batch_size: The amount of items handed to a worker at once.
+        :param options: Command specific options.
+        :return: The amount of items processed.
+        """
+        options = options if options is not None else {}
+        if command == "match":
+            # compiled before the workers are forked
+            Commands.get_pattern_set(lang, options)
+        pool = Pool(workers) if workers > 1 else None
+        count = 0
+        try:
+            for window in Commands._windows(items, batch_size, max(workers, 1) * 2):
+                tasks = []
+                start = count
+                for batch in window:
+                    tasks.append((command, lang, options, start, batch))
+                    start += len(batch)
+                results = pool.map(Commands._run_batch, tasks) if pool is not None else map(Commands._run_batch, tasks)
+                for batch in results:
+                    for lines in batch:
+                        for line in lines:
+                            output.write(line + "\n")
+                        count += 1
+                output.flush()
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        return count
+
+    @staticmethod
+    def _get_parser():
+        parser = argparse.ArgumentParser(prog="python -m tink", description="Batch processing of texts with tink.")
+        commands = parser.add_subparsers(dest="command")
+        commands.required = True
+        specs = {
+            "parse": "Dependency parsing, CoNLL-U or JSONL out.",
+            "svo": "Subject-verb-object triples as JSONL.",
+            "entities": "Named entities as JSONL.",
+            "synonyms": "Synonyms of each word on each line, one JSONL record per word.",
+            "match": "Fits each line against the patterns in a file; the first fitting pattern wins."
+        }
+        for name, help in specs.items():
+            sub = commands.add_parser(name, help=help)
+            sub.add_argument("files", nargs="*", help="The input files, stdin if omitted or '-'.")
+            sub.add_argument("--lang", default="en", help="The language of the input; 'en' by default.")
+            sub.add_argument("--workers", type=int, default=1, help="The amount of worker processes.")
+            sub.add_argument("--batch-size", type=int, default=32, help="The amount of items per batch.")
+            sub.add_argument("--documents", action="store_true", help="Items are blocks separated by an empty line instead of lines.")
+            sub.add_argument("--output", default="-", help="The output file, stdout by default.")
+            if name == "parse":
+                sub.add_argument("--format", choices=["conllu", "jsonl"], default="conllu")
+            if name == "match":
+                sub.add_argument("--patterns", required=True, help="A file with one pattern per line.")
+                sub.add_argument("--tokenizer", choices=["spacy", "rules", "auto"], default="spacy",
+                                 help="'rules' skips the Spacy model, 'auto' only uses it for linguistic constraints.")
+        return parser
+
+    @staticmethod
+    def main(argv=None):
+        args = Commands._get_parser().parse_args(argv)
+        options = {}
+        if args.command == "parse":
+            options["format"] = args.format
+        if args.command == "match":
+            with open(args.patterns, "rt", encoding="utf-8") as f:
+                options["patterns"] = [line.strip() for line in f if len(line.strip()) > 0 and not line.startswith("#")]
+            options["tokenizer"] = args.tokenizer
+
+        files = args.files if len(args.files) > 0 else ["-"]
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            # the input files are opened one after the other and all closed when the run ends
+            streams = (sys.stdin if path == "-" else stack.enter_context(open(path, "rt", encoding="utf-8")) for path in files)
+            output = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "wt", encoding="utf-8"))
+            count = Commands.run(args.command, Commands.read_items(streams, args.documents), output,
+                                 args.lang, args.workers, args.batch_size, options)
+        elapsed = time.perf_counter() - start
+        sys.stderr.write(f"{count} items in {elapsed:.2f}s ({count / elapsed if elapsed > 0 else 0:.1f} items/s)\n")
+        return 0
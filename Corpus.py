@@ -0,0 +1,302 @@
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from .Understanding import Understanding, Dependency, Document, Token
+
+MAGIC = b"TINKCORP"
+VERSION = 1
+# the token columns, each an int32 per token; all but the head refer to the string table
+COLUMNS = ["word", "lemma", "pos", "xpos", "feats", "head", "deprel"]
+ALIGNMENT = 8
+
+
+class CorpusWriter():
+    """
+        Writes parsed documents to the binary corpus format read by Corpus.
+
+        The file starts with a magic number followed by the sections, each aligned to 8 bytes:
+        one int32 array per token column, the sentence offsets (first token of each sentence),
+        the document offsets (first sentence of each document) and the string table.
+        A JSON table of contents and a trailer with its position close the file.
+        Columns are spooled to temporary files while documents are added so memory only
+        grows with the amount of distinct strings.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._strings = {}
+        self._spools = {name: tempfile.TemporaryFile() for name in COLUMNS + ["sentences", "documents"]}
+        self._pos_ids = set()
+        self._deprel_ids = set()
+        self.tokens = 0
+        self.sentences = 0
+        self.documents = 0
+
+    def _intern(self, s):
+        found = self._strings.get(s)
+        if found is None:
+            found = len(self._strings)
+            self._strings[s] = found
+        return found
+
+    def add(self, document):
+        """
+            Appends a parsed document.
+
+        :param document: A Document, a Dependency or a list of token lists as returned by Understanding.get_sentences.
+        :return: The id of the document in the corpus.
+        """
+        if isinstance(document, Document):
+            sentences = [tree.nodes for tree in document.sentences]
+        elif isinstance(document, Dependency):
+            sentences = [document.nodes]
+        else:
+            sentences = document
+        starts = []
+        for nodes in sentences:
+            starts.append(self.tokens)
+            columns = {name: [] for name in COLUMNS}
+            for node in nodes:
+                columns["word"].append(self._intern(node.word))
+                columns["lemma"].append(self._intern(node.lemma))
+                columns["pos"].append(self._intern(node.pos))
+                columns["xpos"].append(self._intern(node.pos2))
+                columns["feats"].append(self._intern(node.pos3))
+                columns["head"].append(node.parentId)
+                columns["deprel"].append(self._intern(node.dep))
+            self._pos_ids.update(columns["pos"])
+            self._deprel_ids.update(columns["deprel"])
+            for name in COLUMNS:
+                self._spools[name].write(np.array(columns[name], dtype="<i4").tobytes())
+            self.tokens += len(nodes)
+        self._spools["sentences"].write(np.array(starts, dtype="<i8").tobytes())
+        self._spools["documents"].write(np.array([self.sentences], dtype="<i8").tobytes())
+        self.sentences += len(starts)
+        self.documents += 1
+        return self.documents - 1
+
+    @staticmethod
+    def _pad(f):
+        remainder = f.tell() % ALIGNMENT
+        if remainder > 0:
+            f.write(b"\0" * (ALIGNMENT - remainder))
+
+    def close(self):
+        """
+            Writes the corpus file and releases the temporary files.
+        """
+        # the closing offsets turn the starts into proper offset indexes
+        self._spools["sentences"].write(np.array([self.tokens], dtype="<i8").tobytes())
+        self._spools["documents"].write(np.array([self.sentences], dtype="<i8").tobytes())
+        encoded = [s.encode("utf-8") for s in self._strings]
+        string_offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+        np.cumsum([len(e) for e in encoded], out=string_offsets[1:])
+
+        toc = {"version": VERSION, "tokens": self.tokens, "sentences": self.sentences, "documents": self.documents,
+               "pos_ids": sorted(self._pos_ids), "deprel_ids": sorted(self._deprel_ids), "sections": {}}
+        with open(self.path, "wb") as f:
+            f.write(MAGIC)
+            for name in COLUMNS + ["sentences", "documents"]:
+                spool = self._spools[name]
+                dtype = "<i8" if name in ["sentences", "documents"] else "<i4"
+                self._pad(f)
+                toc["sections"][name] = [f.tell(), dtype, spool.tell() // np.dtype(dtype).itemsize]
+                spool.seek(0)
+                shutil.copyfileobj(spool, f)
+                spool.close()
+            self._pad(f)
+            toc["sections"]["string_offsets"] = [f.tell(), "<i8", len(string_offsets)]
+            f.write(string_offsets.tobytes())
+            toc["sections"]["strings"] = [f.tell(), "u1", int(string_offsets[-1])]
+            for e in encoded:
+                f.write(e)
+            position = f.tell()
+            f.write(json.dumps(toc).encode("utf-8"))
+            f.write(struct.pack("<Q", position))
+            f.write(MAGIC)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            # a failed run leaves no partial corpus behind
+            for spool in self._spools.values():
+                spool.close()
+
+
+class Corpus():
+    """
+        Read access to a corpus file written by CorpusWriter.
+
+        The file is memory-mapped and the arrays are views on the mapping, nothing is loaded up front.
+        Worker processes opening the same file share its pages through the OS cache.
+        Dependency objects are only created for the documents asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC or self._map[-len(MAGIC):] != MAGIC:
+            raise Exception(f"'{path}' is not a corpus file.")
+        position = struct.unpack("<Q", self._map[-len(MAGIC) - 8:-len(MAGIC)])[0]
+        self.toc = json.loads(self._map[position:-len(MAGIC) - 8].decode("utf-8"))
+        if self.toc["version"] != VERSION:
+            raise Exception(f"Corpus version {self.toc['version']} is not supported.")
+        self._arrays = {}
+        for name, (offset, dtype, count) in self.toc["sections"].items():
+            self._arrays[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+        self._decoded = {}
+        self._ids = None
+        self._codes = None
+
+    def get_string(self, id):
+        """
+            Returns the string with the given id from the string table.
+        """
+        found = self._decoded.get(id)
+        if found is None:
+            offsets = self._arrays["string_offsets"]
+            found = self._arrays["strings"][offsets[id]:offsets[id + 1]].tobytes().decode("utf-8")
+            self._decoded[id] = found
+        return found
+
+    def get_string_id(self, s):
+        """
+            Returns the id of the given string in the string table or None if it's not in the corpus.
+        """
+        if self._ids is None:
+            self._ids = {self.get_string(id): id for id in range(len(self._arrays["string_offsets"]) - 1)}
+        return self._ids.get(s)
+
+    def get_column(self, name):
+        """
+            Returns the memory-mapped array of the given token column.
+        """
+        return self._arrays[name]
+
+    @property
+    def sentence_offsets(self):
+        return self._arrays["sentences"]
+
+    @property
+    def document_offsets(self):
+        return self._arrays["documents"]
+
+    def _get_sentence_range(self, id):
+        offsets = self.document_offsets
+        return offsets[id], offsets[id + 1]
+
+    def get_sentence(self, id):
+        """
+            Returns the dependency tree of the sentence with the given (corpus-wide) id.
+        """
+        start, end = self.sentence_offsets[id], self.sentence_offsets[id + 1]
+        columns = [self._arrays[name][start:end] for name in COLUMNS]
+        nodes = []
+        for i, (word, lemma, pos, xpos, feats, head, deprel) in enumerate(zip(*columns)):
+            nodes.append(Token([i + 1, self.get_string(word), self.get_string(lemma), self.get_string(pos),
+                                self.get_string(xpos), self.get_string(feats), head, self.get_string(deprel)]))
+        return Dependency(nodes)
+
+    def get_document(self, id):
+        """
+            Returns the document with the given id.
+
+        :param id: A document id as returned by CorpusWriter.add.
+        :return: A Document.
+        """
+        if id < 0 or id >= len(self):
+            raise IndexError(f"There is no document with id {id}.")
+        first, last = self._get_sentence_range(id)
+        return Document([self.get_sentence(s) for s in range(first, last)])
+
+    def _get_codes(self):
+        """
+            Maps the string ids of POS tags and relations to the codes used by Features.
+        """
+        if self._codes is None:
+            from .Features import POS_CODES, DEPREL_CODES
+            size = len(self._arrays["string_offsets"]) - 1
+            pos = np.full(size, POS_CODES["X"], dtype=np.int8)
+            for id in self.toc["pos_ids"]:
+                pos[id] = POS_CODES.get(self.get_string(id), POS_CODES["X"])
+            deprel = np.full(size, DEPREL_CODES["dep"], dtype=np.int8)
+            for id in self.toc["deprel_ids"]:
+                deprel[id] = DEPREL_CODES.get(self.get_string(id).split(":")[0].lower(), DEPREL_CODES["dep"])
+            self._codes = (pos, deprel)
+        return self._codes
+
+    def get_arrays(self, first=0, last=None):
+        """
+            Returns the documents in the given range as TreeArrays without creating any Token.
+
+        :param first: The id of the first document.
+        :param last: The id after the last document, by default the end of the corpus.
+        :return: A TreeArrays instance.
+        """
+        from .Features import TreeArrays
+        if last is None:
+            last = len(self)
+        sentence_first, sentence_last = self.document_offsets[first], self.document_offsets[last]
+        offsets = self.sentence_offsets[sentence_first:sentence_last + 1]
+        start, end = offsets[0], offsets[-1]
+        pos, deprel = self._get_codes()
+        heads = self._arrays["head"][start:end].astype(np.int32)
+        lengths = np.diff(offsets)
+        sentence_start = np.repeat(offsets[:-1] - start, lengths).astype(np.int32)
+        own = np.arange(end - start, dtype=np.int32)
+        heads = np.where(heads > 0, sentence_start + heads - 1, own).astype(np.int32)
+        return TreeArrays(heads, pos[self._arrays["pos"][start:end]], deprel[self._arrays["deprel"][start:end]], offsets - start)
+
+    def __len__(self):
+        return self.toc["documents"]
+
+    def __getitem__(self, id):
+        return self.get_document(id)
+
+    def __iter__(self):
+        for id in range(len(self)):
+            yield self.get_document(id)
+
+    def close(self):
+        """
+            Releases the file. Arrays taken from get_column which are still referenced keep the mapping alive
+            until they are dropped.
+        """
+        self._arrays = {}
+        try:
+            self._map.close()
+        except BufferError:
+            # the views hold on to the mapping, which is unmapped with the last of them
+            pass
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def build(path, texts, lang="en"):
+        """
+            Parses the given texts and writes them as a corpus file.
+
+        :param path: The path of the corpus file.
+        :param texts: An iterable of texts, each becoming a document.
+        :param lang: The language of the texts.
+        :return: The amount of documents written.
+        """
+        with CorpusWriter(path) as writer:
+            for text in texts:
+                writer.add(Understanding.get_sentences(text, lang))
+            return writer.documents
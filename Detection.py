@@ -0,0 +1,378 @@
+import argparse
+import gettext
+import glob
+import gzip
+import math
+import os
+import re
+import sys
+
+from .Language import Language
+from .Patterns import Patterns
+from .Resources import Resources
+from .Text import AnalyzedText
+from .Understanding import Understanding, SVOExtractor, NamedEntity, Dependency
+
+# the n-gram lengths making up a profile
+NGRAM_SIZES = [1, 2, 3, 4]
+# the amount of n-grams kept per profile
+PROFILE_SIZE = 10000
+# the amount of characters taken from each source of the corpus per language, so the profiles weigh alike
+SOURCE_SIZE = 1600000
+# where the corpus the profiles are built from is found on a Debian or Ubuntu system
+LOCALE_DIR = "/usr/share/locale"
+MAN_DIR = "/usr/share/man"
+
+wordx = re.compile(r"[^\W\d_]+")
+# printf directives, command line options, variables and anything like a path or an identifier
+markupx = re.compile(r"%[-+ #0-9.*]*[a-zA-Z]|--?[\w-]+|\$\w+|\S*[_/\\<>{}=@]\S*")
+# groff escapes like \fB, \(em and \-
+escapex = re.compile(r"\\f[BIRP]|\\f\(\w\w|\\\(\w\w|\\\*\(\w\w|\\.")
+# the groff requests whose argument is text
+textx = re.compile(r"\.(?:SH|SS|B|I|BR|IR|IP|TP)\s+(.*)")
+
+
+class LanguageDetector():
+    """
+        Identifies the language of a text from its character n-grams.
+
+        Every language has a profile in the data directory, 'ngrams.<lang>.txt', listing its most frequent
+        n-grams with their counts. A text is scored against each profile as a sum of smoothed log-probabilities,
+        which only takes a dictionary lookup per n-gram. Adding a language is a matter of adding a profile,
+        see build_profile and main, which builds them from the gettext catalogs and manual pages on the system.
+    """
+    _weights = None
+    _languages = None
+
+    @staticmethod
+    def _get_ngrams(text):
+        """
+            Yields the n-grams of the words in the text, with '_' marking the word boundaries.
+        """
+        for word in wordx.findall(text.lower()):
+            padded = f"_{word}_"
+            for size in NGRAM_SIZES:
+                for i in range(len(padded) - size + 1):
+                    gram = padded[i:i + size]
+                    if gram != "_":
+                        yield gram
+
+    @staticmethod
+    def build_profile(text, size=PROFILE_SIZE):
+        """
+            Returns the most frequent n-grams of the given text.
+
+        :param text: A sample of the language, the larger the better.
+        :param size: The amount of n-grams to keep.
+        :return: A list of (n-gram, count) tuples, most frequent first.
+        """
+        counts = {}
+        for gram in LanguageDetector._get_ngrams(text):
+            counts[gram] = counts.get(gram, 0) + 1
+        return sorted(counts.items(), key=lambda x: (-x[1], x[0]))[:size]
+
+    @staticmethod
+    def save_profile(profile, lang, source=None):
+        """
+            Writes a profile to the data directory.
+
+        :param profile: A list of (n-gram, count) tuples, see build_profile.
+        :param lang: The language of the profile.
+        :param source: A description of the corpus the profile was built from, if any.
+        """
+        path = os.path.join(Resources.get_resources_dir(), f"ngrams.{lang}.txt")
+        with open(path, "wt", encoding="utf-8") as f:
+            f.write(f"# Character n-gram profile for '{lang}', see LanguageDetector.build_profile\n")
+            if source is not None:
+                f.write(f"# Built from {source}\n")
+            for gram, count in profile:
+                f.write(f"{gram}\t{count}\n")
+
+    # region Corpus
+    @staticmethod
+    def read_catalogs(lang, locale_dir=LOCALE_DIR):
+        """
+            Yields the translated messages of the gettext catalogs of a language, like those of the
+            Translation Project (https://translationproject.org) installed with the GNU and Debian tools.
+            The English messages are the originals of the catalogs of all languages.
+
+        :param lang: A language code.
+        :param locale_dir: The directory with a '<lang>/LC_MESSAGES' folder per language.
+        :return: A generator of messages.
+        """
+        pattern = os.path.join(locale_dir, "*" if lang == "en" else lang, "LC_MESSAGES", "*.mo")
+        seen = set()
+        for path in sorted(glob.glob(pattern)):
+            # the ISO catalogs are lists of country and language names
+            if os.path.basename(path).startswith("iso_"):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    catalog = gettext.GNUTranslations(f)._catalog
+            except Exception:
+                # catalogs in a legacy encoding
+                continue
+            for key, message in catalog.items():
+                original = key[0] if isinstance(key, tuple) else key
+                if len(original) == 0:
+                    continue
+                message = original if lang == "en" else message
+                if message not in seen:
+                    seen.add(message)
+                    yield message
+
+    @staticmethod
+    def read_manuals(lang, man_dir=MAN_DIR):
+        """
+            Yields the lines of text of the manual pages of a language, without the groff markup.
+
+        :param lang: A language code.
+        :param man_dir: The directory with the English sections and a folder per translation.
+        :return: A generator of lines.
+        """
+        base = man_dir if lang == "en" else os.path.join(man_dir, lang)
+        for path in sorted(glob.glob(os.path.join(base, "man[1-8]", "*"))):
+            try:
+                with (gzip.open(path, "rt", encoding="utf-8", errors="ignore") if path.endswith(".gz") else open(path, "rt", encoding="utf-8", errors="ignore")) as f:
+                    data = f.read()
+            except OSError:
+                continue
+            for line in data.splitlines():
+                if line.startswith(".") or line.startswith("'"):
+                    found = textx.match(line)
+                    if found is None:
+                        continue
+                    line = found.group(1)
+                line = escapex.sub("", line).replace('"', "").strip()
+                if len(line) > 0:
+                    yield line
+
+    @staticmethod
+    def read_corpus(lang, locale_dir=LOCALE_DIR, man_dir=MAN_DIR, size=SOURCE_SIZE):
+        """
+            Returns the lines of the corpus of a language: up to size characters of the gettext catalogs and as much of
+            the manual pages, with the printf directives, options and paths left out.
+
+        :param lang: A language code.
+        :param locale_dir: See read_catalogs.
+        :param man_dir: See read_manuals.
+        :param size: The amount of characters taken from each source.
+        :return: A list of lines.
+        """
+        lines = []
+        for source in [LanguageDetector.read_catalogs(lang, locale_dir), LanguageDetector.read_manuals(lang, man_dir)]:
+            taken = 0
+            for line in source:
+                line = " ".join(markupx.sub(" ", line).split())
+                if len(line) == 0:
+                    continue
+                lines.append(line)
+                taken += len(line)
+                if taken >= size:
+                    break
+        return lines
+
+    # endregion
+
+    @staticmethod
+    def _load():
+        """
+            Reads the profiles and turns them into one table of log-probabilities per n-gram.
+        """
+        if LanguageDetector._weights is not None:
+            return
+        profiles = {}
+        for path in sorted(glob.glob(os.path.join(Resources.get_resources_dir(), "ngrams.*.txt"))):
+            lang = os.path.basename(path).split(".")[1]
+            profile = {}
+            with open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.startswith("#"):
+                        continue
+                    gram, count = line.rstrip("\n").split("\t")
+                    profile[gram] = int(count)
+            profiles[lang] = profile
+        if len(profiles) == 0:
+            raise Exception("There are no language profiles in the data directory.")
+        LanguageDetector.use_profiles(profiles)
+
+    @staticmethod
+    def use_profiles(profiles):
+        """
+            Detects the languages of the given profiles instead of those in the data directory.
+
+        :param profiles: A dictionary from language code to a dictionary from n-gram to count.
+        """
+        languages = sorted(profiles.keys())
+        vocabulary = set()
+        for profile in profiles.values():
+            vocabulary.update(profile.keys())
+        # add-one smoothing over the joint vocabulary
+        totals = [sum(profiles[lang].values()) + len(vocabulary) for lang in languages]
+        weights = {}
+        for gram in vocabulary:
+            weights[gram] = tuple([math.log((profiles[lang].get(gram, 0) + 1) / totals[i]) for i, lang in enumerate(languages)])
+        LanguageDetector._languages = languages
+        LanguageDetector._weights = weights
+
+    @staticmethod
+    def get_languages():
+        """
+            The languages which can be detected.
+        """
+        LanguageDetector._load()
+        return list(LanguageDetector._languages)
+
+    @staticmethod
+    def get_scores(text):
+        """
+            Returns the log-probability of the text for each language.
+            N-grams unknown to all profiles are ignored.
+
+        :param text: Any text.
+        :return: A dictionary from language code to score.
+        """
+        LanguageDetector._load()
+        weights = LanguageDetector._weights
+        rows = [w for w in map(weights.get, LanguageDetector._get_ngrams(text)) if w is not None]
+        if len(rows) == 0:
+            return {lang: 0.0 for lang in LanguageDetector._languages}
+        return dict(zip(LanguageDetector._languages, map(math.fsum, zip(*rows))))
+
+    @staticmethod
+    def detect(text, default="en"):
+        """
+            Returns the language of the given text.
+
+        :param text: Any text.
+        :param default: The language returned when the text has no letters at all.
+        :return: A language code like 'en' or 'nl'.
+        """
+        scores = LanguageDetector.get_scores(text)
+        if all(s == 0 for s in scores.values()):
+            return default
+        return max(scores.items(), key=lambda x: x[1])[0]
+
+    @staticmethod
+    def detect_batch(texts, default="en"):
+        return [LanguageDetector.detect(text, default) for text in texts]
+
+    @staticmethod
+    def main(argv=None):
+        """
+            Builds the profiles from the corpus of every language and writes them to the data directory.
+            Every so many lines are held out of the profiles and their first words are detected, which gives
+            the accuracy on short utterances.
+        """
+        parser = argparse.ArgumentParser(prog="tink.Detection", description="Builds the language profiles from the gettext catalogs and manual pages on this system.")
+        parser.add_argument("--languages", nargs="+", default=["en", "nl", "fr", "de"], help="The languages to build a profile for.")
+        parser.add_argument("--locale-dir", default=LOCALE_DIR, help="The directory with the gettext catalogs.")
+        parser.add_argument("--man-dir", default=MAN_DIR, help="The directory with the manual pages.")
+        parser.add_argument("--size", type=int, default=PROFILE_SIZE, help="The amount of n-grams per profile.")
+        parser.add_argument("--source-size", type=int, default=SOURCE_SIZE, help="The amount of characters taken from each source.")
+        parser.add_argument("--holdout", type=int, default=20, help="Every so many lines are held out to measure the accuracy.")
+        parser.add_argument("--words", type=int, default=4, help="The amount of words of a held out line which are detected.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report the accuracy, leaving the profiles alone.")
+        args = parser.parse_args(argv)
+
+        profiles = {}
+        held = {}
+        for lang in args.languages:
+            lines = LanguageDetector.read_corpus(lang, args.locale_dir, args.man_dir, args.source_size)
+            if len(lines) == 0:
+                raise Exception(f"There is no corpus for '{lang}' in '{args.locale_dir}' or '{args.man_dir}'.")
+            held[lang] = [" ".join(line.split()[:args.words]) for line in lines[::args.holdout]]
+            training = [line for i, line in enumerate(lines) if i % args.holdout != 0]
+            profiles[lang] = LanguageDetector.build_profile("\n".join(training), args.size)
+            sys.stderr.write(f"{lang}: {len(training)} lines, {sum(len(line) for line in training)} characters\n")
+
+        LanguageDetector.use_profiles({lang: dict(profile) for lang, profile in profiles.items()})
+        try:
+            for lang, texts in held.items():
+                texts = [t for t in texts if len(wordx.findall(t)) > 0]
+                right = sum(1 for found in LanguageDetector.detect_batch(texts) if found == lang)
+                sys.stderr.write(f"{lang}: {right / max(len(texts), 1):.1%} of {len(texts)} held out lines of {args.words} words\n")
+        finally:
+            LanguageDetector._weights = None
+        if not args.dry_run:
+            source = f"the gettext catalogs in {args.locale_dir} and the manual pages in {args.man_dir}, see LanguageDetector.main"
+            for lang, profile in profiles.items():
+                LanguageDetector.save_profile(profile, lang, source)
+        return 0
+
+
+class Batch():
+    """
+        Batch versions of the Language, Patterns and Understanding functions for texts in mixed languages.
+        The texts are grouped per language, either given or detected, each group is handled in one go
+        by the model of its language and the results come back in the order of the texts.
+    """
+
+    @staticmethod
+    def route(texts, operation, lang=None):
+        """
+            Groups the texts per language and runs the operation once per group.
+
+        :param texts: A list of texts.
+        :param operation: A function taking a list of texts and a language, returning a list of results.
+        :param lang: The language of all texts, a list with the language of each text or None to detect them.
+        :return: The results in the order of the texts.
+        """
+        texts = list(texts)
+        if lang is None:
+            langs = LanguageDetector.detect_batch(texts)
+        elif isinstance(lang, str):
+            langs = [lang] * len(texts)
+        else:
+            langs = list(lang)
+        groups = {}
+        for i, l in enumerate(langs):
+            groups.setdefault(l, []).append(i)
+        results = [None] * len(texts)
+        for l, indices in groups.items():
+            for i, result in zip(indices, operation([texts[i] for i in indices], l)):
+                results[i] = result
+        return results
+
+    @staticmethod
+    def _get_docs(texts, lang):
+        """
+            Runs the Spacy model over a group of texts at once.
+        """
+        return Resources.get_spacy_model(lang).pipe(texts)
+
+    @staticmethod
+    def get_languages(texts):
+        return LanguageDetector.detect_batch(texts)
+
+    @staticmethod
+    def get_nouns(texts, lang=None):
+        return Batch.route(texts, lambda group, l: [[t for t in Language._cleanup_text(doc) if t.pos_ == "NOUN"] for doc in Batch._get_docs(group, l)], lang)
+
+    @staticmethod
+    def get_verbs(texts, lang=None):
+        return Batch.route(texts, lambda group, l: [[t for t in Language._cleanup_text(doc) if t.pos_ == "VERB"] for doc in Batch._get_docs(group, l)], lang)
+
+    @staticmethod
+    def get_entities(texts, lang=None):
+        return Batch.route(texts, lambda group, l: [[NamedEntity(e) for e in doc.ents] for doc in Batch._get_docs(group, l)], lang)
+
+    @staticmethod
+    def get_tokens(texts, lang=None):
+        return Batch.route(texts, lambda group, l: [[node for nodes in sentences for node in nodes] for sentences in Understanding.get_sentences_batch(group, l)], lang)
+
+    @staticmethod
+    def get_svo(texts, lang=None):
+        def extract(group, l):
+            return [[triple for nodes in sentences for triple in SVOExtractor(Dependency(nodes), l).extract_svo()] for sentences in Understanding.get_sentences_batch(group, l)]
+
+        return Batch.route(texts, extract, lang)
+
+    @staticmethod
+    def fit(pattern, texts, lang=None):
+        # the group is tokenized by one pass of the Spacy model
+        return Batch.route(texts, lambda group, l: [Patterns.fit(pattern, AnalyzedText(text, l, doc), l) for text, doc in zip(group, Batch._get_docs(group, l))], lang)
+
+
+if __name__ == "__main__":
+    sys.exit(LanguageDetector.main(sys.argv[1:]))
@@ -0,0 +1,229 @@
+import json
+import os
+from multiprocessing import Pool
+
+from .Understanding import Understanding, SVOExtractor
+
+
+class SVOPipeline():
+    """
+        Streams SVO triples out of a collection of texts.
+        The texts are parsed in batches, optionally across processes, and the triples are written
+        to the output as soon as a batch is done. With a checkpoint file an interrupted run
+        resumes where it stopped instead of starting all over.
+    """
+
+    def __init__(self, lang="en", batch_size=64, workers=1, format="jsonl", checkpoint=None):
+        """
+            Creates a new instance.
+
+        :param lang: The language of the texts.
+        :param batch_size: The amount of texts handed to a worker at once.
+        :param workers: The amount of processes parsing the texts.
+        :param format: The output format, either 'jsonl' or 'tsv'.
+        :param checkpoint: The path of the checkpoint file, if any.
+        """
+        if format not in ["jsonl", "tsv"]:
+            raise Exception(f"The format '{format}' is not supported.")
+        self.lang = lang
+        self.batch_size = batch_size
+        self.workers = workers
+        self.format = format
+        self.checkpoint = checkpoint
+        self.texts = 0
+        self.triples = 0
+
+    # region Input
+    @staticmethod
+    def _read_files(paths, position=None):
+        """
+            Yields the non-empty lines of the given files together with their byte offset
+            and the offset to resume from once the line is processed.
+
+        :param paths: A list of file paths.
+        :param position: The checkpoint position to resume from, if any.
+        """
+        done = position["done"] if position is not None else []
+        for path in paths:
+            if path in done:
+                continue
+            with open(path, "rb") as f:
+                offset = 0
+                if position is not None and position["source"] == path:
+                    offset = position["offset"]
+                    f.seek(offset)
+                for line in f:
+                    text = line.decode("utf-8", errors="ignore").strip()
+                    if len(text) > 0:
+                        yield path, offset, offset + len(line), text
+                    offset += len(line)
+            # marks the end of the file
+            yield path, None, None, None
+
+    @staticmethod
+    def _read_texts(texts, position=None):
+        """
+            Yields the given texts together with their index.
+
+        :param texts: An iterable of strings.
+        :param position: The checkpoint position to resume from, if any.
+        """
+        start = position["offset"] if position is not None else 0
+        for i, text in enumerate(texts):
+            if i < start:
+                continue
+            yield "<texts>", i, i + 1, text
+
+    @staticmethod
+    def _batches(items, size):
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if len(batch) > 0:
+            yield batch
+
+    # endregion
+
+    # region Extraction
+    @staticmethod
+    def extract(text, lang="en"):
+        """
+            Returns the SVO triples of every sentence in the given text.
+
+        :param text: Any text.
+        :param lang: The language of the text.
+        :return: A list of (sentence index, triple) tuples.
+        """
+        found = []
+        for i, tree in enumerate(Understanding.get_document(text, lang)):
+            for triple in SVOExtractor(tree, lang).extract_svo():
+                found.append((i, triple))
+        return found
+
+    @staticmethod
+    def _extract_batch(task):
+        """
+            Runs the extraction for a batch; this is what the worker processes execute.
+        """
+        lang, batch = task
+        results = []
+        for source, offset, next, text in batch:
+            if text is None:
+                results.append((source, offset, next, None))
+            else:
+                results.append((source, offset, next, SVOPipeline.extract(text, lang)))
+        return results
+
+    # endregion
+
+    # region Output
+    def _format(self, source, offset, sentence, triple):
+        subjects, verb, objects = triple
+        if self.format == "jsonl":
+            return json.dumps({
+                "source": source,
+                "offset": offset,
+                "sentence": sentence,
+                "subjects": subjects,
+                "verb": verb,
+                "objects": objects
+            }, ensure_ascii=False) + "\n"
+        else:
+            fields = [source, str(offset), str(sentence), "|".join(subjects), verb, "|".join(objects)]
+            return "\t".join([f.replace("\t", " ") for f in fields]) + "\n"
+
+    def _load_checkpoint(self):
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return None
+        with open(self.checkpoint, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_checkpoint(self, position):
+        """
+            Writes the checkpoint via a temporary file so that an interruption never leaves a broken one.
+        """
+        if self.checkpoint is None:
+            return
+        position["texts"] = self.texts
+        position["triples"] = self.triples
+        temp = self.checkpoint + ".tmp"
+        with open(temp, "wt", encoding="utf-8") as f:
+            json.dump(position, f)
+        os.replace(temp, self.checkpoint)
+
+    # endregion
+
+    def _run(self, items, output, position):
+        """
+            Parses the items batch after batch and writes the triples as they come in.
+        """
+        if position is None:
+            position = {"source": None, "offset": 0, "done": []}
+        else:
+            self.texts = position.get("texts", 0)
+            self.triples = position.get("triples", 0)
+
+        if isinstance(output, str):
+            if self.texts > 0 and "output" in position:
+                # what was written after the last checkpoint is written again
+                with open(output, "r+b") as f:
+                    f.truncate(position["output"])
+            out = open(output, "at" if self.texts > 0 else "wt", encoding="utf-8")
+        else:
+            out = output
+        tasks = ((self.lang, batch) for batch in SVOPipeline._batches(items, self.batch_size))
+        pool = Pool(self.workers) if self.workers > 1 else None
+        try:
+            results = pool.imap(SVOPipeline._extract_batch, tasks) if pool is not None else map(SVOPipeline._extract_batch, tasks)
+            for batch in results:
+                for source, offset, next, found in batch:
+                    if found is None:
+                        position["done"].append(source)
+                        position["source"] = None
+                        position["offset"] = 0
+                        continue
+                    for sentence, triple in found:
+                        out.write(self._format(source, offset, sentence, triple))
+                        self.triples += 1
+                    self.texts += 1
+                    position["source"] = source
+                    position["offset"] = next
+                # the checkpoint never runs ahead of what is on disk
+                out.flush()
+                if isinstance(output, str):
+                    position["output"] = out.tell()
+                self._save_checkpoint(position)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+            if isinstance(output, str):
+                out.close()
+        return self.triples
+
+    def run(self, texts, output):
+        """
+            Extracts the triples of the given texts.
+
+        :param texts: An iterable of strings, for instance a generator over a database cursor.
+        :param output: A path or a writable text stream.
+        :return: The total amount of triples written.
+        """
+        position = self._load_checkpoint()
+        return self._run(SVOPipeline._read_texts(texts, position), output, position)
+
+    def run_files(self, paths, output):
+        """
+            Extracts the triples of the given files, where every line is a text.
+
+        :param paths: A path or a list of paths.
+        :param output: A path or a writable text stream.
+        :return: The total amount of triples written.
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        position = self._load_checkpoint()
+        return self._run(SVOPipeline._read_files(paths, position), output, position)
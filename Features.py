@@ -0,0 +1,197 @@
+import numpy as np
+
+# the universal POS tags, see http://universaldependencies.org/u/pos/
+UPOS = ["ADJ", "ADP", "ADV", "AUX", "CCONJ", "DET", "INTJ", "NOUN", "NUM", "PART", "PRON", "PROPN", "PUNCT", "SCONJ", "SYM", "VERB", "X"]
+
+# the universal dependency relations without subtypes, see http://universaldependencies.org/u/dep/
+DEPRELS = ["acl", "advcl", "advmod", "amod", "appos", "aux", "case", "cc", "ccomp", "clf", "compound", "conj", "cop", "csubj", "dep", "det",
+           "discourse", "dislocated", "expl", "fixed", "flat", "goeswith", "iobj", "list", "mark", "nmod", "nsubj", "nummod", "obj", "obl",
+           "orphan", "parataxis", "punct", "reparandum", "root", "vocative", "xcomp"]
+
+POS_CODES = {pos: i for i, pos in enumerate(UPOS)}
+DEPREL_CODES = {rel: i for i, rel in enumerate(DEPRELS)}
+
+
+class TreeArrays():
+    """
+        The dependency trees of one or more sentences as flat integer arrays, one entry per token.
+
+        - heads: the position of the head of each token, the root points to itself
+        - pos: the code of the POS tag, see UPOS
+        - deprel: the code of the dependency relation without subtype, see DEPRELS
+        - depth: the distance to the root
+        - sentence: the index of the sentence the token belongs to
+        - offsets: the position of the first token of each sentence followed by the total amount of tokens
+    """
+
+    def __init__(self, heads, pos, deprel, offsets):
+        self.heads = heads
+        self.pos = pos
+        self.deprel = deprel
+        self.offsets = offsets
+        self.sentence = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+        self.depth = TreeArrays._get_depth(heads)
+
+    @staticmethod
+    def _get_depth(heads):
+        """
+            Computes the depth of all tokens at once by following the heads level by level.
+            The amount of array operations equals the depth of the deepest tree.
+        """
+        depth = np.zeros(len(heads), dtype=np.int32)
+        current = np.arange(len(heads), dtype=np.int32)
+        while True:
+            moving = heads[current] != current
+            if not moving.any():
+                return depth
+            depth += moving
+            current = heads[current]
+
+    @property
+    def size(self):
+        return len(self.heads)
+
+    @property
+    def sentences(self):
+        return len(self.offsets) - 1
+
+    @property
+    def head_distance(self):
+        """
+            The signed distance between each token and its head; zero for the roots.
+        """
+        return self.heads - np.arange(len(self.heads), dtype=np.int32)
+
+    @staticmethod
+    def from_trees(trees):
+        """
+            Converts Dependency objects to arrays.
+            This is the only step visiting the tokens one by one; everything after it is vectorized.
+
+        :param trees: An iterable of Dependency objects.
+        :return: A TreeArrays instance.
+        """
+        heads = []
+        pos = []
+        deprel = []
+        offsets = [0]
+        start = 0
+        for tree in trees:
+            position = {node.id: start + i for i, node in enumerate(tree.nodes)}
+            for i, node in enumerate(tree.nodes):
+                heads.append(position.get(node.parentId, start + i))
+                pos.append(POS_CODES.get(node.pos, POS_CODES["X"]))
+                deprel.append(DEPREL_CODES.get(node.dep.split(":")[0].lower(), DEPREL_CODES["dep"]))
+            start += len(tree.nodes)
+            offsets.append(start)
+        return TreeArrays(np.array(heads, dtype=np.int32),
+                          np.array(pos, dtype=np.int8),
+                          np.array(deprel, dtype=np.int8),
+                          np.array(offsets, dtype=np.int64))
+
+    @staticmethod
+    def concatenate(batches):
+        """
+            Joins arrays of several documents into one batch.
+
+        :param batches: A list of TreeArrays.
+        :return: A TreeArrays instance.
+        """
+        shifts = np.cumsum([0] + [b.size for b in batches[:-1]])
+        heads = np.concatenate([b.heads + shift for b, shift in zip(batches, shifts)]).astype(np.int32)
+        offsets = np.concatenate([[0]] + [b.offsets[1:] + shift for b, shift in zip(batches, shifts)]).astype(np.int64)
+        return TreeArrays(heads,
+                          np.concatenate([b.pos for b in batches]),
+                          np.concatenate([b.deprel for b in batches]),
+                          offsets)
+
+
+class Features():
+    """
+        Vectorized features over TreeArrays, one row per sentence.
+    """
+
+    @staticmethod
+    def _per_sentence(arrays, codes, size):
+        """
+            Counts the codes per sentence.
+        """
+        flat = arrays.sentence.astype(np.int64) * size + codes
+        return np.bincount(flat, minlength=arrays.sentences * size).reshape(arrays.sentences, size)
+
+    @staticmethod
+    def _sentence_max(arrays, values):
+        """
+            The largest of the token values per sentence, 0 for an empty sentence.
+        """
+        found = np.zeros(arrays.sentences, dtype=values.dtype)
+        filled = np.diff(arrays.offsets) > 0
+        if filled.any():
+            # an empty sentence adds no tokens to the one before, so its start can be left out
+            found[filled] = np.maximum.reduceat(values, arrays.offsets[:-1][filled])
+        return found
+
+    @staticmethod
+    def pos_counts(arrays):
+        """
+            The amount of tokens with each POS tag.
+
+        :param arrays: A TreeArrays instance.
+        :return: A matrix of shape (sentences, len(UPOS)).
+        """
+        return Features._per_sentence(arrays, arrays.pos.astype(np.int64), len(UPOS))
+
+    @staticmethod
+    def deprel_bigrams(arrays):
+        """
+            The amount of (head relation, dependent relation) pairs.
+
+        :param arrays: A TreeArrays instance.
+        :return: A matrix of shape (sentences, len(DEPRELS) ** 2).
+        """
+        size = len(DEPRELS)
+        dependents = arrays.heads != np.arange(arrays.size)
+        pairs = arrays.deprel[arrays.heads].astype(np.int64) * size + arrays.deprel
+        flat = arrays.sentence[dependents].astype(np.int64) * size * size + pairs[dependents]
+        return np.bincount(flat, minlength=arrays.sentences * size * size).reshape(arrays.sentences, size * size)
+
+    @staticmethod
+    def tree_depth(arrays):
+        """
+            The depth of each tree.
+
+        :param arrays: A TreeArrays instance.
+        :return: A vector with one value per sentence.
+        """
+        return Features._sentence_max(arrays, arrays.depth)
+
+    @staticmethod
+    def head_distances(arrays):
+        """
+            The mean and maximum absolute distance between the tokens and their heads.
+
+        :param arrays: A TreeArrays instance.
+        :return: A matrix of shape (sentences, 2).
+        """
+        distance = np.abs(arrays.head_distance)
+        lengths = np.maximum(np.diff(arrays.offsets), 1)
+        total = np.bincount(arrays.sentence, weights=distance, minlength=arrays.sentences)
+        largest = Features._sentence_max(arrays, distance)
+        return np.column_stack([total / lengths, largest])
+
+    @staticmethod
+    def get_matrix(arrays):
+        """
+            All the features next to each other.
+
+        :param arrays: A TreeArrays instance or a list of Dependency objects.
+        :return: A float matrix with one row per sentence.
+        """
+        if not isinstance(arrays, TreeArrays):
+            arrays = TreeArrays.from_trees(arrays)
+        return np.hstack([
+            Features.pos_counts(arrays),
+            Features.deprel_bigrams(arrays),
+            Features.tree_depth(arrays)[:, None],
+            Features.head_distances(arrays)
+        ]).astype(np.float32)
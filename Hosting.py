@@ -0,0 +1,240 @@
+import argparse
+import gc
+import os
+import signal
+import sys
+import time
+import traceback
+
+from .Resources import Resources
+from .Understanding import Understanding
+
+# the sample parsed by every model before the workers are forked
+WARM_UP = "Warm up the model."
+# the seconds before a crashed worker is replaced, doubled for every crash in a row
+RESTART_DELAY = 0.5
+# the amount of crashes in a row after which a worker is not replaced anymore
+MAX_RESTARTS = 5
+# the seconds a worker has to run before its crash doesn't count as one in a row
+STABLE_TIME = 60
+
+
+class Supervisor():
+    """
+        Runs a handler in preforked worker processes which share the models loaded in the parent.
+
+        The parent loads and warms the models of the configured languages through Resources, freezes the garbage
+        collector so that the objects loaded so far are left alone (a collection touching them would copy
+        their pages into every worker) and then forks. The workers see the models copy-on-write, so the memory
+        of a worker is mostly what it allocates itself; get_memory and report show how much that is.
+    """
+
+    def __init__(self, handler, workers=2, languages=None, respawn=True, max_restarts=MAX_RESTARTS, restart_delay=RESTART_DELAY):
+        """
+            Creates a new instance.
+
+        :param handler: The function run by each worker, given the number of the worker. The worker ends when it returns.
+        :param workers: The amount of worker processes.
+        :param languages: The languages whose models are loaded in the parent; 'en' by default.
+        :param respawn: Whether a worker which crashes while the supervisor runs is replaced.
+        :param max_restarts: The amount of crashes in a row after which a worker is given up.
+        :param restart_delay: The seconds before a crashed worker is replaced, doubled for every crash in a row.
+        """
+        self.handler = handler
+        self.workers = workers
+        self.languages = languages if languages is not None else ["en"]
+        self.respawn = respawn
+        self.max_restarts = max_restarts
+        self.restart_delay = restart_delay
+        self.children = {}
+        # the start time and the crashes in a row by worker number
+        self.started = {}
+        self.crashes = {}
+        self.running = False
+        self.loaded = False
+
+    def preload(self):
+        """
+            Loads the UDPipe and Spacy models of the configured languages and runs them once.
+        """
+        if self.loaded:
+            return
+        for lang in self.languages:
+            Understanding.get_tokens(WARM_UP, lang)
+            try:
+                Resources.get_spacy_model(lang)(WARM_UP)
+            except Exception:
+                # not every UDPipe language has a Spacy model
+                pass
+        self.loaded = True
+
+    @staticmethod
+    def freeze():
+        """
+            Moves all objects to the permanent generation of the garbage collector, if the Python version allows.
+        """
+        gc.collect()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+
+    def _fork(self, number):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                self.handler(number)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = number
+        self.started[number] = time.monotonic()
+        return pid
+
+    def start(self):
+        """
+            Loads the models and forks the workers.
+        """
+        self.preload()
+        Supervisor.freeze()
+        self.running = True
+        for number in range(self.workers):
+            self._fork(number)
+
+    def stop(self, signum=None, frame=None):
+        """
+            Terminates the workers; also the handler of SIGTERM and SIGINT while running.
+        """
+        self.running = False
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+    def wait(self):
+        """
+            Waits for the workers to end, replacing those which crash while running.
+            A worker which crashes again soon after it was replaced is replaced after a growing delay,
+            and given up after max_restarts crashes in a row.
+        """
+        while len(self.children) > 0:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            number = self.children.pop(pid, None)
+            if number is None or not self.running or not self.respawn:
+                continue
+            if os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0:
+                # the handler returned
+                continue
+            if time.monotonic() - self.started[number] >= STABLE_TIME:
+                self.crashes[number] = 0
+            crashes = self.crashes.get(number, 0)
+            if crashes >= self.max_restarts:
+                sys.stderr.write(f"Worker {number} crashed {crashes + 1} times in a row and is not replaced.\n")
+                continue
+            self.crashes[number] = crashes + 1
+            time.sleep(self.restart_delay * 2 ** crashes)
+            if self.running:
+                self._fork(number)
+        self.running = False
+
+    def run(self):
+        """
+            Starts the workers and supervises them until they end or the process is interrupted.
+        """
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        self.start()
+        self.wait()
+
+    @staticmethod
+    def get_process_memory(pid):
+        """
+            Returns the memory of a process in bytes from /proc, which only exists on Linux.
+
+        :param pid: A process id.
+        :return: A dictionary with the 'rss', 'pss' (shared pages divided among the processes sharing them)
+            and 'uss' (pages of this process alone), or None if not available.
+        """
+        found = {}
+        for name in ["smaps_rollup", "smaps"]:
+            try:
+                with open(f"/proc/{pid}/{name}", "rt") as f:
+                    for line in f:
+                        parts = line.split()
+                        if len(parts) == 3 and parts[2] == "kB":
+                            found[parts[0][:-1]] = found.get(parts[0][:-1], 0) + int(parts[1]) * 1024
+                break
+            except OSError:
+                continue
+        if len(found) == 0:
+            return None
+        return {"rss": found.get("Rss", 0), "pss": found.get("Pss", 0),
+                "uss": found.get("Private_Clean", 0) + found.get("Private_Dirty", 0)}
+
+    def get_memory(self):
+        """
+            Returns the memory of the parent and every worker, see get_process_memory.
+
+        :return: A dictionary from process id to memory, the parent included.
+        """
+        pids = [os.getpid()] + sorted(self.children)
+        return {pid: Supervisor.get_process_memory(pid) for pid in pids}
+
+    def report(self):
+        """
+            Returns a table with the memory of the parent and the workers in MB.
+        """
+        lines = [f"{'process':>12} {'rss':>10} {'pss':>10} {'uss':>10}"]
+        for pid, memory in self.get_memory().items():
+            name = "parent" if pid == os.getpid() else f"worker {self.children.get(pid)}"
+            if memory is None:
+                lines.append(f"{name:>12} {'n/a':>10} {'n/a':>10} {'n/a':>10}")
+            else:
+                lines.append(f"{name:>12} " + " ".join([f"{memory[k] / 2 ** 20:>10.1f}" for k in ["rss", "pss", "uss"]]))
+        return "\n".join(lines)
+
+    @staticmethod
+    def main(argv=None):
+        """
+            Loads the models, forks workers which each parse a sample and prints their memory.
+        """
+        parser = argparse.ArgumentParser(prog="tink.Hosting", description="Shows the memory of preforked workers sharing the models.")
+        parser.add_argument("--languages", nargs="+", default=["en"], help="The languages to load.")
+        parser.add_argument("--workers", type=int, default=4, help="The amount of worker processes.")
+        args = parser.parse_args(argv)
+        read, write = os.pipe()
+
+        def handler(number):
+            os.close(read)
+            for lang in args.languages:
+                Understanding.get_tokens(WARM_UP, lang)
+            os.write(write, b"x")
+            while True:
+                time.sleep(60)
+
+        supervisor = Supervisor(handler, args.workers, args.languages, respawn=False)
+        supervisor.start()
+        os.close(write)
+        ready = 0
+        while ready < args.workers:
+            data = os.read(read, args.workers)
+            if len(data) == 0:
+                break
+            ready += len(data)
+        print(supervisor.report())
+        supervisor.stop()
+        supervisor.wait()
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Supervisor.main(sys.argv[1:]))
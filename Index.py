@@ -0,0 +1,253 @@
+import os
+
+from .Understanding import Understanding, Dependency, Document
+
+MAGIC = b"TINKIDX1"
+
+
+def _write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(buffer, position):
+    value = 0
+    shift = 0
+    while True:
+        b = buffer[position]
+        position += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, position
+        shift += 7
+
+
+class PostingList():
+    """
+        The (document, sentence, token) positions of a term, compressed as variable-length integers.
+        Each position is stored relative to the previous one: the document gap, then the sentence
+        (a gap within the same document) and the token (a gap within the same sentence).
+        Positions have to be appended in ascending order, which is the order documents are indexed in.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.count = 0
+        self.last = (0, 0, 0)
+
+    def append(self, doc, sentence, token):
+        last_doc, last_sentence, last_token = self.last
+        if self.count == 0:
+            last_doc = 0
+        doc_gap = doc - last_doc
+        _write_varint(self.data, doc_gap)
+        if doc_gap == 0 and self.count > 0:
+            sentence_gap = sentence - last_sentence
+            _write_varint(self.data, sentence_gap)
+            _write_varint(self.data, token - last_token if sentence_gap == 0 else token)
+        else:
+            _write_varint(self.data, sentence)
+            _write_varint(self.data, token)
+        self.last = (doc, sentence, token)
+        self.count += 1
+
+    def __iter__(self):
+        doc = sentence = token = 0
+        position = 0
+        first = True
+        data = self.data
+        while position < len(data):
+            doc_gap, position = _read_varint(data, position)
+            s, position = _read_varint(data, position)
+            t, position = _read_varint(data, position)
+            if doc_gap == 0 and not first:
+                if s == 0:
+                    token += t
+                else:
+                    sentence += s
+                    token = t
+            else:
+                doc += doc_gap
+                sentence = s
+                token = t
+            first = False
+            yield doc, sentence, token
+
+    def get_sentences(self):
+        """
+            The distinct (document, sentence) pairs in ascending order.
+        """
+        found = []
+        for doc, sentence, token in self:
+            if len(found) == 0 or found[-1] != (doc, sentence):
+                found.append((doc, sentence))
+        return found
+
+    def __len__(self):
+        return self.count
+
+
+class InvertedIndex():
+    """
+        Maps lemmas (per POS tag) and words to the positions where they occur in a parsed corpus,
+        so that questions like 'which sentences contain the lemma go as a VERB' don't need a scan.
+        Words are indexed in lower case. Documents can be appended at any time and the index
+        can be saved and loaded again.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.documents = 0
+
+    @staticmethod
+    def _lemma_key(lemma, pos):
+        return f"L\t{lemma}\t{pos}"
+
+    @staticmethod
+    def _word_key(word):
+        return f"W\t{word.lower()}"
+
+    @staticmethod
+    def _get_sentences(document):
+        """
+            Splits the input in sentences.
+            A flat list of tokens as returned by Understanding.get_tokens is split where the token ids start over.
+        """
+        if isinstance(document, Document):
+            return [tree.nodes for tree in document.sentences]
+        if isinstance(document, Dependency):
+            return [document.nodes]
+        document = list(document)
+        if len(document) == 0 or isinstance(document[0], list):
+            return document
+        sentences = []
+        for token in document:
+            if len(sentences) == 0 or token.id <= sentences[-1][-1].id:
+                sentences.append([])
+            sentences[-1].append(token)
+        return sentences
+
+    def _posting(self, key):
+        found = self.postings.get(key)
+        if found is None:
+            found = PostingList()
+            self.postings[key] = found
+        return found
+
+    def add(self, document):
+        """
+            Appends a parsed document to the index.
+
+        :param document: A Document, a Dependency, a list of token lists or the tokens from Understanding.get_tokens.
+        :return: The id of the document.
+        """
+        doc = self.documents
+        for s, nodes in enumerate(InvertedIndex._get_sentences(document)):
+            for t, node in enumerate(nodes):
+                self._posting(InvertedIndex._lemma_key(node.lemma, node.pos)).append(doc, s, t)
+                self._posting(InvertedIndex._word_key(node.word)).append(doc, s, t)
+        self.documents += 1
+        return doc
+
+    def add_text(self, text, lang="en"):
+        """
+            Parses the given text and appends it to the index.
+
+        :return: The id of the document.
+        """
+        return self.add(Understanding.get_sentences(text, lang))
+
+    def find_lemma(self, lemma, pos):
+        """
+            Returns the (document, sentence, token) positions of the lemma with the given POS tag.
+        """
+        found = self.postings.get(InvertedIndex._lemma_key(lemma, pos))
+        return list(found) if found is not None else []
+
+    def find_word(self, word):
+        """
+            Returns the (document, sentence, token) positions of the given word.
+        """
+        found = self.postings.get(InvertedIndex._word_key(word))
+        return list(found) if found is not None else []
+
+    def find_sentences(self, *terms):
+        """
+            Returns the sentences containing all the given terms.
+
+        :param terms: Words, or (lemma, pos) tuples.
+        :return: A sorted list of (document, sentence) pairs.
+        """
+        lists = []
+        for term in terms:
+            key = InvertedIndex._lemma_key(*term) if isinstance(term, tuple) else InvertedIndex._word_key(term)
+            found = self.postings.get(key)
+            if found is None:
+                return []
+            lists.append(found)
+        if len(lists) == 0:
+            return []
+        # intersecting from the shortest list keeps the candidate set small
+        lists.sort(key=len)
+        candidates = set(lists[0].get_sentences())
+        for posting in lists[1:]:
+            candidates.intersection_update(posting.get_sentences())
+            if len(candidates) == 0:
+                return []
+        return sorted(candidates)
+
+    def save(self, path):
+        """
+            Writes the index to the given path.
+        """
+        data = bytearray(MAGIC)
+        _write_varint(data, self.documents)
+        _write_varint(data, len(self.postings))
+        for key, posting in self.postings.items():
+            encoded = key.encode("utf-8")
+            _write_varint(data, len(encoded))
+            data.extend(encoded)
+            _write_varint(data, posting.count)
+            for value in posting.last:
+                _write_varint(data, value)
+            _write_varint(data, len(posting.data))
+            data.extend(posting.data)
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+
+    @staticmethod
+    def load(path):
+        """
+            Reads an index written by save.
+
+        :param path: The path of the index file.
+        :return: An InvertedIndex instance.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise Exception(f"'{path}' is not an index file.")
+        index = InvertedIndex()
+        position = len(MAGIC)
+        index.documents, position = _read_varint(data, position)
+        terms, position = _read_varint(data, position)
+        for i in range(terms):
+            length, position = _read_varint(data, position)
+            key = data[position:position + length].decode("utf-8")
+            position += length
+            posting = PostingList()
+            posting.count, position = _read_varint(data, position)
+            last = []
+            for j in range(3):
+                value, position = _read_varint(data, position)
+                last.append(value)
+            posting.last = tuple(last)
+            length, position = _read_varint(data, position)
+            posting.data = bytearray(data[position:position + length])
+            position += length
+            index.postings[key] = posting
+        return index
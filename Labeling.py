@@ -0,0 +1,278 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from .Hosting import Supervisor
+from .Patterns import PatternSet
+from .Resources import Resources
+
+# the amount of bytes per shard, unless the shards are fewer than the workers
+SHARD_SIZE = 1 << 22
+# the records of lines without a fitting pattern
+unmatchedx = re.compile(rb'^\{"offset": \d+, "pattern": null,', re.M)
+
+
+class PatternLabeler():
+    """
+        Labels every line of a large file with the pattern it fits, using all cores.
+
+        The pattern set is compiled once in the parent, after which the workers are forked and inherit it.
+        The file is split in shards of about 'shard_size' bytes, cut at line ends, and every shard is labeled by a
+        worker into a part file next to the output. The parts are appended to the output in shard order as soon as
+        they are complete, so the output follows the input. With a checkpoint file an interrupted run resumes with
+        the shards that were not done yet.
+
+        Every non-empty line gives a JSON line with its byte 'offset' in the input, the 'pattern' it fits and the
+        'parameters', both None if no pattern fits.
+    """
+    # the labeler the forked workers use
+    _current = None
+
+    def __init__(self, patterns, lang="en", tokenizer="spacy", workers=None, shard_size=SHARD_SIZE, best=False):
+        """
+            Compiles the patterns.
+
+        :param patterns: A list of patterns.
+        :param lang: The language of the input.
+        :param tokenizer: 'spacy', 'rules' or 'auto', see Patterns.fit.
+        :param workers: The amount of worker processes, the amount of cores by default.
+        :param shard_size: The approximate amount of bytes per shard.
+        :param best: Whether a line gets the most specific fitting pattern (see PatternSet.best_fit) instead of the first.
+        """
+        self.pattern_set = PatternSet(patterns, lang, tokenizer)
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.best = best
+        self.lines = 0
+        self.matched = 0
+
+    # region Shards
+    def get_shards(self, path):
+        """
+            Splits the file in byte ranges which start at the beginning of a line.
+
+        :param path: The input file.
+        :return: A list of (start, end) offsets.
+        """
+        size = os.path.getsize(path)
+        count = max(self.workers, -(-size // self.shard_size), 1)
+        shards = []
+        with open(path, "rb") as f:
+            start = 0
+            for i in range(1, count + 1):
+                if start >= size:
+                    break
+                end = size if i == count else max(start, size * i // count)
+                if end < size:
+                    f.seek(end)
+                    f.readline()
+                    end = f.tell()
+                if end > start:
+                    shards.append((start, end))
+                    start = end
+        return shards
+
+    def label(self, text):
+        """
+            Returns the record of a line; a line without any words, like '...', fits no pattern.
+        """
+        try:
+            m = self.pattern_set.best_fit(text) if self.best else self.pattern_set.fit(text)
+        except Exception:
+            m = None
+        if m is None:
+            return {"pattern": None, "parameters": None}
+        return {"pattern": m.pattern, "parameters": m.as_dict()}
+
+    @staticmethod
+    def _label_shard(task):
+        """
+            Labels the lines of a shard into its part file; this is what the worker processes execute.
+            The part is written under a temporary name so that only complete parts exist.
+
+        :return: The index of the shard and its amount of lines and matches.
+        """
+        index, path, start, end, part = task
+        labeler = PatternLabeler._current
+        lines = 0
+        matched = 0
+        with open(path, "rb") as f, open(part + ".tmp", "wt", encoding="utf-8") as out:
+            f.seek(start)
+            offset = start
+            while offset < end:
+                line = f.readline()
+                if len(line) == 0:
+                    break
+                text = line.decode("utf-8", errors="ignore").strip()
+                if len(text) > 0:
+                    record = labeler.label(text)
+                    out.write(json.dumps(dict(offset=offset, **record), ensure_ascii=False) + "\n")
+                    lines += 1
+                    if record["pattern"] is not None:
+                        matched += 1
+                offset += len(line)
+        os.replace(part + ".tmp", part)
+        return index, lines, matched
+
+    # endregion
+
+    # region Checkpoint
+    @staticmethod
+    def _get_signature(path):
+        s = os.stat(path)
+        return {"path": os.path.abspath(path), "size": s.st_size, "mtime": s.st_mtime_ns}
+
+    def _load_checkpoint(self, checkpoint, path):
+        """
+            Returns the saved state if it belongs to the same input and patterns.
+        """
+        if checkpoint is None or not os.path.exists(checkpoint):
+            return None
+        with open(checkpoint, "rt", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("input") != PatternLabeler._get_signature(path) or state.get("patterns") != [c.pattern for c in self.pattern_set.patterns]:
+            raise Exception(f"The checkpoint '{checkpoint}' belongs to another input or pattern set.")
+        return state
+
+    @staticmethod
+    def _save_checkpoint(checkpoint, state):
+        if checkpoint is None:
+            return
+        temp = checkpoint + ".tmp"
+        with open(temp, "wt", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp, checkpoint)
+
+    # endregion
+
+    def run(self, path, output, checkpoint=None, progress=None):
+        """
+            Labels the lines of the file.
+
+        :param path: The input file, a line per utterance.
+        :param output: The output file.
+        :param checkpoint: The path of the checkpoint file, if any. It's removed once the run is complete.
+        :param progress: A function called as every shard is merged, given the bytes done, the total bytes,
+            the lines labeled and the seconds elapsed.
+        :return: The amount of lines labeled.
+        """
+        state = self._load_checkpoint(checkpoint, path)
+        parts = output + ".parts"
+        os.makedirs(parts, exist_ok=True)
+        fresh = state is None
+        if fresh:
+            state = {"input": PatternLabeler._get_signature(path), "patterns": [c.pattern for c in self.pattern_set.patterns],
+                     "shards": self.get_shards(path), "merged": 0, "output": 0, "lines": 0, "matched": 0}
+            open(output, "wb").close()
+            PatternLabeler._save_checkpoint(checkpoint, state)
+        for name in os.listdir(parts):
+            # parts of another run can't be trusted, unfinished or merged parts aren't needed
+            if fresh or name.endswith(".tmp") or int(name.split(".")[0]) < state["merged"]:
+                os.remove(os.path.join(parts, name))
+        shards = state["shards"]
+        self.lines = state["lines"]
+        self.matched = state["matched"]
+        total = shards[-1][1] if len(shards) > 0 else 0
+        started = time.perf_counter()
+
+        # the shard counts by index, None for the parts completed before an interruption
+        done = {}
+        tasks = []
+        for i in range(state["merged"], len(shards)):
+            part = os.path.join(parts, f"{i}.jsonl")
+            if os.path.exists(part):
+                done[i] = None
+            else:
+                tasks.append((i, path, shards[i][0], shards[i][1], part))
+
+        def merge(out):
+            """
+                Appends the parts which are next in line to the output.
+            """
+            while state["merged"] in done:
+                i = state["merged"]
+                part = os.path.join(parts, f"{i}.jsonl")
+                counts = done.pop(i)
+                with open(part, "rb") as f:
+                    data = f.read()
+                out.write(data)
+                out.flush()
+                if counts is None:
+                    counts = (data.count(b"\n"), data.count(b"\n") - len(unmatchedx.findall(data)))
+                self.lines += counts[0]
+                self.matched += counts[1]
+                state.update(merged=i + 1, output=out.tell(), lines=self.lines, matched=self.matched)
+                PatternLabeler._save_checkpoint(checkpoint, state)
+                os.remove(part)
+                if progress is not None:
+                    progress(shards[i][1], total, self.lines, time.perf_counter() - started)
+
+        PatternLabeler._current = self
+        pool = None
+        # whether this run froze the garbage collector, rather than whoever hosts it
+        frozen = False
+        if self.workers > 1 and len(tasks) > 1:
+            # the workers inherit the compiled patterns and the model without the collector copying their pages,
+            # instead of each loading the model
+            if self.pattern_set.uses_spacy():
+                Resources.get_spacy_model(self.pattern_set.lang)
+            if hasattr(gc, "get_freeze_count") and gc.get_freeze_count() == 0:
+                Supervisor.freeze()
+                frozen = True
+            pool = multiprocessing.get_context("fork").Pool(min(self.workers, len(tasks)))
+        try:
+            results = pool.imap_unordered(PatternLabeler._label_shard, tasks) if pool is not None else map(PatternLabeler._label_shard, tasks)
+            with open(output, "r+b") as out:
+                # what was written after the last checkpoint is written again
+                out.truncate(state["output"])
+                out.seek(state["output"])
+                merge(out)
+                for index, lines, matched in results:
+                    done[index] = (lines, matched)
+                    merge(out)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            if frozen:
+                gc.unfreeze()
+            PatternLabeler._current = None
+        os.rmdir(parts)
+        if checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        return self.lines
+
+    @staticmethod
+    def main(argv=None):
+        parser = argparse.ArgumentParser(prog="tink.Labeling", description="Labels the lines of a file with the patterns they fit, across all cores.")
+        parser.add_argument("input", help="The input file, a line per utterance.")
+        parser.add_argument("--patterns", required=True, help="A file with one pattern per line.")
+        parser.add_argument("--output", required=True, help="The JSONL output file.")
+        parser.add_argument("--lang", default="en", help="The language of the input; 'en' by default.")
+        parser.add_argument("--tokenizer", choices=["spacy", "rules", "auto"], default="spacy")
+        parser.add_argument("--workers", type=int, default=None, help="The amount of worker processes, all cores by default.")
+        parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="The approximate amount of bytes per shard.")
+        parser.add_argument("--checkpoint", default=None, help="A checkpoint file to resume an interrupted run.")
+        parser.add_argument("--best", action="store_true", help="Pick the most specific fitting pattern instead of the first.")
+        args = parser.parse_args(argv)
+        with open(args.patterns, "rt", encoding="utf-8") as f:
+            patterns = [line.strip() for line in f if len(line.strip()) > 0 and not line.startswith("#")]
+
+        def progress(done, total, lines, elapsed):
+            sys.stderr.write(f"\r{done / max(total, 1):.1%} {lines} lines {lines / max(elapsed, 1e-9):.0f} lines/s")
+            sys.stderr.flush()
+
+        labeler = PatternLabeler(patterns, args.lang, args.tokenizer, args.workers, args.shard_size, args.best)
+        start = time.perf_counter()
+        count = labeler.run(args.input, args.output, args.checkpoint, progress)
+        sys.stderr.write(f"\n{count} lines, {labeler.matched} matched in {time.perf_counter() - start:.1f}s\n")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(PatternLabeler.main(sys.argv[1:]))
@@ -1,14 +1,16 @@
-import csv
 from itertools import chain
 
 from nltk.corpus import wordnet
 
 from .Resources import *
+from .Text import AnalyzedText
+from .Thesaurus import Thesaurus
 
 
 class Language():
     """
         Standard language functionality.
+        Every function taking a text also takes an AnalyzedText, which is then not parsed again.
     """
 
     @staticmethod
@@ -30,26 +32,22 @@ class Language():
         :param lang: The language; 'en' by default.
         :return: the cleaned up text.
         """
+        if isinstance(text, AnalyzedText):
+            return " ".join(text.get_words())
         doc = Language.get_doc(text, lang, True)
         return " ".join([token.text for token in doc])
 
     @staticmethod
-    def _search_nl_synonym(word):
+    def _search_nl_synonym(word, fuzzy=False):
         """
             Returns NL synonyms.
             Based on data from http://data.opentaal.org/opentaalbank/thesaurus/
 
         :param word: any word
-        :return: the list of synonyms
+        :param fuzzy: whether a misspelled word finds the closest word
+        :return: the first row headed by the word, see Thesaurus
         """
-        res_dir = Resources.get_resources_dir()
-        p = os.path.join(res_dir, "thesaurus.nl.txt")
-        with open(p, 'rt', encoding='utf-8', errors='ignore') as f:
-            rd = csv.reader(f, delimiter=";")
-            for row in rd:
-                if row[0].lower() == word.lower():
-                    return row
-            return None
+        return Thesaurus.get_thesaurus().search(word, fuzzy)
 
     @staticmethod
     def get_doc(text, lang="en", cleanup=True):
@@ -60,14 +58,9 @@ class Language():
         :param lang: The language; 'en' by default.
         :return: a Spacy document
         """
-        if lang.lower() == "en":
-            elp = Resources.elp()
-            doc = elp(text)
-        elif lang.lower() == "nl":
-            nlp = Resources.nlp()
-            doc = nlp(text)
-        else:
-            raise Exception(f"Language '{lang}' is not supported.")
+        if isinstance(text, AnalyzedText):
+            return text.get_tokens(cleanup=cleanup)
+        doc = Resources.get_spacy_model(lang.lower())(text)
 
         if cleanup == True:
             return Language._cleanup_text(doc)
@@ -83,6 +76,8 @@ class Language():
         :param lang: The language; 'en' by default.
         :return: a list of tokens
         """
+        if isinstance(text, AnalyzedText):
+            return text.get_tokens("VERB")
         doc = Language.get_doc(text, lang)
         return [word for word in doc if word.pos_ == "VERB"]
 
@@ -95,6 +90,8 @@ class Language():
         :param lang: The language; 'en' by default.
         :return: a list of tokens
         """
+        if isinstance(text, AnalyzedText):
+            return text.get_tokens("NOUN")
         doc = Language.get_doc(text, lang)
         return [word for word in doc if word.pos_ == "NOUN"]
 
@@ -109,6 +106,8 @@ class Language():
         :param lang: The language; 'en' by default.
         :return: TRUE if the word is a verb.
         """
+        if isinstance(text, AnalyzedText):
+            return text.get_pos() == "VERB"
         doc = Language.get_doc(text, lang)
         return doc[0].pos_ == "VERB"
 
@@ -122,26 +121,32 @@ class Language():
         :param lang: The language; 'en' by default.
         :return: TRUE if the word is a noun.
         """
+        if isinstance(text, AnalyzedText):
+            return text.get_pos() == "NOUN"
         doc = Language.get_doc(text, lang)
         return doc[0].pos_ == "NOUN"
 
     @staticmethod
-    def get_synonyms(word, lang="en"):
+    def get_synonyms(word, lang="en", fuzzy=False):
         """
             Returns synonyms of the given word.
             The Dutch scope is limited due to lack of data but the current
             implementation is a flat text file and easily extensible.
+            Inflected Dutch words are found through their stem, see Thesaurus.normalize.
 
         :param word: A single word is expected.
         :param lang: The language; 'en' by default.
+        :param fuzzy: Whether a misspelled Dutch word gives the synonyms of the closest word.
         :return: A list of synonyms.
         """
+        if isinstance(word, AnalyzedText):
+            word = word.text
         if lang == "en":
             synonyms = wordnet.synsets(word)
             lemmas = set(chain.from_iterable([word.lemma_names() for word in synonyms]))
             return [syn.replace("_", " ") for syn in list(lemmas)]
         elif lang == "nl":
-            return Language._search_nl_synonym(word)
+            return Language._search_nl_synonym(word, fuzzy)
         else:
             raise Exception(f"Language '{lang}' is not supported.")
 
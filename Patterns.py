@@ -1,9 +1,19 @@
 import re
+from collections import OrderedDict
 
 from .Language import *
+from .Text import AnalyzedText
 
 shapex = re.compile("((?=^)|\s)%\w+(\_)?(\:((\([\w,\s]+\))|\w+))?", re.I)
 capx = re.compile("((?=^)|\s)(%\w+(\_)?(\:((\([\w,\s]+\))|\w+))?)")
+# words (with inner apostrophes and hyphens), numbers and symbols; punctuation and whitespace are left out
+tokenx = re.compile(r"\d+(?:[.,:]\d+)*|[^\W_]+(?:['’\-][^\W_]+)*|_+|[$€£%#@&+=<>*~|/\\^]")
+
+# 'spacy' tokenizes with the Spacy model, 'rules' with a regular expression and 'auto'
+# only uses Spacy for patterns with a linguistic type constraint
+TOKENIZERS = ["spacy", "rules", "auto"]
+# the amount of compiled patterns kept, the least recently used go first
+COMPILED_SIZE = 1024
 
 
 class TypeConstraints():
@@ -11,7 +21,9 @@ class TypeConstraints():
         Collects the methods which tell whether the giving value can be accepted.
         When a parameter '%name_something' is present there should be a method in this class
         called 'is_something' returning True/False and all else happens automatically.
+        Constraints relying on a language model are listed in 'linguistic'.
     """
+    linguistic = {"verb"}
 
     @staticmethod
     def is_verb(value):
@@ -38,6 +50,7 @@ class Parameter():
         A matching parameter.
         Corresponding to something in the shape of '%name_type:default'.
     """
+    __slots__ = ["name", "value", "type", "default"]
 
     def __init__(self, name):
         self.name = name
@@ -45,18 +58,52 @@ class Parameter():
         self.type = None
         self.default = None
 
+    def copy(self, value=None):
+        """
+            Returns a copy of this parameter with the given value.
+        """
+        p = Parameter(self.name)
+        p.type = self.type
+        p.default = self.default
+        p.value = value
+        return p
+
 
 class Match():
     """
     The result of a pattern matching.
+
+    The parameters are taken from the template of the compiled pattern and shared with it until a value is set,
+    so a match without values costs next to nothing. The parameters handed out by get_parameter and parameters are
+    the match's own copies, so changing them leaves the compiled pattern alone.
     """
+    __slots__ = ["pattern", "input", "_parameters", "_template", "_index", "_owned"]
 
-    def __init__(self, pattern, input):
-        self.parameters = []
+    def __init__(self, pattern, input, template=None):
+        if template is None:
+            template = Patterns.compile(pattern)
         self.pattern = pattern
         self.input = input
-        for p in Patterns._collect_parameters(pattern):
-            self.parameters.append(p)
+        self._template = template.parameters
+        self._index = template.index
+        self._parameters = self._template
+        # whether none of the parameters is shared with the template anymore
+        self._owned = False
+
+    def _own(self):
+        if not self._owned:
+            self._parameters = [p.copy(p.value) for p in self._parameters]
+            self._owned = True
+        return self._parameters
+
+    @property
+    def parameters(self):
+        """
+            The parameters of this match.
+
+        :return: a list of Parameter objects.
+        """
+        return self._own()
 
     @property
     def get_values(self):
@@ -65,7 +112,7 @@ class Match():
 
         :return: a list of parameter values.
         """
-        return [p.value for p in self.parameters]
+        return [p.value for p in self._parameters]
 
     def get_parameter(self, name):
         """
@@ -74,11 +121,25 @@ class Match():
         :param name: The name of the parameter.
         :return: a Parameter object
         """
-        found = [p for p in self.parameters if p.name == name]
-        if len(found) > 0:
-            return found[0]
-        else:
+        i = self._index.get(name)
+        if i is None:
             return None
+        return self._own()[i]
+
+    def set_value(self, name, value):
+        """
+            Sets the value of the parameter with the given name.
+
+        :param name: a parameter name.
+        :param value: the value.
+        """
+        i = self._index[name]
+        if self._owned:
+            self._parameters[i].value = value
+            return
+        if self._parameters is self._template:
+            self._parameters = list(self._template)
+        self._parameters[i] = self._template[i].copy(value)
 
     def has_value(self, name):
         """
@@ -87,11 +148,8 @@ class Match():
         :param name: a parameter name.
         :return: True the parameter is not None
         """
-        p = self.get_parameter(name)
-        if p is None:
-            return False
-        else:
-            return p.value is not None
+        i = self._index.get(name)
+        return i is not None and self._parameters[i].value is not None
 
     def parameter_exists(self, name):
         """
@@ -100,7 +158,7 @@ class Match():
         :param name:
         :return:
         """
-        return self.get_parameter(name) is not None
+        return name in self._index
 
     def get_value(self, name):
         """
@@ -109,14 +167,21 @@ class Match():
         :param name: a parameter name
         :return: the value or None
         """
-        p = self.get_parameter(name)
-        if p is None:
+        i = self._index.get(name)
+        if i is None:
             return None
-        else:
-            return p.value
+        return self._parameters[i].value
+
+    def as_dict(self):
+        """
+            The parameter values by name, for serialization.
+
+        :return: a dictionary from parameter name to value.
+        """
+        return {p.name: p.value for p in self._parameters}
 
     def __str__(self):
-        return "' ".join([f"{p.name}: {p.value}" for p in self.parameters])
+        return "' ".join([f"{p.name}: {p.value}" for p in self._parameters])
 
 
 class Patterns():
@@ -124,33 +189,107 @@ class Patterns():
         Orchestrates the matching process.
     """
 
+    # the most recently used compiled patterns
+    _compiled = OrderedDict()
+
+    @staticmethod
+    def _get_pieces(pattern):
+        """
+            Splits the pattern in alternating pieces: None for one or more adjacent parameters
+            and a list of words for the literal words in between.
+
+        :param pattern: a pattern.
+        :return: a list of pieces.
+        """
+        pieces = []
+        start = 0
+        for m in shapex.finditer(pattern):
+            words = pattern[start:m.start()].split()
+            if len(words) > 0:
+                pieces.append(words)
+            if len(pieces) == 0 or pieces[-1] is not None:
+                pieces.append(None)
+            start = m.end()
+        words = pattern[start:].split()
+        if len(words) > 0:
+            pieces.append(words)
+        return pieces
+
     @staticmethod
     def _make_regex(pattern):
         """
-            Turns the pattern in a regex.
+            Turns the pattern in a regex over the normalized input, see _normalize.
+
+            Parameters span whole words. The literal words following a parameter are matched at their first
+            occurrence inside a lookahead, which is atomic, so a failing input is not retried at every split of every parameter.
+            Only the last literal words are anchored at the end. The time needed is thereby bounded by
+            the length of the input times the length of the pattern.
 
         :param pattern: a pattern to match input.
         :return: the regex corresponding to the pattern.
         """
-        rex = "^" + re.sub(shapex, "(.*?)", pattern) + "$"
-        return rex
+        pieces = Patterns._get_pieces(pattern)
+        rex = "^ "
+        group = 0
+        i = 0
+        while i < len(pieces):
+            if pieces[i] is not None:
+                rex += "".join(re.escape(w) + " " for w in pieces[i])
+            elif i == len(pieces) - 1:
+                rex += r"(?:\S+ )*"
+            else:
+                literal = "".join(re.escape(w) + " " for w in pieces[i + 1])
+                if i + 1 == len(pieces) - 1:
+                    rex += r"(?:\S+ )*?" + literal
+                else:
+                    group += 1
+                    rex += r"(?=((?:\S+ )*?" + literal + "))\\" + str(group)
+                i += 1
+            i += 1
+        return rex + "$"
+
+    @staticmethod
+    def _normalize(input):
+        """
+            The words of the input, each followed by a single space, and starting with a space.
+        """
+        return " " + "".join(w + " " for w in input.split())
+
+    @staticmethod
+    def compile(pattern):
+        """
+            Returns the CompiledPattern of the given pattern, which is cached.
+
+        :param pattern: a pattern.
+        :return: a CompiledPattern instance.
+        """
+        found = Patterns._compiled.get(pattern)
+        if found is None:
+            found = CompiledPattern(pattern)
+            Patterns._compiled[pattern] = found
+            if len(Patterns._compiled) > COMPILED_SIZE:
+                Patterns._compiled.popitem(last=False)
+        else:
+            try:
+                Patterns._compiled.move_to_end(pattern)
+            except KeyError:
+                # evicted by another thread in the meantime
+                pass
+        return found
 
     @staticmethod
     def is_match(pattern, input):
         """
             Matches without looking at type constraints.
+            Parameters and literal words are compared word by word, 'is' doesn't match 'island'.
 
         :param pattern: a pattern to match input.
         :param input: any input.
         :return: True if pattern and input match.
         """
-
-        # starting with a parameter needs an extra space in order to match
-        # '^(.*?) is sunny$' will otherwise not match 'is sunny'
-
-        if pattern[0] == "%":
-            input = " " + input
-        return re.match(Patterns._make_regex(pattern), input) is not None
+        compiled = Patterns.compile(pattern)
+        words = input.split()
+        return compiled.accepts(words) and compiled.is_match(input)
 
     @staticmethod
     def _collect_parameters(pattern):
@@ -167,7 +306,7 @@ class Patterns():
     @staticmethod
     def _get_input_tokens(input, lang="en"):
         """
-            Gets the Spacy tokens to be used in the matching process.
+            Gets the tokens to be used in the matching process.
 
         :param input: any input.
         :param lang: the language of the input, default "en".
@@ -175,10 +314,41 @@ class Patterns():
         """
         # stack = re.split(r"[\s:]+", s)
         # no cleanup because it's been done in the process method
-        stack = Language.get_doc(input, lang, False)
+        stack = [token.text for token in Language.get_doc(input, lang, False)]
         stack.reverse()
         return stack
 
+    @staticmethod
+    def tokenize(input, lang="en", tokenizer="spacy"):
+        """
+            Splits the input in words without punctuation and spaces, like Language.cleanup_text does.
+            The 'rules' tokenizer does this with a regular expression and doesn't load any model, which is
+            a lot faster but does not split contractions and the like the way Spacy does.
+
+        :param input: any input.
+        :param lang: the language of the input, default "en".
+        :param tokenizer: 'spacy' or 'rules'.
+        :return: a list of words.
+        """
+        if tokenizer == "rules":
+            return tokenx.findall(str(input))
+        if tokenizer == "spacy":
+            if isinstance(input, AnalyzedText):
+                return input.get_words()
+            return [token.text for token in Language.get_doc(input, lang, True)]
+        raise Exception(f"The tokenizer '{tokenizer}' is not supported, use one of {', '.join(TOKENIZERS)}.")
+
+    @staticmethod
+    def _resolve_tokenizer(parameters, tokenizer):
+        """
+            Turns 'auto' into 'spacy' if one of the parameters has a linguistic type constraint and 'rules' otherwise.
+        """
+        if tokenizer not in TOKENIZERS:
+            raise Exception(f"The tokenizer '{tokenizer}' is not supported, use one of {', '.join(TOKENIZERS)}.")
+        if tokenizer == "auto":
+            return "spacy" if any(p.type in TypeConstraints.linguistic for p in parameters) else "rules"
+        return tokenizer
+
     @staticmethod
     def _get_pattern_stack(pattern):
         """
@@ -212,20 +382,21 @@ class Patterns():
         return p
 
     @staticmethod
-    def _assign_if_valid(parameter, value):
+    def _assign_if_valid(match, parameter, value):
         """
             Checks whether the given value fits the type constraint, if any.
             If so the value is assigned to the parameter.
 
+        :param match: the Match the parameter belongs to.
         :param parameter: a parameter object.
         :param value: the potential value to test against the constraint.
         """
         if parameter.type is None:
-            parameter.value = value
+            match.set_value(parameter.name, value)
         else:
             if f"is_{parameter.type}" in vars(TypeConstraints).keys():
                 if vars(TypeConstraints)[f"is_{parameter.type}"].__func__(value):
-                    parameter.value = value
+                    match.set_value(parameter.name, value)
 
             else:
                 raise Exception(f"The type '{parameter.type}' is not implemented as a type constraint.")
@@ -237,9 +408,9 @@ class Patterns():
 
         :param match: a Match instance
         """
-        for p in match.parameters:
+        for p in match._parameters:
             if p.value is None and p.default is not None:
-                p.value = p.default
+                match.set_value(p.name, p.default)
 
     @staticmethod
     def _get_parameter_name(raw_param):
@@ -259,7 +430,7 @@ class Patterns():
                 return raw_param
 
     @staticmethod
-    def _extract(pattern, input, lang="en"):
+    def _extract(pattern, input, lang="en", tokens=None, template=None):
         """
             The actual process of matching a pattern and an input.
             This process will only start if a prior check via 'is_match' worked.
@@ -267,11 +438,16 @@ class Patterns():
         :param pattern: a pattern.
         :param input: some input.
         :param lang: the languahe of the input, default "en".
+        :param tokens: the words of the input if already known, otherwise the input is tokenized by Spacy.
+        :param template: the CompiledPattern of the pattern, if at hand.
         :return: a Match instance.
         """
-        match = Match(pattern, input)
+        match = Match(pattern, input, template)
 
-        stack = Patterns._get_input_tokens(input, lang)
+        if tokens is None:
+            stack = Patterns._get_input_tokens(input, lang)
+        else:
+            stack = list(reversed(tokens))
         d = Patterns._get_pattern_stack(pattern)
         v = ""
         t = d.pop()
@@ -279,12 +455,12 @@ class Patterns():
         paramName = 1
         while len(stack) > 0:
             token = stack.pop()
-            if token.text == t:
+            if token == t:
                 collect = False
                 if v is not None and len(v) > 0:
                     p = match.get_parameter(paramName)
                     # this will check possible constraints
-                    Patterns._assign_if_valid(p, v.strip())
+                    Patterns._assign_if_valid(match, p, v.strip())
                     v = ""
 
                 if len(d) > 0:
@@ -298,25 +474,25 @@ class Patterns():
                         t = d.pop()
                     # t is now possibly the next word which matches the token
                     # which means the parameter is blank (or the default if set)
-                    if t != token.text:
+                    if t != token:
                         collect = True
-                        v += " " + token.text
+                        v += " " + token
 
                 else:
                     if collect:
-                        v += " " + token.text
+                        v += " " + token
                     else:
                         if len(d) > 0:
                             t = d.pop()
         if v is not None and len(v) > 0:
             p = match.get_parameter(paramName)
             # this will check possible constraints
-            Patterns._assign_if_valid(p, v.strip())
+            Patterns._assign_if_valid(match, p, v.strip())
         Patterns._fill_defaults(match)
         return match
 
     @staticmethod
-    def fit(pattern, input, lang="en"):
+    def fit(pattern, input, lang="en", tokenizer="spacy"):
         """
             Attempts to match the given pattern with the input.
 
@@ -339,21 +515,237 @@ class Patterns():
                 "I like %more:fresh bread"
 
 
+            The input is tokenized only once. With the 'rules' tokenizer no Spacy model is needed,
+            unless a type constraint like 'verb' asks for it. The 'auto' tokenizer picks 'rules'
+            for patterns without such a linguistic constraint and 'spacy' otherwise.
+
         :param pattern: A pattern. DO NOT use punctuation in the pattern.
-        :param input: Any string.
+        :param input: Any string or an AnalyzedText.
         :param lang: The language; 'en' by default.
+        :param tokenizer: 'spacy' (default), 'rules' or 'auto'.
         :return:
         """
+        compiled = Patterns.compile(pattern)
+        tokenizer = Patterns._resolve_tokenizer(compiled.parameters, tokenizer)
+        tokens = Patterns.tokenize(Patterns._check_input(input), lang, tokenizer)
+        if len(tokens) == 0:
+            raise Exception("The input contained no information.")
+        cleaned_input = " ".join(tokens)
+
+        if compiled.accepts(tokens) and compiled.is_match(cleaned_input):
+            return Patterns._extract(pattern, cleaned_input, lang, tokens, compiled)
+        else:
+            return None
+
+    @staticmethod
+    def best_fit(patterns, input, lang="en", tokenizer="spacy"):
+        """
+            Fits the input against competing patterns and returns the Match of the most specific one, see PatternSet.best_fit.
+
+        :param patterns: A list of patterns.
+        :param input: Any string.
+        :param lang: The language; 'en' by default.
+        :param tokenizer: 'spacy' (default), 'rules' or 'auto'.
+        :return: A Match instance or None.
+        """
+        return PatternSet(patterns, lang, tokenizer).best_fit(input)
+
+    @staticmethod
+    def _check_input(input):
         if input is None:
             raise Exception("No input given.")
+        if isinstance(input, AnalyzedText):
+            if len(input.text.strip()) == 0:
+                raise Exception("No input given.")
+            return input
         input = input.strip()
         if len(input) == 0:
             raise Exception("No input given.")
-        cleaned_input = Language.cleanup_text(input, lang)
-        if len(cleaned_input) == 0:
-            raise Exception("The input contained no information.")
+        return input
 
-        if Patterns.is_match(pattern, cleaned_input):
-            return Patterns._extract(pattern, cleaned_input)
-        else:
-            return None
+
+class CompiledPattern():
+    """
+        A pattern with its regex and parameters worked out once, so that it can be fitted repeatedly.
+        The literal words of the pattern serve as a prefilter: an input lacking one of them,
+        or having fewer words than the pattern has literals, is rejected without running the regex.
+    """
+
+    def __init__(self, pattern):
+        if pattern is None or len(pattern.strip()) == 0:
+            raise Exception("No pattern given.")
+        self.pattern = pattern
+        self.regex = re.compile(Patterns._make_regex(pattern))
+        self.parameters = Patterns._collect_parameters(pattern)
+        # the position of each parameter by name, the first one if a name occurs twice
+        self.index = {}
+        for i, p in enumerate(self.parameters):
+            self.index.setdefault(p.name, i)
+        self.linguistic = any(p.type in TypeConstraints.linguistic for p in self.parameters)
+        self.constrained = len([p for p in self.parameters if p.type is not None])
+        literals = [w for piece in Patterns._get_pieces(pattern) if piece is not None for w in piece]
+        self.required = frozenset(literals)
+        self.min_tokens = len(literals)
+        # the longest literal is the one least likely to be present, PatternSet indexes the patterns on it
+        self.anchor = max(literals, key=len) if len(literals) > 0 else None
+
+    def accepts(self, tokens, words=None):
+        """
+            The prefilter, tells whether the input can possibly match.
+
+        :param tokens: the words of the input.
+        :param words: the set of these words, if already known.
+        :return: False if the input can not match.
+        """
+        if len(tokens) < self.min_tokens:
+            return False
+        return self.required.issubset(words if words is not None else tokens)
+
+    def is_match(self, input):
+        """
+            Matches without looking at type constraints, see Patterns.is_match.
+        """
+        return self.regex.match(Patterns._normalize(input)) is not None
+
+    def __str__(self):
+        return self.pattern
+
+
+class PatternSet():
+    """
+        A list of patterns fitted against the same inputs.
+
+        The patterns are compiled once and an input is tokenized at most once per tokenizer, whatever the amount of patterns.
+        The tokenizer is set per pattern set: 'spacy' (default) always uses the Spacy model, 'rules' never does
+        and 'auto' only does for the patterns with a linguistic type constraint.
+    """
+
+    def __init__(self, patterns, lang="en", tokenizer="spacy"):
+        if tokenizer not in TOKENIZERS:
+            raise Exception(f"The tokenizer '{tokenizer}' is not supported, use one of {', '.join(TOKENIZERS)}.")
+        self.lang = lang
+        self.tokenizer = tokenizer
+        self.patterns = [Patterns.compile(p) for p in patterns]
+        # the patterns per anchor word and those without any literal word
+        self._anchors = {}
+        self._free = []
+        for i, compiled in enumerate(self.patterns):
+            if compiled.anchor is None:
+                self._free.append(i)
+            else:
+                self._anchors.setdefault(compiled.anchor, []).append(i)
+
+    def _get_tokenizer(self, compiled):
+        if self.tokenizer == "auto":
+            return "spacy" if compiled.linguistic else "rules"
+        return self.tokenizer
+
+    def uses_spacy(self):
+        """
+            Returns whether fitting may load the Spacy model, that is whether any pattern is tokenized with it.
+        """
+        return any(self._get_tokenizer(compiled) == "spacy" for compiled in self.patterns)
+
+    def _get_candidates(self, words):
+        """
+            The indices of the patterns whose anchor word occurs in the input, in the order of the set.
+        """
+        candidates = list(self._free)
+        for w in words:
+            candidates.extend(self._anchors.get(w, []))
+        return sorted(candidates)
+
+    def _find(self, input):
+        """
+            Yields the patterns passing the prefilter and the regex, without extracting anything.
+        """
+        input = Patterns._check_input(input)
+        tokenized = {}
+        for tokenizer in sorted({self._get_tokenizer(c) for c in self.patterns}):
+            tokens = Patterns.tokenize(input, self.lang, tokenizer)
+            if len(tokens) == 0:
+                raise Exception("The input contained no information.")
+            words = set(tokens)
+            tokenized[tokenizer] = (tokens, " ".join(tokens), words, self._get_candidates(words))
+        # with the 'auto' tokenizer the candidates of both tokenizers are merged, each pattern is still fitted
+        # on the words of its own tokenizer
+        candidates = sorted({i for t in tokenized.values() for i in t[3]})
+        for i in candidates:
+            compiled = self.patterns[i]
+            tokens, cleaned_input, words, found = tokenized[self._get_tokenizer(compiled)]
+            if compiled.accepts(tokens, words) and compiled.is_match(cleaned_input):
+                yield i, compiled, tokens, cleaned_input
+
+    def _fit(self, input):
+        for i, compiled, tokens, cleaned_input in self._find(input):
+            yield Patterns._extract(compiled.pattern, cleaned_input, self.lang, tokens, compiled)
+
+    @staticmethod
+    def _rank(match, compiled, i):
+        """
+            The specificity of a match: literal words, satisfied type constraints and, negated,
+            the parameters left to their default or empty. Earlier patterns win ties.
+        """
+        satisfied = 0
+        missing = 0
+        for p in match._parameters:
+            if p.value is None or p.value == p.default:
+                missing += 1
+            elif p.type is not None:
+                satisfied += 1
+        return compiled.min_tokens, satisfied, -missing, -i
+
+    def best_fit(self, input):
+        """
+            Returns the Match of the most specific pattern fitting the input.
+
+            Patterns are ranked on their literal word count first, then on the type constraints their values satisfy and
+            then on the fewest parameters left to a default or empty. The regex is run on all candidates but
+            the extraction, including the constraint checks, only on the best ranked ones: a candidate is skipped once
+            even a perfect extraction couldn't beat the best match so far.
+
+        :param input: Any string.
+        :return: A Match instance or None.
+        """
+        found = []
+        for i, compiled, tokens, cleaned_input in self._find(input):
+            # the best rank an extraction can reach
+            bound = (compiled.min_tokens, compiled.constrained, 0, -i)
+            found.append((bound, i, tokens, cleaned_input))
+        found.sort(key=lambda x: x[0], reverse=True)
+        best = None
+        best_rank = None
+        for bound, i, tokens, cleaned_input in found:
+            if best_rank is not None and bound < best_rank:
+                break
+            compiled = self.patterns[i]
+            match = Patterns._extract(compiled.pattern, cleaned_input, self.lang, tokens, compiled)
+            rank = PatternSet._rank(match, compiled, i)
+            if best_rank is None or rank > best_rank:
+                best = match
+                best_rank = rank
+        return best
+
+    def fit(self, input):
+        """
+            Returns the Match of the first pattern fitting the input, in the order of the set.
+
+        :param input: Any string.
+        :return: A Match instance or None.
+        """
+        return next(self._fit(input), None)
+
+    def fit_all(self, input):
+        """
+            Returns the Match of every pattern fitting the input.
+
+        :param input: Any string.
+        :return: A list of Match instances.
+        """
+        return list(self._fit(input))
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __iter__(self):
+        return iter([p.pattern for p in self.patterns])
@@ -0,0 +1,320 @@
+import re
+
+import numpy as np
+
+# the token attributes a query can constrain
+ATTRIBUTES = ["pos", "dep", "lemma", "word"]
+# the relations between query nodes: child, parent and sibling
+RELATIONS = [">", "<", "~"]
+
+lexer = re.compile(r'\s*(!=|=|\[|\]|\(|\)|>|<|~|,|"[^"]*"|[^\s\[\]()<>~=!,"]+)')
+
+
+class Constraint():
+    """
+        A condition on one token attribute, like 'pos=VERB' or 'lemma!=be|have'.
+    """
+
+    def __init__(self, attribute, values, negated=False):
+        if attribute not in ATTRIBUTES:
+            raise Exception(f"The attribute '{attribute}' can not be queried, use one of {', '.join(ATTRIBUTES)}.")
+        self.attribute = attribute
+        self.values = set(values)
+        self.negated = negated
+
+    def accepts(self, token):
+        return (getattr(token, self.attribute) in self.values) != self.negated
+
+    def __str__(self):
+        return f"{self.attribute}{'!=' if self.negated else '='}{'|'.join(sorted(self.values))}"
+
+
+class QueryNode():
+    """
+        A node of a compiled query: the constraints on a token and the relations to other query nodes.
+    """
+
+    def __init__(self, constraints):
+        self.constraints = constraints
+        self.edges = []
+
+    def accepts(self, token):
+        for c in self.constraints:
+            if not c.accepts(token):
+                return False
+        return True
+
+    def all_nodes(self):
+        """
+            The query nodes in pre-order, which is also the order of the tokens in a match.
+        """
+        nodes = [self]
+        for relation, node in self.edges:
+            nodes.extend(node.all_nodes())
+        return nodes
+
+
+class TreeQuery():
+    """
+        A structural query over dependency trees.
+
+        A query is a node followed by relations to other nodes. Nodes are written as '[attribute=value, ...]'
+        where the attribute is one of pos, dep, lemma or word, alternatives are separated with '|' and
+        '!=' negates. The relations are
+
+            >   the next node is a child
+            <   the next node is the parent
+            ~   the next node is a sibling
+
+        and a relation between parentheses is a branch, so that
+
+            [pos=VERB] (> [dep=nsubj]) > [dep=obj] > [pos=PROPN]
+
+        finds a verb with a subject and an object which has a proper noun below it.
+        A match is the list of tokens bound to the query nodes, in the order they appear in the query.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self._tokens = TreeQuery._lex(query)
+        self._position = 0
+        self.root = self._parse_pattern()
+        if self._position < len(self._tokens):
+            raise Exception(f"Unexpected '{self._tokens[self._position]}' in query '{query}'.")
+        self.nodes = self.root.all_nodes()
+
+    # region Parsing
+    @staticmethod
+    def _lex(query):
+        tokens = []
+        position = 0
+        query = query.strip()
+        while position < len(query):
+            found = lexer.match(query, position)
+            if found is None:
+                raise Exception(f"Could not parse the query '{query}' at position {position}.")
+            tokens.append(found.group(1))
+            position = found.end()
+        return tokens
+
+    def _peek(self):
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def _next(self, expected=None):
+        token = self._peek()
+        if token is None or (expected is not None and token != expected):
+            raise Exception(f"Expected '{expected or 'more'}' in query '{self.query}'.")
+        self._position += 1
+        return token
+
+    def _parse_pattern(self):
+        """
+            pattern := node ( '(' relation pattern ')' )* [ relation pattern ]
+        """
+        node = self._parse_node()
+        while self._peek() == "(":
+            self._next("(")
+            relation = self._next()
+            if relation not in RELATIONS:
+                raise Exception(f"Unknown relation '{relation}' in query '{self.query}'.")
+            node.edges.append((relation, self._parse_pattern()))
+            self._next(")")
+        if self._peek() in RELATIONS:
+            relation = self._next()
+            node.edges.append((relation, self._parse_pattern()))
+        return node
+
+    def _parse_node(self):
+        self._next("[")
+        constraints = []
+        while self._peek() != "]":
+            attribute = self._next()
+            operator = self._next()
+            if operator not in ["=", "!="]:
+                raise Exception(f"Expected '=' or '!=' after '{attribute}' in query '{self.query}'.")
+            value = self._next()
+            values = [value[1:-1]] if value.startswith('"') else value.split("|")
+            constraints.append(Constraint(attribute, values, operator == "!="))
+            if self._peek() == ",":
+                self._next(",")
+        self._next("]")
+        return QueryNode(constraints)
+
+    # endregion
+
+    # region Matching
+    @staticmethod
+    def _related(relation, token):
+        if relation == ">":
+            return token.children
+        elif relation == "<":
+            return [] if token.parent is None or token.parent is token else [token.parent]
+        else:
+            if token.parent is None or token.parent is token:
+                return []
+            return [t for t in token.parent.children if t is not token]
+
+    def _match_node(self, node, token):
+        """
+            Yields the bindings of the given query node and everything below it with the node bound to the token.
+        """
+        if not node.accepts(token):
+            return
+        partials = [[token]]
+        for relation, sub in node.edges:
+            extended = []
+            for related in TreeQuery._related(relation, token):
+                for binding in self._match_node(sub, related):
+                    extended.extend([p + binding for p in partials])
+            partials = extended
+            if len(partials) == 0:
+                return
+        for p in partials:
+            yield p
+
+    def find(self, tree):
+        """
+            Returns all matches in the given tree.
+
+        :param tree: A Dependency or Document.
+        :return: A list of token lists.
+        """
+        found = []
+        for token in tree.nodes:
+            found.extend(self._match_node(self.root, token))
+        return found
+
+    def matches(self, tree):
+        """
+            Returns whether the query matches anywhere in the given tree.
+        """
+        for token in tree.nodes:
+            for binding in self._match_node(self.root, token):
+                return True
+        return False
+
+    def search(self, index):
+        """
+            Runs the query over an indexed collection of trees.
+            The index narrows the candidates down to the sentences containing all the required
+            values before any tree is walked.
+
+        :param index: A TreeIndex or CorpusTreeIndex.
+        :return: A generator of (sentence id, match) tuples.
+        """
+        for id in index.get_candidates(self):
+            tree = index.get_tree(id)
+            for match in self.find(tree):
+                yield id, match
+
+    # endregion
+
+    def get_required(self):
+        """
+            The positive constraints, which every matching sentence has to contain.
+        """
+        return [c for node in self.nodes for c in node.constraints if not c.negated]
+
+    def __str__(self):
+        return self.query
+
+
+class TreeIndex():
+    """
+        Inverted indexes over a list of Dependency trees, mapping attribute values to the sentences containing them.
+    """
+
+    def __init__(self, trees):
+        self.trees = list(trees)
+        self._postings = {}
+
+    def _get_postings(self, attribute):
+        if attribute not in self._postings:
+            postings = {}
+            for id, tree in enumerate(self.trees):
+                for node in tree.nodes:
+                    found = postings.setdefault(getattr(node, attribute), [])
+                    if len(found) == 0 or found[-1] != id:
+                        found.append(id)
+            self._postings[attribute] = postings
+        return self._postings[attribute]
+
+    def get_sentences(self, attribute, value):
+        """
+            Returns the ids of the sentences with a token having the given value, in ascending order.
+        """
+        return self._get_postings(attribute).get(value, [])
+
+    def get_candidates(self, query):
+        candidates = None
+        for c in query.get_required():
+            found = set()
+            for value in c.values:
+                found.update(self.get_sentences(c.attribute, value))
+            candidates = found if candidates is None else candidates & found
+            if len(candidates) == 0:
+                return []
+        if candidates is None:
+            return range(len(self.trees))
+        return sorted(candidates)
+
+    def get_tree(self, id):
+        return self.trees[id]
+
+    def __len__(self):
+        return len(self.trees)
+
+
+class CorpusTreeIndex():
+    """
+        Inverted indexes over a Corpus file.
+        For every attribute the token positions are sorted by value once, after which the positions
+        of a value are a slice and their sentences follow from the sentence offsets.
+        Only the sentences surviving the index lookups are turned into Dependency trees.
+    """
+    columns = {"pos": "pos", "dep": "deprel", "lemma": "lemma", "word": "word"}
+
+    def __init__(self, corpus):
+        self.corpus = corpus
+        self._sorted = {}
+
+    def _get_sorted(self, attribute):
+        if attribute not in self._sorted:
+            column = self.corpus.get_column(CorpusTreeIndex.columns[attribute])
+            order = np.argsort(column, kind="stable")
+            self._sorted[attribute] = (order, column[order])
+        return self._sorted[attribute]
+
+    def get_positions(self, attribute, value):
+        """
+            Returns the token positions having the given value.
+        """
+        id = self.corpus.get_string_id(value)
+        if id is None:
+            return np.zeros(0, dtype=np.int64)
+        order, values = self._get_sorted(attribute)
+        return order[np.searchsorted(values, id, "left"):np.searchsorted(values, id, "right")]
+
+    def get_sentences(self, attribute, value):
+        """
+            Returns the ids of the sentences with a token having the given value, in ascending order.
+        """
+        positions = self.get_positions(attribute, value)
+        return np.unique(np.searchsorted(self.corpus.sentence_offsets, positions, "right") - 1)
+
+    def get_candidates(self, query):
+        candidates = None
+        for c in query.get_required():
+            found = np.unique(np.concatenate([self.get_sentences(c.attribute, v) for v in c.values]))
+            candidates = found if candidates is None else np.intersect1d(candidates, found, assume_unique=True)
+            if len(candidates) == 0:
+                return []
+        if candidates is None:
+            return range(len(self.corpus.sentence_offsets) - 1)
+        return candidates.tolist()
+
+    def get_tree(self, id):
+        return self.corpus.get_sentence(id)
+
+    def __len__(self):
+        return len(self.corpus.sentence_offsets) - 1
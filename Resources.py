@@ -1,17 +1,267 @@
+import json
 import pathlib
 import os
 
+import numpy as np
 import spacy
+from spacy.attrs import LEMMA, TAG, POS, HEAD, DEP, ENT_IOB, ENT_TYPE
+from spacy.parts_of_speech import IDS as POS_IDS
+from spacy.tokens import Doc
+
+
+class ModelBackend():
+    """
+        Runs the UDPipe and Spacy models listed in the manifest, the default backend.
+    """
+
+    def __init__(self):
+        self._pipelines = {}
+
+    def _get_pipeline(self, lang):
+        model = Resources.get_udpipe_model(lang)
+        found = self._pipelines.get(lang)
+        # the model changes if the language was registered anew
+        if found is None or found[0] is not model:
+            from ufal.udpipe import Pipeline
+            found = (model, Pipeline(model, "generic_tokenizer", Pipeline.DEFAULT, Pipeline.DEFAULT, ""))
+            self._pipelines[lang] = found
+        return found[1]
+
+    def parse(self, text, lang):
+        """
+            Runs the UDPipe pipeline and returns the CoNLL-U output.
+        """
+        from ufal.udpipe import ProcessingError
+        error = ProcessingError()
+        processed = self._get_pipeline(lang).process(text, error)
+        if error.occurred():
+            raise Exception(error.message)
+        return processed
+
+    def get_spacy_model(self, lang):
+        found = Resources._spacy_models.get(lang)
+        if found is None:
+            found = spacy.load(Resources._get_entry(lang, "spacy")["spacy"])
+            Resources._spacy_models[lang] = found
+        return found
+
+
+class ReplayModel():
+    """
+        Stands in for a Spacy model, giving the docs recorded in a fixture file.
+        Docs are rebuilt on the vocabulary of a blank model of the language, so no model files are needed.
+    """
+
+    def __init__(self, backend, lang):
+        self.backend = backend
+        self.lang = lang
+        self._vocab = None
+
+    @property
+    def vocab(self):
+        if self._vocab is None:
+            # the model name starts with the language code of Spacy, like 'en' or 'en_core_web_sm'
+            self._vocab = spacy.blank(Resources._get_entry(self.lang, "spacy")["spacy"].split("_")[0]).vocab
+        return self._vocab
+
+    @property
+    def meta(self):
+        return {"lang": self.lang, "name": "fixture", "version": "0"}
+
+    def __call__(self, text):
+        found = self.backend.get_recorded("spacy", self.lang, text)
+        if found is None:
+            return self.backend.record_doc(self.lang, text)
+        return ReplayModel.from_dict(self.vocab, found)
+
+    def pipe(self, texts, **kwargs):
+        for text in texts:
+            yield self(text)
+
+    @staticmethod
+    def to_dict(doc):
+        """
+            The tokens of a doc with the attributes used across the package, as a JSON-able dictionary.
+        """
+        return {"words": [t.text for t in doc], "spaces": [bool(t.whitespace_) for t in doc],
+                "lemmas": [t.lemma_ for t in doc], "tags": [t.tag_ for t in doc], "pos": [t.pos_ for t in doc],
+                "heads": [t.head.i for t in doc], "deps": [t.dep_ for t in doc],
+                "iobs": [t.ent_iob for t in doc], "types": [t.ent_type_ for t in doc]}
+
+    @staticmethod
+    def from_dict(vocab, data):
+        doc = Doc(vocab, words=data["words"], spaces=data["spaces"])
+        if len(doc) == 0:
+            return doc
+        strings = vocab.strings
+        rows = [[strings.add(data["lemmas"][i]), strings.add(data["tags"][i]), POS_IDS.get(data["pos"][i], 0),
+                 (data["heads"][i] - i) % 2 ** 64, strings.add(data["deps"][i]), data["iobs"][i], strings.add(data["types"][i])]
+                for i in range(len(doc))]
+        doc.from_array([LEMMA, TAG, POS, HEAD, DEP, ENT_IOB, ENT_TYPE], np.array(rows, dtype=np.uint64))
+        return doc
+
+
+class FixtureBackend():
+    """
+        Replays the UDPipe and Spacy output recorded in a fixture file instead of running the models,
+        so that tests run fast and without the model files.
+
+        The file has a JSON object per line with the 'kind' ('udpipe' or 'spacy'), the 'lang', the 'text' and
+        the recorded 'data'. A text which was not recorded raises an exception, unless the backend records:
+        it then runs the models (through the given backend) and appends their output to the file.
+    """
+
+    def __init__(self, path, record=False, backend=None):
+        """
+            Loads the recordings.
+
+        :param path: The fixture file, created when recording.
+        :param record: Whether to run the models for texts which were not recorded and append them.
+        :param backend: The backend running the models when recording, a ModelBackend by default.
+        """
+        self.path = path
+        self.record = record
+        self.backend = backend if backend is not None else ModelBackend()
+        self._recorded = {}
+        self._models = {}
+        if os.path.exists(path):
+            with open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip() == "":
+                        continue
+                    item = json.loads(line)
+                    self._recorded[(item["kind"], item["lang"], item["text"])] = item["data"]
+
+    def __len__(self):
+        return len(self._recorded)
+
+    def get_recorded(self, kind, lang, text):
+        found = self._recorded.get((kind, lang, text))
+        if found is None and not self.record:
+            raise Exception(f"The {kind} output of '{text[:40]}' ({lang}) is not recorded in '{self.path}'.")
+        return found
+
+    def _append(self, kind, lang, text, data):
+        self._recorded[(kind, lang, text)] = data
+        with open(self.path, "at", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": kind, "lang": lang, "text": text, "data": data}, ensure_ascii=False) + "\n")
+
+    def parse(self, text, lang):
+        found = self.get_recorded("udpipe", lang, text)
+        if found is None:
+            found = self.backend.parse(text, lang)
+            self._append("udpipe", lang, text, found)
+        return found
+
+    def record_doc(self, lang, text):
+        doc = self.backend.get_spacy_model(lang)(text)
+        self._append("spacy", lang, text, ReplayModel.to_dict(doc))
+        return doc
+
+    def get_spacy_model(self, lang):
+        Resources._get_entry(lang, "spacy")
+        found = self._models.get(lang)
+        if found is None:
+            found = ReplayModel(self, lang)
+            self._models[lang] = found
+        return found
+
 
 class Resources():
     """
         Access to resources and static models.
+        The models of a language are listed in the 'models.json' manifest in the data directory
+        and are only loaded the first time they are used.
     """
-    _elp = None
-    _nlp = None
-    en_model = None
-    nl_model = None
-    fr_model = None
+    _manifest = None
+    _udpipe_models = {}
+    _spacy_models = {}
+    _backend = None
+
+    @staticmethod
+    def get_backend():
+        """
+            The backend giving the UDPipe and Spacy output, see set_backend. Unless one is set, the TINK_FIXTURES
+            environment variable gives a fixture file to replay (recording what's missing if TINK_RECORD is '1'),
+            else the models run.
+        """
+        if Resources._backend is None:
+            path = os.environ.get("TINK_FIXTURES")
+            if path:
+                Resources._backend = FixtureBackend(path, os.environ.get("TINK_RECORD") == "1")
+            else:
+                Resources._backend = ModelBackend()
+        return Resources._backend
+
+    @staticmethod
+    def set_backend(backend):
+        """
+            Sets the backend, an object with a 'parse(text, lang)' method returning the CoNLL-U of UDPipe and a
+            'get_spacy_model(lang)' method returning a Spacy model, or something behaving like one.
+
+        :param backend: A ModelBackend, a FixtureBackend or any other backend; None restores the default.
+        :return: The previous backend.
+        """
+        previous = Resources._backend
+        Resources._backend = backend
+        return previous
+
+    @staticmethod
+    def use_fixtures(path, record=False):
+        """
+            Replays the parses recorded in the given file from now on, see FixtureBackend.
+
+        :return: The previous backend.
+        """
+        return Resources.set_backend(FixtureBackend(path, record))
+
+    @staticmethod
+    def get_manifest():
+        """
+            Returns the language manifest, mapping each language code to its models.
+            An entry has a 'name', the 'udpipe' model file (relative to the data directory
+            or absolute) and optionally the 'spacy' model name.
+        """
+        if Resources._manifest is None:
+            with open(os.path.join(Resources.get_resources_dir(), "models.json"), "rt", encoding="utf-8") as f:
+                Resources._manifest = json.load(f)
+        return Resources._manifest
+
+    @staticmethod
+    def register(lang, udpipe=None, spacy=None, name=None):
+        """
+            Adds or changes the models of a language at runtime, for instance another treebank.
+            Models of the language which were already loaded are released.
+
+        :param lang: The language code.
+        :param udpipe: The UDPipe model file.
+        :param spacy: The Spacy model name.
+        :param name: The name of the language.
+        """
+        entry = dict(Resources.get_manifest().get(lang, {"name": name or lang}))
+        if udpipe is not None:
+            entry["udpipe"] = udpipe
+        if spacy is not None:
+            entry["spacy"] = spacy
+        if name is not None:
+            entry["name"] = name
+        Resources._manifest[lang] = entry
+        Resources._udpipe_models.pop(lang, None)
+        Resources._spacy_models.pop(lang, None)
+
+    @staticmethod
+    def get_languages():
+        """
+            The codes of the languages in the manifest.
+        """
+        return sorted(Resources.get_manifest().keys())
+
+    @staticmethod
+    def _get_entry(lang, kind):
+        entry = Resources.get_manifest().get(lang)
+        if entry is None or kind not in entry:
+            raise Exception(f"Language '{lang}' is not supported.")
+        return entry
 
     @staticmethod
     def get_udpipe_model(lang):
@@ -19,63 +269,36 @@ class Resources():
             Static ref to a UDPipe model.
             The actual models are in the data directory.
         """
-        from ufal.udpipe import Model, Pipeline
-        res_path = Resources.get_resources_dir()
-
-        if lang == "en":
-            if Resources.en_model is None:
-                Resources.en_model = Model.load(os.path.join(res_path, "english-ud-2.1-20180111.udpipe"))
-                if Resources.en_model is None:
-                    raise Exception("Failed to load the English UDPipe model.")
-            return Resources.en_model
-        elif lang == "de":
-            if Resources.en_model is None:
-                Resources.en_model = Model.load(os.path.join(res_path, "german-ud-2.0-170801.udpipe"))
-                if Resources.en_model is None:
-                    raise Exception("Failed to load the German UDPipe model.")
-            return Resources.en_model
-        elif lang == "fr":
-            if Resources.fr_model is None:
-                Resources.fr_model = Model.load(os.path.join(res_path, "french-sequoia-ud-2.1-20180111.udpipe"))
-                if Resources.fr_model is None:
-                    raise Exception("Failed to load the French UDPipe model.")
-            return Resources.fr_model
-
-        elif lang == "nl":
-            if Resources.nl_model is None:
-                Resources.nl_model = Model.load(os.path.join(res_path, "dutch-ud-2.1-20180111.udpipe"))
-                if Resources.nl_model is None:
-                    raise Exception("Failed to load the Dutch UDPipe model.")
-            return Resources.nl_model
-        else:
-            raise Exception(f"Language '{lang}' is not supported.")
+        found = Resources._udpipe_models.get(lang)
+        if found is None:
+            from ufal.udpipe import Model
+            entry = Resources._get_entry(lang, "udpipe")
+            found = Model.load(os.path.join(Resources.get_resources_dir(), entry["udpipe"]))
+            if found is None:
+                raise Exception(f"Failed to load the {entry['name']} UDPipe model.")
+            Resources._udpipe_models[lang] = found
+        return found
 
     @staticmethod
     def elp():
         """
             Static ref to the English Spacy model
         """
-        if Resources._elp is None:
-            Resources._elp = spacy.load("en")
-        return Resources._elp
+        return Resources.get_spacy_model("en")
 
     @staticmethod
     def nlp():
         """
             Static ref to the Dutch Spacy model
         """
-        if Resources._nlp is None:
-            Resources._nlp = spacy.load("nl")
-        return Resources._nlp
+        return Resources.get_spacy_model("nl")
 
     @staticmethod
     def get_spacy_model(lang="en"):
-        if lang == "en":
-            return Resources.elp()
-        elif lang == "nl":
-            return Resources.nlp()
-        else:
-            raise Exception(f"Language '{lang}' is not supported.")
+        """
+            Static ref to the Spacy model of the given language, from the current backend.
+        """
+        return Resources.get_backend().get_spacy_model(lang)
 
     @staticmethod
     def get_resources_dir():
@@ -0,0 +1,313 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from .Patterns import Patterns
+from .Resources import Resources
+from .Text import AnalyzedText
+from .Understanding import Understanding, SVOExtractor, NamedEntity, Dependency
+
+LANES = ["interactive", "bulk"]
+# the amount of wait times kept per lane for the metrics
+WAIT_SAMPLES = 1000
+
+
+def _tokens(texts, lang, options):
+    return [[node for nodes in sentences for node in nodes] for sentences in Understanding.get_sentences_batch(texts, lang)]
+
+
+def _svo(texts, lang, options):
+    return [[triple for nodes in sentences for triple in SVOExtractor(Dependency(nodes), lang).extract_svo()]
+            for sentences in Understanding.get_sentences_batch(texts, lang)]
+
+
+def _entities(texts, lang, options):
+    return [[NamedEntity(e) for e in doc.ents] for doc in Resources.get_spacy_model(lang).pipe(texts)]
+
+
+def _fit(texts, lang, options):
+    pattern = options["pattern"]
+    tokenizer = Patterns._resolve_tokenizer(Patterns.compile(pattern).parameters, options.get("tokenizer", "spacy"))
+    if tokenizer == "spacy":
+        # the batch is tokenized by one pass of the Spacy model
+        texts = [AnalyzedText(text, lang, doc) for text, doc in zip(texts, Resources.get_spacy_model(lang).pipe(texts))]
+    return [Patterns.fit(pattern, text, lang, tokenizer) for text in texts]
+
+
+# name: (function taking a list of texts, a language and options and returning a result per text,
+#        whether the result is a list per sentence which can be computed per chunk and concatenated)
+OPERATIONS = {
+    "tokens": (_tokens, True),
+    "sentences": (lambda texts, lang, options: Understanding.get_sentences_batch(texts, lang), True),
+    "svo": (_svo, True),
+    "entities": (_entities, False),
+    "fit": (_fit, False)
+}
+
+
+class Job():
+    """
+        A submitted request; long texts are split in chunks which are scheduled one by one.
+    """
+
+    def __init__(self, operation, lang, options, lane, deadline, chunks):
+        self.operation = operation
+        self.lang = lang
+        self.options = options
+        self.key = (operation, lang, json.dumps(options, sort_keys=True))
+        self.lane = lane
+        self.deadline = deadline
+        self.submitted = time.monotonic()
+        self.future = Future()
+        self.results = [None] * len(chunks)
+        self.remaining = len(chunks)
+        self.started = False
+
+
+class Task():
+    """
+        The unit of scheduling: a whole text or a chunk of a long one.
+    """
+    __slots__ = ["job", "index", "text"]
+
+    def __init__(self, job, index, text):
+        self.job = job
+        self.index = index
+        self.text = text
+
+
+class Scheduler():
+    """
+        Puts the parsing functions behind queues so that interactive requests don't wait for bulk jobs.
+
+        Requests go to one of two lanes. The workers serve the interactive lane first but, when both lanes have work,
+        every 'bulk_share'-th batch comes from the bulk lane so bulk work always progresses. A request can have a
+        deadline; once passed the request fails without being parsed. Short texts with the same operation, language
+        and options are handed to the models as one batch, texts longer than 'chunk_size' are cut at sentence
+        boundaries and every chunk is scheduled on its own, letting interactive requests in between.
+
+        The workers are threads sharing the models of the process.
+    """
+
+    def __init__(self, workers=1, batch_size=16, short_length=1000, chunk_size=4000, bulk_share=4, operations=None):
+        """
+            Creates a new instance and starts the workers.
+
+        :param workers: The amount of worker threads.
+        :param batch_size: The maximum amount of texts handed to an operation at once.
+        :param short_length: Texts up to this amount of characters are batched together.
+        :param chunk_size: Texts longer than this are chunked, if the operation allows.
+        :param bulk_share: One in this many batches comes from the bulk lane if it has work.
+        :param operations: The operations by name, see OPERATIONS.
+        """
+        self.batch_size = batch_size
+        self.short_length = short_length
+        self.chunk_size = chunk_size
+        self.bulk_share = bulk_share
+        self.operations = operations if operations is not None else OPERATIONS
+        self._lanes = {lane: deque() for lane in LANES}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._interactive_run = 0
+        self._metrics = {lane: {"submitted": 0, "completed": 0, "failed": 0, "expired": 0, "batches": 0} for lane in LANES}
+        self._waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+        self._threads = [threading.Thread(target=self._work, daemon=True) for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, operation, text, lang="en", lane="interactive", deadline=None, **options):
+        """
+            Queues a request.
+
+        :param operation: The name of the operation, like 'tokens', 'svo', 'entities' or 'fit'.
+        :param text: The text to process.
+        :param lang: The language of the text.
+        :param lane: 'interactive' or 'bulk'.
+        :param deadline: The amount of seconds the request may wait before it's dropped, None to wait indefinitely.
+        :param options: Operation specific options, like the 'pattern' of 'fit'.
+        :return: A Future giving the result or raising the error.
+        """
+        if operation not in self.operations:
+            raise Exception(f"The operation '{operation}' is not supported.")
+        if lane not in self._lanes:
+            raise Exception(f"The lane '{lane}' does not exist, use one of {', '.join(LANES)}.")
+        if self.operations[operation][1] and len(text) > self.chunk_size:
+            chunks = list(Understanding._get_chunks(text, self.chunk_size))
+        else:
+            chunks = [text]
+        job = Job(operation, lang, options, lane, None if deadline is None else time.monotonic() + deadline, chunks)
+        with self._condition:
+            if self._closed:
+                raise Exception("The scheduler is closed.")
+            for i, chunk in enumerate(chunks):
+                self._lanes[lane].append(Task(job, i, chunk))
+            self._metrics[lane]["submitted"] += 1
+            self._condition.notify()
+        return job.future
+
+    def run(self, operation, text, lang="en", lane="interactive", deadline=None, **options):
+        """
+            Queues a request and waits for its result, see submit.
+        """
+        return self.submit(operation, text, lang, lane, deadline, **options).result()
+
+    # region Workers
+    def _fail(self, job, error, metric="failed"):
+        if not job.future.done():
+            if not job.started:
+                job.started = True
+                if not job.future.set_running_or_notify_cancel():
+                    return
+            job.future.set_exception(error)
+            self._metrics[job.lane][metric] += 1
+
+    def _is_alive(self, task, now):
+        """
+            Tells whether the task still needs doing; fails the job if its deadline passed.
+        """
+        job = task.job
+        if job.future.done():
+            return False
+        if job.deadline is not None and now > job.deadline:
+            self._fail(job, Exception("The deadline of the request passed before it was processed."), "expired")
+            return False
+        return True
+
+    def _pick_lane(self):
+        interactive, bulk = self._lanes["interactive"], self._lanes["bulk"]
+        if len(interactive) > 0 and (len(bulk) == 0 or self._interactive_run < self.bulk_share - 1):
+            self._interactive_run += 1
+            return "interactive"
+        if len(bulk) > 0:
+            self._interactive_run = 0
+            return "bulk"
+        return None
+
+    def _next_batch(self):
+        """
+            Takes the next batch off the queues, waiting for work if there is none.
+
+            Chunks are never batched, so that other requests get in between the chunks of a long text.
+
+        :return: A list of tasks of the same operation, language and options, or None once closed.
+        """
+        with self._condition:
+            while True:
+                lane = self._pick_lane()
+                if lane is None:
+                    if self._closed:
+                        return None
+                    self._condition.wait()
+                    continue
+                queue = self._lanes[lane]
+                now = time.monotonic()
+                first = queue.popleft()
+                if not self._is_alive(first, now):
+                    continue
+                batch = [first]
+                if len(first.job.results) == 1 and len(first.text) <= self.short_length:
+                    # gather the short tasks of the same kind, looking a limited way ahead
+                    kept = []
+                    for i in range(min(len(queue), self.batch_size * 4)):
+                        if len(batch) >= self.batch_size:
+                            break
+                        task = queue.popleft()
+                        if task.job.key == first.job.key and len(task.job.results) == 1 and len(task.text) <= self.short_length:
+                            if self._is_alive(task, now):
+                                batch.append(task)
+                        else:
+                            kept.append(task)
+                    queue.extendleft(reversed(kept))
+                for task in batch:
+                    if not task.job.started:
+                        task.job.started = True
+                        if not task.job.future.set_running_or_notify_cancel():
+                            continue
+                        self._waits[lane].append(now - task.job.submitted)
+                self._metrics[lane]["batches"] += 1
+                return [task for task in batch if not task.job.future.done()]
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if len(batch) == 0:
+                continue
+            job = batch[0].job
+            function = self.operations[job.operation][0]
+            try:
+                results = function([task.text for task in batch], job.lang, job.options)
+            except Exception as e:
+                if len(batch) == 1:
+                    with self._condition:
+                        self._fail(job, e)
+                    continue
+                # one text should not fail the others
+                results = []
+                for task in batch:
+                    try:
+                        results.append(function([task.text], job.lang, job.options)[0])
+                    except Exception as e:
+                        results.append(e)
+            with self._condition:
+                for task, result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        self._fail(task.job, result)
+                    else:
+                        self._complete(task, result)
+
+    def _complete(self, task, result):
+        job = task.job
+        if job.future.done():
+            return
+        job.results[task.index] = result
+        job.remaining -= 1
+        if job.remaining == 0:
+            if len(job.results) == 1:
+                job.future.set_result(job.results[0])
+            else:
+                job.future.set_result([item for part in job.results for item in part])
+            self._metrics[job.lane]["completed"] += 1
+
+    # endregion
+
+    def get_metrics(self):
+        """
+            Returns per lane the queue depth (tasks waiting), the request counts and the wait times in seconds
+            between submitting a request and the start of its processing, over the last requests.
+        """
+        with self._condition:
+            metrics = {}
+            for lane in LANES:
+                waits = sorted(self._waits[lane])
+                found = dict(self._metrics[lane])
+                found["depth"] = len(self._lanes[lane])
+                if len(waits) > 0:
+                    found["wait"] = {"mean": sum(waits) / len(waits), "p50": waits[len(waits) // 2],
+                                     "p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))], "max": waits[-1]}
+                else:
+                    found["wait"] = {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+                metrics[lane] = found
+            return metrics
+
+    def close(self):
+        """
+            Stops the workers once the current batches are done; the requests still queued fail.
+        """
+        with self._condition:
+            self._closed = True
+            for lane in LANES:
+                while len(self._lanes[lane]) > 0:
+                    self._fail(self._lanes[lane].popleft().job, Exception("The scheduler was closed."))
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
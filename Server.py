@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from .Hosting import Supervisor
+from .Language import Language
+from .Patterns import Patterns
+from .Resources import Resources
+from .Understanding import Understanding, SVOExtractor
+
+
+class Handlers():
+    """
+        The operations exposed by the server, each taking one JSON request item and returning a JSON-able result.
+    """
+
+    @staticmethod
+    def tokens(item):
+        return [t.to_dict() for t in Understanding.get_tokens(item["text"], item.get("lang", "en"))]
+
+    @staticmethod
+    def dependency(item):
+        return [[t.to_dict() for t in nodes] for nodes in Understanding.get_sentences(item["text"], item.get("lang", "en"))]
+
+    @staticmethod
+    def svo(item):
+        lang = item.get("lang", "en")
+        return [list(triple) for tree in Understanding.get_document(item["text"], lang) for triple in SVOExtractor(tree, lang).extract_svo()]
+
+    @staticmethod
+    def entities(item):
+        return [e.to_dict() for e in Understanding.get_entities(item["text"], item.get("lang", "en"))]
+
+    @staticmethod
+    def synonyms(item):
+        return Language.get_synonyms(item["word"], item.get("lang", "en"), item.get("fuzzy", False))
+
+    @staticmethod
+    def fit(item):
+        match = Patterns.fit(item["pattern"], item["text"], item.get("lang", "en"))
+        if match is None:
+            return None
+        return match.as_dict()
+
+
+ENDPOINTS = {
+    "/tokens": Handlers.tokens,
+    "/dependency": Handlers.dependency,
+    "/svo": Handlers.svo,
+    "/entities": Handlers.entities,
+    "/synonyms": Handlers.synonyms,
+    "/fit": Handlers.fit
+}
+# the text fields every request item of an endpoint has
+FIELDS = {
+    "/tokens": ["text"],
+    "/dependency": ["text"],
+    "/svo": ["text"],
+    "/entities": ["text"],
+    "/synonyms": ["word"],
+    "/fit": ["pattern", "text"]
+}
+
+
+class RequestError(Exception):
+    """
+        A request which is not valid, answered with status 400 rather than 500.
+    """
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+        Answers POST requests with a JSON body.
+        A body with an 'items' list is a batch and gets a 'results' list in the same order,
+        any other body is a single item and gets a 'result'.
+    """
+    protocol_version = "HTTP/1.1"
+    # idle keep-alive connections are closed after this many seconds
+    timeout = 30
+    # the models are shared by the threads of a worker but not necessarily thread-safe
+    lock = threading.Lock()
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok", "pid": os.getpid(), "endpoints": sorted(ENDPOINTS.keys())})
+        else:
+            self._send(404, {"error": f"Unknown path '{self.path}'."})
+
+    @staticmethod
+    def _get_items(request, fields):
+        """
+            Checks the request and returns its items.
+
+        :param request: The parsed JSON body.
+        :param fields: The text fields every item needs.
+        :return: The list of items and whether the request is a batch.
+        """
+        if not isinstance(request, dict):
+            raise RequestError("The body should be a JSON object.")
+        batch = "items" in request
+        items = request["items"] if batch else [request]
+        if not isinstance(items, list):
+            raise RequestError("The 'items' should be a list.")
+        for item in items:
+            if not isinstance(item, dict):
+                raise RequestError("Every item should be a JSON object.")
+            for field in fields:
+                if not isinstance(item.get(field), str):
+                    raise RequestError(f"Every item should have a '{field}' string.")
+            if "lang" in item and item["lang"] not in Resources.get_languages():
+                raise RequestError(f"Language '{item['lang']}' is not supported.")
+        return items, batch
+
+    def do_POST(self):
+        handler = ENDPOINTS.get(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        data = self.rfile.read(length)
+        if handler is None:
+            self._send(404, {"error": f"Unknown path '{self.path}'."})
+            return
+        try:
+            items, batch = RequestHandler._get_items(json.loads(data.decode("utf-8")), FIELDS[self.path])
+        except (ValueError, RequestError) as e:
+            # broken JSON or UTF-8, or a request which doesn't fit the endpoint
+            self._send(400, {"error": str(e)})
+            return
+        try:
+            with RequestHandler.lock:
+                results = [handler(item) for item in items]
+        except Exception as e:
+            self._send(500, {"error": str(e)})
+            return
+        self._send(200, {"results": results} if batch else {"result": results[0]})
+
+    def log_message(self, format, *args):
+        if Server.verbose:
+            super().log_message(format, *args)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Server():
+    """
+        Serves tokens, dependencies, SVO triples, entities, synonyms and pattern fits over HTTP/JSON.
+
+        The models of the configured languages are loaded once in the parent process, after which the
+        workers are forked. The workers share the model pages copy-on-write and all accept connections
+        on the same socket, so a handful of warm processes can serve many callers.
+    """
+    verbose = False
+
+    def __init__(self, host="127.0.0.1", port=8765, languages=None, workers=2):
+        self.host = host
+        self.port = port
+        self.languages = languages if languages is not None else ["en"]
+        self.workers = workers
+        self.supervisor = None
+        self._httpd = None
+
+    def serve(self):
+        """
+            Loads the models, forks the workers and keeps them running until interrupted, see Hosting.Supervisor.
+        """
+        self.supervisor = Supervisor(lambda number: self._httpd.serve_forever(), self.workers, self.languages)
+        self.supervisor.preload()
+        self._httpd = ThreadingHTTPServer((self.host, self.port), RequestHandler)
+        self.port = self._httpd.server_address[1]
+        try:
+            if self.workers <= 1:
+                self._httpd.serve_forever()
+            else:
+                self.supervisor.run()
+        finally:
+            self._httpd.server_close()
+
+    @staticmethod
+    def main(argv=None):
+        parser = argparse.ArgumentParser(prog="tink.Server", description="Serves the tink functionality over HTTP/JSON.")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--languages", nargs="+", default=["en"], help="The languages to preload.")
+        parser.add_argument("--workers", type=int, default=2, help="The amount of forked worker processes.")
+        parser.add_argument("--verbose", action="store_true", help="Log every request.")
+        args = parser.parse_args(argv)
+        Server.verbose = args.verbose
+        Server(args.host, args.port, args.languages, args.workers).serve()
+
+
+if __name__ == "__main__":
+    Server.main(sys.argv[1:])
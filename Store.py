@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import struct
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from spacy.attrs import ORTH, LEMMA, TAG, POS, HEAD, DEP, ENT_IOB, ENT_TYPE
+from spacy.tokens import Doc
+
+from .Resources import Resources
+from .Text import AnalyzedText
+
+MAGIC = b"TDOC"
+# the token attributes kept per doc, ORTH gives the words
+ATTRS = ["ORTH", "LEMMA", "TAG", "POS", "HEAD", "DEP", "ENT_IOB", "ENT_TYPE"]
+ATTR_IDS = [ORTH, LEMMA, TAG, POS, HEAD, DEP, ENT_IOB, ENT_TYPE]
+# the attributes holding a string hash
+STRING_ATTRS = ["ORTH", "LEMMA", "TAG", "DEP", "ENT_TYPE"]
+# the amount of decompressed frames kept, the least recently used going first
+FRAME_CACHE = 8
+
+
+class DocStore():
+    """
+        A persistent cache of Spacy docs, so that texts seen before don't go through the model again.
+
+        The store is a directory with two append-only files. 'docs.bin' holds frames of docs, a frame per batch:
+        a header with the doc lengths and the strings they use, followed by the compressed token attributes
+        (see Doc.to_array) and whitespace. 'index.tsv' maps the hash of a text and the model version to
+        the frame and position of its doc. A frame is only indexed once it's written, so an interrupted job loses
+        at most its last batch.
+
+        Docs come back as AnalyzedText, which the Language, Patterns and Understanding functions accept.
+    """
+
+    def __init__(self, path, lang="en", version=None, batch_size=1000, frame_cache=FRAME_CACHE):
+        """
+            Opens or creates a store.
+
+        :param path: The directory of the store.
+        :param lang: The language of the texts.
+        :param version: The model version the docs are keyed with, taken from the model meta data if not given.
+        :param batch_size: The amount of new docs written as one frame.
+        :param frame_cache: The amount of decompressed frames kept in memory.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.lang = lang
+        self.batch_size = batch_size
+        self._version = version
+        self._index = {}
+        # the docs not written yet, by key
+        self._pending = {}
+        self.frame_cache = frame_cache
+        # the decompressed frames by offset
+        self._frames = OrderedDict()
+        index_path = os.path.join(path, "index.tsv")
+        if os.path.exists(index_path):
+            with open(index_path, "r+b") as f:
+                data = f.read()
+                # a line cut short by a crash is dropped
+                end = data.rfind(b"\n") + 1
+                if end < len(data):
+                    f.truncate(end)
+            for line in data[:end].decode("utf-8").splitlines():
+                parts = line.split("\t")
+                self._index[(parts[0], parts[1])] = (int(parts[2]), int(parts[3]))
+        self._data = open(os.path.join(path, "docs.bin"), "a+b")
+        self._index_file = open(index_path, "at", encoding="utf-8")
+
+    @property
+    def nlp(self):
+        """
+            The Spacy model; loaded for its vocabulary but only run on texts missing from the store.
+        """
+        return Resources.get_spacy_model(self.lang)
+
+    @property
+    def version(self):
+        if self._version is None:
+            meta = self.nlp.meta
+            self._version = f"{meta.get('lang', self.lang)}_{meta.get('name', '')}-{meta.get('version', '')}"
+        return self._version
+
+    @staticmethod
+    def get_key(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def __contains__(self, text):
+        key = (DocStore.get_key(text), self.version)
+        return key in self._index or key in self._pending
+
+    def __len__(self):
+        return len([k for k in self._index if k[1] == self.version]) + len(self._pending)
+
+    def get(self, text):
+        """
+            Returns the stored analysis of the text.
+
+        :param text: Any text.
+        :return: An AnalyzedText or None if the text is not in the store for the current model version.
+        """
+        key = (DocStore.get_key(text), self.version)
+        if key in self._pending:
+            return AnalyzedText(text, self.lang, self._pending[key])
+        found = self._index.get(key)
+        if found is None:
+            return None
+        return AnalyzedText(text, self.lang, self._read_doc(*found))
+
+    def add(self, text, doc):
+        """
+            Adds the doc of a text; it's written once a batch is complete or on flush.
+        """
+        key = (DocStore.get_key(text), self.version)
+        if key in self._index:
+            return
+        self._pending[key] = doc
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def analyze(self, text):
+        """
+            Returns the analysis of the text, from the store if possible and else from the model.
+
+        :param text: Any text.
+        :return: An AnalyzedText.
+        """
+        found = self.get(text)
+        if found is None:
+            doc = self.nlp(text)
+            self.add(text, doc)
+            found = AnalyzedText(text, self.lang, doc)
+        return found
+
+    def analyze_batch(self, texts):
+        """
+            Returns the analyses of the texts in order; the missing ones go through the model in one pipe.
+
+        :param texts: A list of texts.
+        :return: A list of AnalyzedText.
+        """
+        texts = list(texts)
+        results = [self.get(text) for text in texts]
+        missing = [i for i, found in enumerate(results) if found is None]
+        for i, doc in zip(missing, self.nlp.pipe([texts[i] for i in missing])):
+            self.add(texts[i], doc)
+            results[i] = AnalyzedText(texts[i], self.lang, doc)
+        return results
+
+    # region Frames
+    def flush(self):
+        """
+            Writes the pending docs as one frame and indexes them.
+        """
+        if len(self._pending) == 0:
+            return
+        docs = list(self._pending.values())
+        arrays = [doc.to_array(ATTR_IDS).reshape(-1, len(ATTR_IDS)).astype(np.uint64) for doc in docs]
+        array = np.concatenate(arrays) if len(arrays) > 0 else np.zeros((0, len(ATTR_IDS)), dtype=np.uint64)
+        spaces = np.array([bool(t.whitespace_) for doc in docs for t in doc], dtype=np.uint8)
+        strings = set()
+        for name in STRING_ATTRS:
+            for value in np.unique(array[:, ATTRS.index(name)]):
+                if value != 0:
+                    strings.add(docs[0].vocab.strings[int(value)])
+        header = json.dumps({"attrs": ATTRS, "lengths": [len(doc) for doc in docs], "strings": sorted(strings)}).encode("utf-8")
+        body = zlib.compress(array.tobytes() + spaces.tobytes())
+
+        self._data.seek(0, os.SEEK_END)
+        offset = self._data.tell()
+        self._data.write(MAGIC + struct.pack("<II", len(header), len(body)) + header + body)
+        self._data.flush()
+        os.fsync(self._data.fileno())
+        lines = []
+        for position, key in enumerate(self._pending):
+            self._index[key] = (offset, position)
+            lines.append(f"{key[0]}\t{key[1]}\t{offset}\t{position}\n")
+        self._index_file.write("".join(lines))
+        self._index_file.flush()
+        self._pending = {}
+
+    def _read_frame(self, offset):
+        """
+            Reads and decompresses the frame at the given offset; the frames read last are kept.
+        """
+        frame = self._frames.get(offset)
+        if frame is not None:
+            self._frames.move_to_end(offset)
+            return frame
+        self._data.seek(offset)
+        magic, header_size, body_size = struct.unpack("<4sII", self._data.read(12))
+        if magic != MAGIC:
+            raise Exception(f"The doc store '{self.path}' is damaged at {offset}.")
+        header = json.loads(self._data.read(header_size).decode("utf-8"))
+        body = zlib.decompress(self._data.read(body_size))
+        lengths = header["lengths"]
+        tokens = sum(lengths)
+        columns = len(header["attrs"])
+        array = np.frombuffer(body, dtype=np.uint64, count=tokens * columns).reshape(tokens, columns)
+        spaces = np.frombuffer(body, dtype=np.uint8, offset=tokens * columns * 8, count=tokens)
+        starts = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        strings = self.nlp.vocab.strings
+        for s in header["strings"]:
+            strings.add(s)
+        frame = (header, array, spaces, starts)
+        self._frames[offset] = frame
+        if len(self._frames) > self.frame_cache:
+            self._frames.popitem(last=False)
+        return frame
+
+    def _read_doc(self, offset, position):
+        header, array, spaces, starts = self._read_frame(offset)
+        vocab = self.nlp.vocab
+        rows = array[starts[position]:starts[position + 1]]
+        words = [vocab.strings[int(h)] for h in rows[:, 0]]
+        doc = Doc(vocab, words=words, spaces=[bool(s) for s in spaces[starts[position]:starts[position + 1]]])
+        if len(words) > 0:
+            doc.from_array([ATTR_IDS[ATTRS.index(name)] for name in header["attrs"][1:]], np.ascontiguousarray(rows[:, 1:]))
+        return doc
+
+    # endregion
+
+    def close(self):
+        self.flush()
+        self._data.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,116 @@
+import numpy as np
+from spacy.attrs import POS, IS_PUNCT, IS_SPACE
+from spacy.parts_of_speech import IDS
+
+from .Resources import Resources
+
+
+class AnalyzedText():
+    """
+        A text together with its Spacy doc and, when needed, its UDPipe parse.
+
+        The Language, Patterns and Understanding functions accept it wherever they accept a string,
+        so a text going through cleanup, POS tagging, entities and dependencies is parsed once by each model.
+        Tokens are selected through the array view of the doc (see Doc.to_array), only the selected ones
+        are turned into Python objects.
+    """
+
+    def __init__(self, text, lang="en", doc=None):
+        """
+            Creates a new instance; nothing is parsed until it's needed.
+        :param text: Any text.
+        :param lang: The language; 'en' by default.
+        :param doc: The Spacy doc of the text, if already at hand.
+        """
+        if text is None:
+            raise Exception("No input given.")
+        self.text = text
+        self.lang = lang.lower()
+        self._doc = doc
+        self._attributes = None
+        self._analysis = None
+
+    @property
+    def doc(self):
+        """
+            The Spacy doc of the text.
+        """
+        if self._doc is None:
+            self._doc = Resources.get_spacy_model(self.lang)(self.text)
+        return self._doc
+
+    @property
+    def attributes(self):
+        """
+            The POS, punctuation and space flags of the tokens as an array with a row per token.
+        """
+        if self._attributes is None:
+            self._attributes = self.doc.to_array([POS, IS_PUNCT, IS_SPACE]).reshape(-1, 3)
+        return self._attributes
+
+    def get_indices(self, pos=None, cleanup=True):
+        """
+            Returns the positions of the tokens with the given POS tag.
+
+        :param pos: A universal POS tag like 'VERB' or None for all tokens.
+        :param cleanup: Whether to leave out punctuation and spaces, see Language.cleanup_text.
+        :return: A NumPy array of token positions.
+        """
+        attributes = self.attributes
+        keep = np.ones(len(attributes), dtype=bool)
+        if cleanup:
+            keep &= (attributes[:, 1] == 0) & (attributes[:, 2] == 0)
+        if pos is not None:
+            keep &= attributes[:, 0] == IDS[pos]
+        return np.flatnonzero(keep)
+
+    def get_tokens(self, pos=None, cleanup=True):
+        """
+            Returns the Spacy tokens with the given POS tag.
+        """
+        doc = self.doc
+        return [doc[i] for i in self.get_indices(pos, cleanup)]
+
+    def get_words(self, cleanup=True):
+        """
+            Returns the words of the text, without punctuation and spaces by default.
+        """
+        doc = self.doc
+        return [doc[i].text for i in self.get_indices(None, cleanup)]
+
+    def get_pos(self, index=0, cleanup=True):
+        """
+            Returns the POS tag of the token at the given position.
+
+        :param index: The position among the tokens, the first one by default.
+        :param cleanup: Whether punctuation and spaces are left out before counting.
+        :return: A universal POS tag or None if there is no such token.
+        """
+        indices = self.get_indices(None, cleanup)
+        if index >= len(indices):
+            return None
+        return self.doc[indices[index]].pos_
+
+    @property
+    def entities(self):
+        return self.doc.ents
+
+    @property
+    def analysis(self):
+        """
+            The UDPipe parse of the text, see Understanding.analyze.
+        """
+        if self._analysis is None:
+            from .Understanding import Analysis
+            self._analysis = Analysis(self.text, self.lang)
+        return self._analysis
+
+    @property
+    def document(self):
+        """
+            The dependency trees of the text, one per sentence.
+        """
+        return self.analysis.document
+
+    def __str__(self):
+        return self.text
@@ -0,0 +1,445 @@
+import csv
+import io
+import os
+import threading
+
+from .Resources import Resources
+
+VOWELS = "aeiouy"
+# the largest edit distance of a fuzzy lookup
+MAX_DISTANCE = 2
+# only the first characters of a word go in the deletion index, which bounds its size
+PREFIX_LENGTH = 7
+
+
+class Thesaurus():
+    """
+        An editable thesaurus file with an in-memory index.
+
+        The file has a row per line, separated by ';': a word followed by its synonyms. A word can head more than
+        one row, a lookup gives the first. Edits made through add and remove update the index at once and are
+        appended to a journal next to the file ('<file>.journal'), which is replayed when the thesaurus is loaded;
+        compact writes them into the file itself.
+
+        Readers never take a lock: an edit replaces the rows of a single word and a reload replaces the whole index,
+        both as one assignment. The watcher reloads the file in the background whenever it or the journal changes.
+
+        A word not heading a row is looked up by its normalized form (see normalize), so 'auto's' finds 'auto'.
+        A fuzzy lookup also finds the words within a small edit distance through a deletion index: every normalized
+        word is stored under the strings obtained by deleting up to MAX_DISTANCE characters, a word with a typo
+        shares one of those with the word meant. The deletion index is built on the first fuzzy lookup.
+    """
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path, journal=None):
+        """
+            Loads the thesaurus.
+
+        :param path: The thesaurus file.
+        :param journal: The journal file, '<path>.journal' by default.
+        """
+        self.path = path
+        self.journal = journal if journal is not None else path + ".journal"
+        self._lock = threading.RLock()
+        self._watcher = None
+        self._stopped = threading.Event()
+        self._signature = None
+        self._index = {}
+        # normalized word: the words heading rows with that normalized form
+        self._lemmas = {}
+        self._deletes = None
+        self.reload()
+
+    @staticmethod
+    def get_thesaurus(path=None):
+        """
+            Returns the shared instance of a thesaurus file, loading it the first time.
+
+        :param path: The thesaurus file, the Dutch thesaurus in the data directory by default.
+        """
+        if path is None:
+            path = os.path.join(Resources.get_resources_dir(), "thesaurus.nl.txt")
+        found = Thesaurus._instances.get(path)
+        if found is None:
+            with Thesaurus._instances_lock:
+                found = Thesaurus._instances.get(path)
+                if found is None:
+                    found = Thesaurus(path)
+                    Thesaurus._instances[path] = found
+        return found
+
+    # region Loading
+    @staticmethod
+    def _parse(line):
+        return next(csv.reader([line], delimiter=";"), [])
+
+    @staticmethod
+    def _format(row):
+        out = io.StringIO()
+        csv.writer(out, delimiter=";", lineterminator="\n").writerow(row)
+        return out.getvalue()
+
+    @staticmethod
+    def _add_row(index, row):
+        key = row[0].lower()
+        index[key] = index.get(key, ()) + (tuple(row),)
+
+    @staticmethod
+    def _without(rows, synonyms=None):
+        """
+            Returns the rows without those having exactly the given synonyms, or no rows if none are given.
+        """
+        if synonyms is None:
+            return ()
+        return tuple(row for row in rows if list(row[1:]) != list(synonyms))
+
+    @staticmethod
+    def _set_rows(index, key, rows):
+        if len(rows) == 0:
+            index.pop(key, None)
+        else:
+            index[key] = rows
+
+    def _get_signature(self):
+        found = []
+        for p in [self.path, self.journal]:
+            try:
+                s = os.stat(p)
+                found.append((s.st_mtime_ns, s.st_size))
+            except OSError:
+                found.append(None)
+        return tuple(found)
+
+    def _load(self):
+        index = {}
+        with open(self.path, "rt", encoding="utf-8", errors="ignore") as f:
+            for row in csv.reader(f, delimiter=";"):
+                # the comment lines at the top are not rows
+                if len(row) > 0 and not row[0].startswith("#"):
+                    Thesaurus._add_row(index, row)
+        if os.path.exists(self.journal):
+            with open(self.journal, "rt", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    # a line cut short by a crash has no newline and is ignored
+                    if not line.endswith("\n"):
+                        break
+                    entry = Thesaurus._parse(line)
+                    if len(entry) < 2:
+                        continue
+                    if entry[0] == "+":
+                        Thesaurus._add_row(index, entry[1:])
+                    elif entry[0] in ("-", "="):
+                        # "=" removes the row with exactly the listed synonyms, even none at all
+                        key = entry[1].lower()
+                        synonyms = entry[2:] if entry[0] == "=" or len(entry) > 2 else None
+                        Thesaurus._set_rows(index, key, Thesaurus._without(index.get(key, ()), synonyms))
+        return index
+
+    def reload(self):
+        """
+            Loads the file and replays the journal, then swaps the index.
+            Readers keep using the previous index meanwhile; edits wait.
+        """
+        with self._lock:
+            signature = self._get_signature()
+            index = self._load()
+            lemmas = {}
+            for key in index:
+                Thesaurus._add_lemma(lemmas, key)
+            self._index = index
+            self._lemmas = lemmas
+            self._deletes = None
+            self._signature = signature
+
+    # endregion
+
+    # region Lemmas and typos
+    @staticmethod
+    def normalize(word):
+        """
+            Reduces a Dutch word to a rough stem with a few rules: lowercase, without the plural '-s', '-'s' or '-en'
+            and with the spelling of the stem restored ('katten' to 'kat', 'bomen' to 'boom', 'huizen' to 'huis').
+            The stem is not always a word but inflections of a word mostly end up with the same one.
+
+        :param word: Any word.
+        :return: The normalized word.
+        """
+        w = word.strip().lower().replace("\u2019", "'")
+        if w.endswith("'s"):
+            return w[:-2]
+        if " " in w:
+            return w
+        if len(w) > 4 and w.endswith("en"):
+            stem = w[:-2]
+            if stem[-1] == "z":
+                stem = stem[:-1] + "s"
+            elif stem[-1] == "v":
+                stem = stem[:-1] + "f"
+            if stem[-1] == stem[-2] and stem[-1] not in VOWELS:
+                stem = stem[:-1]
+            elif len(stem) >= 3 and stem[-1] not in VOWELS and stem[-2] in VOWELS and stem[-3] not in VOWELS \
+                    and len([c for i, c in enumerate(stem) if c in VOWELS and (i == 0 or stem[i - 1] not in VOWELS)]) == 1:
+                # an open syllable of a single syllable stem has a long vowel
+                stem = stem[:-1] + stem[-2] + stem[-1]
+            return stem
+        if len(w) > 3 and w.endswith("s") and w[-3:-1] in ["el", "em", "en", "er", "je", "ie"]:
+            return w[:-1]
+        return w
+
+    @staticmethod
+    def _add_lemma(lemmas, key):
+        lemma = Thesaurus.normalize(key)
+        keys = lemmas.get(lemma, ())
+        if key not in keys:
+            lemmas[lemma] = keys + (key,)
+
+    @staticmethod
+    def _remove_lemma(lemmas, key):
+        lemma = Thesaurus.normalize(key)
+        Thesaurus._set_rows(lemmas, lemma, tuple(k for k in lemmas.get(lemma, ()) if k != key))
+
+    @staticmethod
+    def _get_deletes(word, distance):
+        """
+            Returns the strings obtained by deleting up to the given amount of characters from the prefix of the word.
+        """
+        found = {word[:PREFIX_LENGTH]}
+        current = found
+        for i in range(distance):
+            current = {w[:j] + w[j + 1:] for w in current for j in range(len(w))}
+            found |= current
+        return found
+
+    @staticmethod
+    def get_distance(a, b, limit=MAX_DISTANCE):
+        """
+            Returns the edit distance between two strings, counting the swap of two neighbouring characters as one edit.
+
+        :param limit: Any distance above this is returned as limit + 1.
+        """
+        if abs(len(a) - len(b)) > limit:
+            return limit + 1
+        # the common prefix and suffix don't add to the distance
+        start = 0
+        while start < len(a) and start < len(b) and a[start] == b[start]:
+            start += 1
+        end = 0
+        while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+            end += 1
+        a, b = a[start:len(a) - end], b[start:len(b) - end]
+        if len(a) == 0 or len(b) == 0:
+            return min(max(len(a), len(b)), limit + 1)
+        previous = None
+        row = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            before, previous, row = previous, row, [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 1
+                row[j] = min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + cost)
+                if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    row[j] = min(row[j], before[j - 2] + 1)
+            if min(row) > limit:
+                return limit + 1
+        return min(row[-1], limit + 1)
+
+    def _get_deletes_index(self):
+        deletes = self._deletes
+        if deletes is None:
+            with self._lock:
+                if self._deletes is None:
+                    found = {}
+                    for lemma in self._lemmas:
+                        for d in Thesaurus._get_deletes(lemma, MAX_DISTANCE):
+                            found.setdefault(d, []).append(lemma)
+                    self._deletes = {d: tuple(lemmas) for d, lemmas in found.items()}
+                deletes = self._deletes
+        return deletes
+
+    def get_candidates(self, word, max_distance=MAX_DISTANCE):
+        """
+            Returns the words heading rows whose normalized form is within the given edit distance
+            of the normalized word, the closest first.
+
+        :param word: Any word.
+        :param max_distance: The largest edit distance, at most MAX_DISTANCE.
+        :return: A list of lowercased words.
+        """
+        if max_distance > MAX_DISTANCE:
+            raise Exception(f"The edit distance can be at most {MAX_DISTANCE}.")
+        lemma = Thesaurus.normalize(word)
+        lemmas = self._lemmas
+        deletes = self._get_deletes_index()
+        found = {}
+        for d in Thesaurus._get_deletes(lemma, max_distance):
+            for candidate in deletes.get(d, ()):
+                # words removed since the deletion index was built are still in it
+                if candidate not in found and candidate in lemmas:
+                    found[candidate] = Thesaurus.get_distance(lemma, candidate, max_distance)
+        ranked = sorted([(distance, key) for c, distance in found.items() if distance <= max_distance for key in lemmas.get(c, ())])
+        if len(ranked) > 1 and ranked[0][0] == ranked[1][0]:
+            # among equally close stems the word spelled closest comes first
+            ranked = sorted([(distance, Thesaurus.get_distance(word.lower(), key, max_distance + 1) if distance == ranked[0][0] else 0, key)
+                             for distance, key in ranked])
+        return [r[-1] for r in ranked]
+
+    # endregion
+
+    def search(self, word, fuzzy=False, max_distance=None):
+        """
+            Returns the first row headed by the word, the word itself followed by its synonyms.
+            If the word heads no row the rows of its normalized form are used, see normalize.
+
+        :param word: Any word, case-insensitive.
+        :param fuzzy: Whether to fall back to the closest word within the edit distance.
+        :param max_distance: The largest edit distance of a fuzzy lookup; by default 1 for words up to
+            four characters and 2 for longer ones.
+        :return: A list or None if the word is not in the thesaurus.
+        """
+        index = self._index
+        rows = index.get(word.lower())
+        if rows is None:
+            for key in self._lemmas.get(Thesaurus.normalize(word), ()):
+                rows = index.get(key)
+                if rows is not None:
+                    break
+        if rows is None and fuzzy:
+            if max_distance is None:
+                max_distance = 1 if len(word) <= 4 else MAX_DISTANCE
+            for key in self.get_candidates(word, max_distance):
+                rows = index.get(key)
+                if rows is not None:
+                    break
+        if rows is None:
+            return None
+        return list(rows[0])
+
+    def get_rows(self, word):
+        """
+            Returns all the rows headed by the word.
+        """
+        return [list(row) for row in self._index.get(word.lower(), ())]
+
+    def __contains__(self, word):
+        return word.lower() in self._index
+
+    def __len__(self):
+        return sum(len(rows) for rows in self._index.values())
+
+    # region Editing
+    def _append_journal(self, entry):
+        with open(self.journal, "at", encoding="utf-8") as f:
+            f.write(Thesaurus._format(entry))
+        # the watcher should not reload for an edit which is already in the index
+        self._signature = self._get_signature()
+
+    def add(self, word, synonyms):
+        """
+            Adds a row with the word and its synonyms.
+
+        :param word: The word heading the row.
+        :param synonyms: A list of synonyms.
+        """
+        if word is None or len(word.strip()) == 0:
+            raise Exception("The word of a thesaurus row cannot be empty.")
+        row = [word] + list(synonyms)
+        with self._lock:
+            self._append_journal(["+"] + row)
+            Thesaurus._add_row(self._index, row)
+            Thesaurus._add_lemma(self._lemmas, row[0].lower())
+            deletes = self._deletes
+            if deletes is not None:
+                lemma = Thesaurus.normalize(row[0])
+                for d in Thesaurus._get_deletes(lemma, MAX_DISTANCE):
+                    if lemma not in deletes.get(d, ()):
+                        deletes[d] = deletes.get(d, ()) + (lemma,)
+
+    def remove(self, word, synonyms=None):
+        """
+            Removes the rows headed by the word.
+
+        :param word: The word heading the rows.
+        :param synonyms: If given, only the row with exactly these synonyms is removed; an empty list removes the row without synonyms.
+        :return: Whether a row was removed.
+        """
+        key = word.lower()
+        with self._lock:
+            rows = self._index.get(key, ())
+            kept = Thesaurus._without(rows, synonyms)
+            if len(kept) == len(rows):
+                return False
+            self._append_journal(["-", word] if synonyms is None else ["=", word] + list(synonyms))
+            Thesaurus._set_rows(self._index, key, kept)
+            if len(kept) == 0:
+                Thesaurus._remove_lemma(self._lemmas, key)
+            return True
+
+    def compact(self):
+        """
+            Writes the current rows to the thesaurus file and empties the journal.
+            The comment lines at the top of the file are kept.
+        """
+        with self._lock:
+            header = []
+            with open(self.path, "rt", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    if not line.startswith("#"):
+                        break
+                    header.append(line)
+            temp = self.path + ".tmp"
+            with open(temp, "wt", encoding="utf-8") as f:
+                f.write("".join(header))
+                for rows in self._index.values():
+                    for row in rows:
+                        f.write(Thesaurus._format(row))
+            os.replace(temp, self.path)
+            if os.path.exists(self.journal):
+                os.remove(self.journal)
+            self._signature = self._get_signature()
+
+    # endregion
+
+    # region Watching
+    def check(self):
+        """
+            Reloads the thesaurus if the file or the journal changed since it was loaded.
+
+        :return: Whether it was reloaded.
+        """
+        with self._lock:
+            if self._get_signature() == self._signature:
+                return False
+            self.reload()
+            return True
+
+    def _watch(self, interval):
+        while not self._stopped.wait(interval):
+            try:
+                self.check()
+            except Exception:
+                # a file in the middle of being written is picked up the next time
+                pass
+
+    def watch(self, interval=1.0):
+        """
+            Starts a background thread reloading the thesaurus when the file or the journal changes.
+
+        :param interval: The amount of seconds between checks.
+        """
+        if self._watcher is not None:
+            return
+        self._stopped.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        """
+            Stops the watcher.
+        """
+        if self._watcher is None:
+            return
+        self._stopped.set()
+        self._watcher.join()
+        self._watcher = None
+
+    # endregion
@@ -1,8 +1,16 @@
 from .Resources import *
+from .Text import AnalyzedText
+import bisect
+import itertools
 import os
+import re
 
 SUBJECTS = ["nsubj", "nsubj:pass", "nsubjpass", "csubj", "csubjpass", "agent", "expl", "conj"]
 OBJECTS = ["obj", "dative", "attr", "oprd", "prep", "ccomp", "conj", "advmod", "nmod", "obl"]
+# the amount of characters handed to UDPipe at once when streaming
+CHUNK_SIZE = 1 << 16
+# a likely end of sentence: closing punctuation, optional quotes or brackets and whitespace
+sentence_endx = re.compile(r"[.!?…][\"'”’)\]]*\s+")
 
 
 class SVOExtractor():
@@ -13,26 +21,52 @@ class SVOExtractor():
     def __init__(self, input, lang="en"):
         """
             Creates a new instance.
-        :param input: any text.
+            The input can be raw text or an already parsed Dependency, Document or AnalyzedText,
+            in which case UDPipe is not invoked again.
+        :param input: any text, a Dependency, a Document or an AnalyzedText.
         :param lang: the language of the given text.
         """
         self.input = input
-        self.tree = Understanding.get_dependency(input, lang)
+        if isinstance(input, (Dependency, Document)):
+            self.tree = input
+        elif isinstance(input, AnalyzedText):
+            self.tree = input.document
+        else:
+            self.tree = Understanding.get_document(input, lang)
+        self._views = None
+        self._found_subjects = {}
 
     # region Subjects
+    @staticmethod
+    def _collect_conjunctions(tokens, accept):
+        """
+            Walks the rights of the given tokens breadth-first and collects the accepted ones.
+            Every node is visited at most once so the cost is linear in the size of the tree,
+            also for long coordinations like 'A, B, C and D'.
+        :param tokens: the tokens to start from.
+        :param accept: a predicate telling whether a right-hand token is bound to its head.
+        :return: The additional tokens, without duplicates and excluding the given ones.
+        """
+        visited = set(tokens)
+        found = []
+        frontier = list(tokens)
+        i = 0
+        while i < len(frontier):
+            for tok in frontier[i].rights:
+                if tok not in visited and accept(tok):
+                    visited.add(tok)
+                    found.append(tok)
+                    frontier.append(tok)
+            i += 1
+        return found
+
     def _get_subjects_from_conjunctions(self, subs):
         """
             Looks for additional subjects bound to the given ones via things like 'and' in 'Peter and Fred went...'
         :param subs: first-level subjects
         :return: The augmented set of subjects.
         """
-        more_subs = []
-        for sub in subs:
-            rights = sub.rights
-            more_subs.extend([tok for tok in rights if tok.dep in SUBJECTS or tok.pos == "NOUN" or tok.pos == "PROPN"])
-            if len(more_subs) > 0:
-                more_subs.extend(self._get_subjects_from_conjunctions(more_subs))
-        return more_subs
+        return SVOExtractor._collect_conjunctions(subs, lambda tok: tok.dep in SUBJECTS or tok.pos == "NOUN" or tok.pos == "PROPN")
 
     def _get_subjects(self, verb):
         """
@@ -51,20 +85,41 @@ class SVOExtractor():
         return subs, verb_is_negated
 
     def find_subjects(self, tok):
-        head = tok.parent
-        while head.pos != "VERB" and head.pos != "NOUN" and head.parent != head:
-            head = head.parent
-        if head.pos == "VERB":
-            subs = [tok for tok in head.lefts if tok.dep == "SUB"]
-            if len(subs) > 0:
-                verb_negated = self._is_negated(head)
-                subs.extend(self._get_subjects_from_conjunctions(subs))
-                return subs, verb_negated
-            elif head.parent != head:
-                return self.find_subjects(head)
-        elif head.pos == "NOUN":
-            return [head], self._is_negated(tok)
-        return [], False
+        """
+            Looks up the tree for the subjects of the given token.
+            The walk is iterative and the outcome is remembered for every token it passes,
+            so subsequent lookups from the same branch are constant time.
+
+        :param tok: a token.
+        :return: the subjects and whether the verb is negated.
+        """
+        passed = []
+        current = tok
+        while current not in self._found_subjects and current not in passed:
+            passed.append(current)
+            head = current.parent
+            while head.pos != "VERB" and head.pos != "NOUN" and head.parent != head:
+                head = head.parent
+            if head.pos == "VERB":
+                subs = [t for t in head.lefts if t.dep == "SUB"]
+                if len(subs) > 0:
+                    verb_negated = self._is_negated(head)
+                    subs.extend(self._get_subjects_from_conjunctions(subs))
+                    result = (subs, verb_negated)
+                    break
+                elif head.parent != head:
+                    current = head
+                    continue
+            elif head.pos == "NOUN":
+                result = ([head], self._is_negated(current))
+                break
+            result = ([], False)
+            break
+        else:
+            result = self._found_subjects.get(current, ([], False))
+        for t in passed:
+            self._found_subjects[t] = result
+        return list(result[0]), result[1]
 
     # endregion
 
@@ -128,13 +183,7 @@ class SVOExtractor():
         return None, None
 
     def _get_objects_from_conjunctions(self, objects):
-        more_objs = []
-        for obj in objects:
-            rights = obj.rights
-            more_objs.extend([tok for tok in rights if tok.dep in OBJECTS or tok.pos == "NOUN"])
-            if len(more_objs) > 0:
-                more_objs.extend(self._get_objects_from_conjunctions(more_objs))
-        return more_objs
+        return SVOExtractor._collect_conjunctions(objects, lambda tok: tok.dep in OBJECTS or tok.pos == "NOUN")
 
     def _get_objects(self, verb):
         rights = verb.rights
@@ -153,46 +202,62 @@ class SVOExtractor():
     def _merge_svo(self, subjects, verb, objects):
         return (subjects, verb, objects)
 
+    def _traverse(self):
+        """
+            Collects the subjects and objects of every starting verb in one pass over the tree.
+            The result is kept so that the SVO, SV and VO views don't walk the tree again.
+        :return: A list of (verb, subjects, object verb, objects) tuples.
+        """
+        if self._views is None:
+            self._views = []
+            for verb in self._get_verbs():
+                subjects, verb_negated = self._get_subjects(verb)
+                object_verb, objects = self._get_objects(verb)
+                self._views.append((verb, subjects, object_verb, objects))
+        return self._views
+
     def extract_svo(self):
         """
             Returns SVO triples.
         :return: A list of triples.
         """
         svos = []
-        verbs = self._get_verbs()
-        for verb in verbs:
-            subjects, verb_negated = self._get_subjects(verb)
+        for verb, subjects, object_verb, objects in self._traverse():
             # hopefully there are subs, if not, don't examine this verb any longer
             if len(subjects) > 0:
-                verb, objects = self._get_objects(verb)
-                svos.append(self._merge_svo([s.word for s in subjects], verb.word, [o.word for o in objects]))
+                svos.append(self._merge_svo([s.word for s in subjects], object_verb.word, [o.word for o in objects]))
                 # for subject in subjects:
                 #     for obj in objects:
                 #         obj_negated = self._is_negated(obj)
                 #         svos.append((subject.word.lower(), "!" + verb.word.lower() if verb_negated or obj_negated else verb.word.lower(), obj.word.lower()))
         return svos
 
+    def extract(self):
+        """
+            Returns the SVO, SV and VO views computed from a single traversal.
+        :return: A dictionary with the keys 'svo', 'sv' and 'vo'.
+        """
+        return {
+            "svo": self.extract_svo(),
+            "sv": self._get_sv(),
+            "vo": self._get_vo()
+        }
+
     def _get_sv(self):
-        verbs = self._get_verbs()
         r = []
-        for verb in verbs:
-            subs = self._get_subjects(verb)
-            if subs is None: continue
+        for verb, subjects, object_verb, objects in self._traverse():
             r.append({
                 "verb": verb.word,
-                "subject": [t.word for t in subs[0]]
+                "subject": [t.word for t in subjects]
             })
         return r
 
     def _get_vo(self):
-        verbs = self._get_verbs()
         r = []
-        for verb in verbs:
-            objs = self._get_objects(verb)
-            if objs is None: continue
+        for verb, subjects, object_verb, objects in self._traverse():
             r.append({
                 "verb": verb.word,
-                "object": [t.word for t in objs[1]]
+                "object": [t.word for t in objects]
             })
         return r
 
@@ -208,6 +273,9 @@ class NamedEntity():
         self.end = spacy_token.end_char
         self.type = spacy_token.label_
 
+    def to_dict(self):
+        return {"entity": self.entity, "start": self.start, "end": self.end, "type": self.type}
+
 
 class Dependency():
     """
@@ -216,14 +284,14 @@ class Dependency():
 
     def __init__(self, nodes):
         self.nodes = nodes
+        self._ids = {}
+        for node in nodes:
+            # an id occurring twice can't be resolved
+            self._ids[node.id] = None if node.id in self._ids else node
         self.root = self._build_tree(nodes)
 
     def _find_id(self, id):
-        found = list(filter(lambda x: x.id == id, self.nodes))
-        if len(found) == 1:
-            return found[0]
-        else:
-            return None
+        return self._ids.get(id)
 
     def _build_tree(self, nodes):
         root = None
@@ -271,6 +339,124 @@ class Dependency():
     def get_verbs(self):
         return [t for t in self.nodes if t.pos == "VERB"]
 
+    def to_arrays(self):
+        """
+            Returns the tree as NumPy arrays, see Features.TreeArrays.
+        """
+        from .Features import TreeArrays
+        return TreeArrays.from_trees([self])
+
+
+class Document():
+    """
+        Captures the dependency trees of a text, one per sentence.
+        Offers the same node access as a Dependency so it can be used wherever a single tree is expected.
+    """
+
+    def __init__(self, sentences):
+        """
+            Creates a new instance.
+        :param sentences: A list of Dependency objects.
+        """
+        self.sentences = sentences
+
+    @property
+    def nodes(self):
+        return [node for tree in self.sentences for node in tree.nodes]
+
+    def get_node(self, word):
+        """
+            Returns the first node corresponding to the given word, if any.
+        :param word: A word supposedly contained in the input.
+        :return: The token, if found.
+        """
+        for tree in self.sentences:
+            node = tree.get_node(word)
+            if node is not None:
+                return node
+        return None
+
+    def get_verbs(self):
+        return [t for tree in self.sentences for t in tree.get_verbs()]
+
+    def to_arrays(self):
+        """
+            Returns the trees as NumPy arrays, see Features.TreeArrays.
+        """
+        from .Features import TreeArrays
+        return TreeArrays.from_trees(self.sentences)
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        return iter(self.sentences)
+
+    def __str__(self):
+        return "\n".join([str(tree) for tree in self.sentences])
+
+
+class Analysis():
+    """
+        The result of Understanding.analyze.
+        The text is parsed once and every view is computed lazily from that parse.
+    """
+
+    def __init__(self, input, lang="en"):
+        self.input = input
+        self.lang = lang
+        self._document = None
+        self._extractor = None
+
+    @property
+    def document(self):
+        """
+            The dependency trees of the input, one per sentence.
+        """
+        if self._document is None:
+            self._document = Understanding.get_document(self.input, self.lang)
+        return self._document
+
+    @property
+    def dependency(self):
+        """
+            The dependency tree of an input of one sentence, see Understanding.get_dependency.
+        """
+        return Understanding._get_single(self.document)
+
+    @property
+    def tokens(self):
+        return self.document.nodes
+
+    @property
+    def verbs(self):
+        """
+            The verbs as defined by POS, see Understanding.get_verbs.
+        """
+        return [t for t in self.tokens if t.pos == "VERB"]
+
+    @property
+    def dependency_verbs(self):
+        return self.document.get_verbs()
+
+    @property
+    def extractor(self):
+        if self._extractor is None:
+            self._extractor = SVOExtractor(self.document, self.lang)
+        return self._extractor
+
+    @property
+    def svo(self):
+        return self.extractor.extract_svo()
+
+    @property
+    def sv(self):
+        return self.extractor._get_sv()
+
+    @property
+    def vo(self):
+        return self.extractor._get_vo()
+
 
 class Token():
     """
@@ -304,6 +490,10 @@ class Token():
     def rights(self):
         return [l for l in self.children if l.id > self.id and l.pos != "PUNCT"]
 
+    def to_dict(self):
+        return {"id": self.id, "word": self.word, "lemma": self.lemma, "pos": self.pos, "xpos": self.pos2,
+                "feats": self.pos3, "head": self.parentId, "dep": self.dep}
+
     def __str__(self):
         return f"{self.word}"
 
@@ -311,12 +501,8 @@ class Token():
 class Understanding():
     """
         Collects diverse functions which go beyond the basic language functionalities.
+        The functions taking a text also take an AnalyzedText, whose parses are then reused.
     """
-    en_pipeline = None
-    nl_pipeline = None
-    de_pipeline = None
-    fr_pipeline = None
-
     def __init__(self):
         pass
 
@@ -327,48 +513,67 @@ class Understanding():
             return str(s, 'utf-8')
 
     @staticmethod
-    def _get_udpipe_pipeline(lang):
-        if lang == "en":
-            if Understanding.en_pipeline is None:
-                from ufal.udpipe import Pipeline
-                model = Resources.get_udpipe_model(lang)
-                Understanding.en_pipeline = Pipeline(model, "generic_tokenizer", Pipeline.DEFAULT, Pipeline.DEFAULT, "")
-            return Understanding.en_pipeline
-        elif lang == "de":
-            if Understanding.de_pipeline is None:
-                from ufal.udpipe import Pipeline
-                model = Resources.get_udpipe_model(lang)
-                Understanding.de_pipeline = Pipeline(model, "generic_tokenizer", Pipeline.DEFAULT, Pipeline.DEFAULT, "")
-            return Understanding.de_pipeline
-        elif lang == "fr":
-            if Understanding.fr_pipeline is None:
-                from ufal.udpipe import Pipeline
-                model = Resources.get_udpipe_model(lang)
-                Understanding.fr_pipeline = Pipeline(model, "generic_tokenizer", Pipeline.DEFAULT, Pipeline.DEFAULT, "")
-            return Understanding.fr_pipeline
-        elif lang == "nl":
-            if Understanding.nl_pipeline is None:
-                from ufal.udpipe import Pipeline
-                model = Resources.get_udpipe_model(lang)
-                Understanding.nl_pipeline = Pipeline(model, "generic_tokenizer", Pipeline.DEFAULT, Pipeline.DEFAULT, "")
-            return Understanding.nl_pipeline
-        else:
-            raise Exception(f"Language '{lang}' is not supported.")
+    def get_dependency(input, lang="en"):
+        """
+            Returns the dependency tree of a sentence; use get_document for a text with more sentences.
+        :param input: A sentence or an AnalyzedText of one.
+        :param lang: The language of the input.
+        :return: A Dependency.
+        """
+        if isinstance(input, AnalyzedText):
+            return input.analysis.dependency
+        return Understanding._get_single(Understanding.get_document(input, lang))
 
     @staticmethod
-    def get_dependency(input, lang="en"):
-        nodes = Understanding.get_tokens(input, lang)
-        return Dependency(nodes)
+    def _get_single(document):
+        """
+            Returns the tree of a document of one sentence.
+        """
+        if len(document) != 1:
+            raise Exception(f"The input has {len(document)} sentences instead of one, use get_document to get their trees.")
+        return document.sentences[0]
 
     @staticmethod
-    def get_tokens(input, lang="en"):
+    def get_document(input, lang="en"):
+        """
+            Returns the dependency trees of the given input, one per sentence.
+        :param input: Any text.
+        :param lang: The language of the input.
+        :return: A Document.
+        """
+        if isinstance(input, AnalyzedText):
+            return input.document
+        return Document([Dependency(nodes) for nodes in Understanding.get_sentences(input, lang)])
+
+    @staticmethod
+    def analyze(input, lang="en"):
+        """
+            Parses the input once and gives access to the tokens, the dependency trees and the SVO, SV and VO views.
+            Each view is only computed when requested.
+        :param input: Any text.
+        :param lang: The language of the input.
+        :return: An Analysis object.
+        """
+        if isinstance(input, AnalyzedText):
+            return input.analysis
+        return Analysis(input, lang)
+
+    @staticmethod
+    def _process(input, lang="en"):
+        """
+            Returns the CoNLL-U output of UDPipe, from the backend of Resources.
+        """
+        if isinstance(input, AnalyzedText):
+            input = input.text
+        return Resources.get_backend().parse(input, lang)
+
+    @staticmethod
+    def _read_conllu(processed):
+        """
+            Turns CoNLL-U output into lists of tokens, one list per sentence.
+            Multiword ranges and empty nodes are skipped.
+        """
         from io import StringIO
-        from ufal.udpipe import ProcessingError
-        error = ProcessingError()
-        pipeline = Understanding._get_udpipe_pipeline(lang)
-        processed = pipeline.process(input, error)
-        if error.occurred():
-            raise Exception(error.message)
         sio = StringIO(processed)
         # pandas frame is a bit overkill I guess
         # import pandas as pd
@@ -378,12 +583,191 @@ class Understanding():
         import csv
         rd = csv.reader(sio, delimiter="\t")
 
+        sentences = []
         nodes = []
         for row in rd:
-            if len(row) < 8:
+            if len(row) == 0:
+                if len(nodes) > 0:
+                    sentences.append(nodes)
+                    nodes = []
+                continue
+            if len(row) < 8 or not row[0].isdigit():
                 continue
             nodes.append(Token(row))
-        return nodes
+        if len(nodes) > 0:
+            sentences.append(nodes)
+        return sentences
+
+    @staticmethod
+    def get_conllu(input, lang="en"):
+        """
+            Returns the UDPipe parse of the given input in CoNLL-U format.
+        :param input: Any text.
+        :param lang: The language of the input.
+        :return: The CoNLL-U text.
+        """
+        return Understanding._process(input, lang)
+
+    @staticmethod
+    def get_sentences(input, lang="en"):
+        """
+            Returns the tokens of the given input grouped per sentence.
+        :param input: Any text.
+        :param lang: The language of the input.
+        :return: A list of token lists.
+        """
+        if isinstance(input, AnalyzedText):
+            return [tree.nodes for tree in input.document.sentences]
+        return Understanding._read_conllu(Understanding._process(input, lang))
+
+    @staticmethod
+    def get_sentences_batch(texts, lang="en"):
+        """
+            Returns the tokens of each of the given texts grouped per sentence, parsing all texts with one UDPipe call.
+            The texts are joined by an empty line, which ends a sentence for UDPipe, and every sentence goes
+            to the text its first token is found in.
+        :param texts: A list of texts.
+        :param lang: The language of the texts.
+        :return: A list with a list of token lists per text.
+        """
+        texts = [text.text if isinstance(text, AnalyzedText) else text for text in texts]
+        if len(texts) == 0:
+            return []
+        joined = "\n\n".join(texts)
+        processed = Understanding._process(joined, lang)
+        sentences = Understanding._read_conllu(processed)
+        starts = Understanding._get_sentence_starts(joined, processed)
+        if len(starts) != len(sentences):
+            # the sentences cannot be placed in the texts, so each text is parsed on its own
+            return [Understanding.get_sentences(text, lang) for text in texts]
+        # where each text ends, its separator included
+        ends = list(itertools.accumulate(len(text) + 2 for text in texts))
+        found = [[] for _ in texts]
+        for start, nodes in zip(starts, sentences):
+            found[min(bisect.bisect_right(ends, start), len(texts) - 1)].append(nodes)
+        return found
+
+    @staticmethod
+    def get_tokens(input, lang="en"):
+        return [node for nodes in Understanding.get_sentences(input, lang) for node in nodes]
+
+    @staticmethod
+    def _find_boundary(text, start, end):
+        """
+            Returns where to cut text[start:end], preferably after a paragraph, else after a sentence or a word.
+        """
+        cut = text.rfind("\n\n", start, end)
+        if cut > start:
+            return cut + 2
+        last = None
+        for last in sentence_endx.finditer(text, start, end):
+            pass
+        if last is not None and last.end() > start:
+            return last.end()
+        cut = max(text.rfind(" ", start, end), text.rfind("\n", start, end))
+        if cut > start:
+            return cut + 1
+        return end
+
+    @staticmethod
+    def _get_chunks(input, chunk_size=CHUNK_SIZE):
+        """
+            Cuts the input in pieces of at most chunk_size characters ending at a paragraph or sentence boundary when possible.
+            The sentence boundaries are guessed from the punctuation, so a piece can still end within a sentence.
+
+        :param input: A string, a readable text stream or an iterable of strings (like the lines of a file).
+        :param chunk_size: The maximum amount of characters in a piece.
+        :return: A generator of strings, together making up the input.
+        """
+        if isinstance(input, str):
+            reads = (input[i:i + chunk_size] for i in range(0, len(input), chunk_size))
+        elif hasattr(input, "read"):
+            reads = iter(lambda: input.read(chunk_size), "")
+        else:
+            reads = iter(input)
+        parts = []
+        size = 0
+        for text in reads:
+            parts.append(text)
+            size += len(text)
+            if size < chunk_size:
+                continue
+            buffer = "".join(parts)
+            start = 0
+            while len(buffer) - start >= chunk_size:
+                cut = Understanding._find_boundary(buffer, start, start + chunk_size)
+                yield buffer[start:cut]
+                start = cut
+            parts = [buffer[start:]]
+            size = len(parts[0])
+        buffer = "".join(parts)
+        if len(buffer.strip()) > 0:
+            yield buffer
+
+    @staticmethod
+    def _get_sentence_starts(text, processed):
+        """
+            Returns where every sentence of the CoNLL-U starts in the parsed text, by finding the surface form of its
+            tokens in order. A sentence whose tokens are not found in the text has no start.
+        """
+        starts = []
+        position = 0
+        first = True
+        # the last word of the current multiword token, whose words are not in the text
+        skip = 0
+        for line in processed.split("\n"):
+            if len(line.strip()) == 0:
+                first = True
+                continue
+            fields = line.split("\t")
+            if line.startswith("#") or len(fields) < 2 or "." in fields[0]:
+                continue
+            if "-" in fields[0]:
+                skip = int(fields[0].split("-")[1])
+            elif int(fields[0]) <= skip:
+                continue
+            found = text.find(fields[1], position)
+            if found < 0:
+                continue
+            if first:
+                starts.append(found)
+                first = False
+            position = found + len(fields[1])
+        return starts
+
+    @staticmethod
+    def stream_sentences(input, lang="en", chunk_size=CHUNK_SIZE):
+        """
+            Parses a text of any size piece by piece and yields the dependency tree of every sentence
+            as soon as its piece is parsed. Only one piece is held in memory at a time.
+
+            The text is cut in pieces of at most chunk_size characters and UDPipe segments the sentences within a piece.
+            Since a cut can fall within a sentence, the last sentence of a piece is not yielded but parsed again
+            with the next piece. A sentence longer than two pieces is split.
+
+        :param input: A string, a readable text stream or an iterable of strings.
+        :param lang: The language of the input.
+        :param chunk_size: The maximum amount of new characters parsed at once.
+        :return: A generator of Dependency objects.
+        """
+        chunks = Understanding._get_chunks(input, chunk_size)
+        rest = ""
+        chunk = next(chunks, None)
+        while chunk is not None:
+            following = next(chunks, None)
+            text = rest + chunk
+            processed = Understanding._process(text, lang)
+            sentences = Understanding._read_conllu(processed)
+            rest = ""
+            if following is not None and len(sentences) > 0 and (len(sentences) > 1 or len(text) < 2 * chunk_size):
+                starts = Understanding._get_sentence_starts(text, processed)
+                if len(starts) == len(sentences):
+                    # the last sentence may go on in the next piece
+                    rest = text[starts[-1]:]
+                    sentences = sentences[:-1]
+            for nodes in sentences:
+                yield Dependency(nodes)
+            chunk = following
 
     @staticmethod
     def get_entities(input, lang="en"):
@@ -393,8 +777,10 @@ class Understanding():
         :param lang: The language of the input.
         :return: A list of NamedEntity objects.
         """
-        mlp = Resources.get_spacy_model(lang)
-        doc = mlp(input)
+        if isinstance(input, AnalyzedText):
+            doc = input.doc
+        else:
+            doc = Resources.get_spacy_model(lang)(input)
         result = []
         for ent in doc.ents:
             result.append(NamedEntity(ent))
@@ -410,20 +796,28 @@ class Understanding():
         :param lang: The language of the input.
         :return: A list of tokens.
         """
-        nodes = Understanding.get_tokens(input, lang)
+        if isinstance(input, (Dependency, Document)):
+            nodes = input.nodes
+        elif isinstance(input, AnalyzedText):
+            nodes = input.document.nodes
+        else:
+            nodes = Understanding.get_tokens(input, lang)
         return [t for t in nodes if t.pos == "VERB"]
 
     @staticmethod
     def get_dependency_verbs(input, lang="en"):
-        tree = Understanding.get_dependency(input, lang)
-        return tree.get_verbs()
+        if isinstance(input, (Dependency, Document)):
+            return input.get_verbs()
+        if isinstance(input, AnalyzedText):
+            return input.document.get_verbs()
+        return Understanding.get_document(input, lang).get_verbs()
 
     @staticmethod
     def get_svo(input, lang="en"):
         """
             Returns the subjects-verb-object triples in the given input.
 
-        :param input: Any text
+        :param input: Any text or an already parsed Dependency, Document or AnalyzedText.
         :param lang: The language of the input.
         :return: A list of 3-tuples
         """
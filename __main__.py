@@ -0,0 +1,5 @@
+import sys
+
+from .Commands import Commands
+
+sys.exit(Commands.main(sys.argv[1:]))
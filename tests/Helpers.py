@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import time
+
+from ..Resources import Resources
+from ..Understanding import Dependency, Token
+
+# the parses of the texts used by the tests, replayed so that these tests run without the model files;
+# TINK_FIXTURES gives another file and TINK_RECORD=1 records the missing texts with the models, see FixtureBackend
+FIXTURES = os.environ.get("TINK_FIXTURES") or os.path.join(os.path.dirname(__file__), "fixtures.jsonl")
+
+
+def make_token(id, word, pos, parent_id, dep):
+    """
+        A token of a sentence tree without UDPipe.
+    """
+    return Token([str(id), word, word.lower(), pos, "_", "_", str(parent_id), dep])
+
+
+def make_coordinated_tree(conjuncts, branches=1, nested=True):
+    """
+        Builds the tree of a sentence like 'Ann and Bob saw X1, X2, ... and Xn' without UDPipe.
+        Every branch is an object of the verb with the given number of conjuncts attached to it,
+        either as a chain (each conjunct under the previous one) or flat (all under the first).
+    """
+    nodes = [make_token(1, "Ann", "PROPN", 3, "nsubj"),
+             make_token(2, "Bob", "PROPN", 1, "conj"),
+             make_token(3, "saw", "VERB", 0, "root")]
+    id = 4
+    for b in range(branches):
+        head_id = id
+        nodes.append(make_token(id, f"O{b}", "NOUN", 3, "obj"))
+        id += 1
+        for c in range(conjuncts):
+            parent_id = id - 1 if nested else head_id
+            nodes.append(make_token(id, f"X{b}_{c}", "NOUN", parent_id, "conj"))
+            id += 1
+    return Dependency(nodes)
+
+
+def timed(fn, repeat=3, clock=time.perf_counter):
+    best = None
+    for i in range(repeat):
+        start = clock()
+        fn()
+        elapsed = clock() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def use_fixtures(test):
+    """
+        Replays the parses of FIXTURES for the rest of the test, the backend is restored afterwards.
+    """
+    previous = Resources.use_fixtures(FIXTURES, os.environ.get("TINK_RECORD") == "1")
+    test.addCleanup(Resources.set_backend, previous)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+
+import tracemalloc
+import unittest
+from nose.tools import assert_equal
+
+from ..Patterns import Patterns, Match
+from ..Thesaurus import Thesaurus
+from ..Understanding import SVOExtractor
+from .Helpers import make_coordinated_tree, timed
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_deep_coordination(self):
+        # deeper than the default recursion limit
+        tree = make_coordinated_tree(1500)
+        found = SVOExtractor(tree).extract_svo()
+        assert_equal(len(found), 1)
+        assert_equal(found[0][0], ["Ann", "Bob"])
+        assert_equal(len(found[0][2]), 1501)
+
+    def test_no_duplicates(self):
+        tree = make_coordinated_tree(5, branches=4)
+        objects = SVOExtractor(tree).extract_svo()[0][2]
+        assert_equal(len(objects), 24)
+        assert_equal(len(objects), len(set(objects)))
+
+    def test_coordination_scaling(self):
+        def run(size, nested):
+            tree = make_coordinated_tree(size, branches=4, nested=nested)
+            return timed(lambda: SVOExtractor(tree).extract_svo())
+
+        for nested in [True, False]:
+            small = run(50, nested)
+            large = run(400, nested)
+            print(f"nested={nested}: {small * 1000:.2f}ms for 50 conjuncts, {large * 1000:.2f}ms for 400 conjuncts")
+            # linear growth gives a ratio around 8, anything quadratic is well beyond 64
+            assert large < 24 * small + 0.01
+
+    def test_pattern_backtracking(self):
+        # inputs which pass the prefilter but fail late; lazy '(.*?)' groups take seconds on a fraction of these
+        cases = [("%a x %b x %c x %d y", "x " * 20000 + "y w"),
+                 ("%a a %b a %c a %d b", "a " * 20000 + "b a"),
+                 ("%a %b %c %d %e z", "a " * 20000 + "z q"),
+                 ("a %x a %y a %z b c", "a b " * 10000 + "c d")]
+        for pattern, input in cases:
+            compiled = Patterns.compile(pattern)
+            assert compiled.accepts(input.split())
+            elapsed = timed(lambda: compiled.is_match(input), repeat=1)
+            print(f"'{pattern}': {elapsed * 1000:.2f}ms for {len(input.split())} words")
+            assert not compiled.is_match(input)
+            assert elapsed < 1
+
+    def test_pattern_scaling(self):
+        compiled = Patterns.compile("%a x %b x %c x %d y")
+        small = timed(lambda: compiled.is_match("x " * 1000 + "y w"))
+        large = timed(lambda: compiled.is_match("x " * 8000 + "y w"))
+        assert large < 24 * small + 0.01
+
+    def test_match_allocation(self):
+        def allocated(fn, count=1000):
+            fn()
+            tracemalloc.start()
+            try:
+                before = tracemalloc.take_snapshot()
+                kept = [fn() for i in range(count)]
+                after = tracemalloc.take_snapshot()
+            finally:
+                tracemalloc.stop()
+            return sum(d.size_diff for d in after.compare_to(before, "filename")) / count
+
+        compiled = Patterns.compile("%a is %b")
+        tokens = "a tree is a plant".split()
+        input = " ".join(tokens)
+        success = allocated(lambda: Patterns._extract(compiled.pattern, input, "en", tokens, compiled))
+        empty = allocated(lambda: Match(compiled.pattern, input, compiled))
+        print(f"{success:.0f} bytes per successful match, {empty:.0f} bytes per match without values")
+        # a Match, the copied list of parameters, two Parameter copies and their values
+        assert success < 1024
+        assert empty < 128
+
+    def test_synonym_lookup(self):
+        thesaurus = Thesaurus.get_thesaurus()
+        words = ["wijshied", "auto's", "gebouwn", "verstnad", "kennsi"]
+        thesaurus.search(words[0], fuzzy=True)
+        elapsed = timed(lambda: [thesaurus.search(w, fuzzy=True) for w in words * 100])
+        # a fuzzy lookup takes well under a millisecond, an exact one a few microseconds
+        assert elapsed / 500 < 1e-3
+        elapsed = timed(lambda: [thesaurus.search("wijsheid") for i in range(500)])
+        assert elapsed / 500 < 2e-5
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from nose.tools import assert_equal
+
+from ..Commands import Commands
+from ..Language import Language
+from ..Patterns import PatternSet
+from ..Understanding import Understanding
+from .Helpers import use_fixtures
+
+
+class TestCommands(unittest.TestCase):
+
+    def test_read_items(self):
+        stream = io.StringIO("first line\n\nsecond\nblock\n")
+        assert_equal(list(Commands.read_items([stream])), ["first line", "second", "block"])
+        stream = io.StringIO("first line\n\nsecond\nblock\n")
+        assert_equal(list(Commands.read_items([stream], documents=True)), ["first line", "second\nblock"])
+
+    def test_synonyms(self):
+        with mock.patch.object(Language, "get_synonyms", side_effect=lambda word, lang: [word.upper()]):
+            records = Commands.synonyms("big house", "en", {})
+        assert_equal(records, [{"word": "big", "synonyms": ["BIG"]}, {"word": "house", "synonyms": ["HOUSE"]}])
+
+    def test_parse_error(self):
+        output = io.StringIO()
+        with mock.patch.object(Understanding, "get_conllu", side_effect=Exception("The model failed.")):
+            Commands.run("parse", ["Lynda owns a car."], output, options={"format": "conllu"})
+        assert_equal(output.getvalue(), "# item = 0\n# error = The model failed.\n\n")
+
+    def test_main_closes_files(self):
+        opened = []
+        real_open = open
+
+        def tracked(*args, **kwargs):
+            f = real_open(*args, **kwargs)
+            opened.append(f)
+            return f
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "input.txt")
+            with real_open(path, "wt", encoding="utf-8") as f:
+                f.write("big house\n")
+            with mock.patch("builtins.open", tracked), \
+                    mock.patch.object(Language, "get_synonyms", return_value=[]), \
+                    mock.patch("sys.stdout", io.StringIO()), mock.patch("sys.stderr", io.StringIO()):
+                assert_equal(Commands.main(["synonyms", path]), 0)
+        assert len(opened) > 0
+        assert all(f.closed for f in opened)
+
+    def test_svo(self):
+        use_fixtures(self)
+        output = io.StringIO()
+        items = ["Janna heeft een rode wagen en een fiets."] * 5
+        assert_equal(Commands.run("svo", items, output, lang="nl", workers=2, batch_size=2), 5)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert_equal([r["item"] for r in records], [0, 1, 2, 3, 4])
+        assert_equal(records[0]["subjects"], ["Janna"])
+        assert_equal(records[0]["objects"], ["wagen", "fiets"])
+
+    def test_parse(self):
+        use_fixtures(self)
+        output = io.StringIO()
+        Commands.run("parse", ["Lynda owns a car.", "I went home."], output, options={"format": "conllu"})
+        blocks = output.getvalue().strip().split("\n\n")
+        assert_equal(len(blocks), 2)
+
+    def test_match(self):
+        use_fixtures(self)
+        output = io.StringIO()
+        Commands.run("match", ["a tree is a plant", "nothing"], output, options={"patterns": ["I like %a", "%a is %b"]})
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert_equal(records[0]["pattern"], "%a is %b")
+        assert_equal(records[0]["parameters"], {"a": "a tree", "b": "a plant"})
+        assert records[1]["pattern"] is None
+
+    def test_match_rules(self):
+        output = io.StringIO()
+        Commands.run("match", ["a tree is a plant!"], output, options={"patterns": ["%a is %b"], "tokenizer": "rules"})
+        assert_equal(json.loads(output.getvalue())["parameters"], {"a": "a tree", "b": "a plant"})
+
+    def test_match_compiles_once(self):
+        output = io.StringIO()
+        Commands._pattern_sets.clear()
+        with mock.patch.object(PatternSet, "__init__", side_effect=PatternSet.__init__, autospec=True) as init:
+            Commands.run("match", ["a tree is a plant", "the sky is blue", "nothing"], output, batch_size=1,
+                         options={"patterns": ["%a is %b"], "tokenizer": "rules"})
+        assert_equal(init.call_count, 1)
+        assert_equal(len(output.getvalue().splitlines()), 3)
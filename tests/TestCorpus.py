@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import tempfile
+import unittest
+from nose.tools import assert_equal, assert_raises
+
+from ..Corpus import Corpus, CorpusWriter
+from ..Understanding import Understanding, Dependency, Document
+from .Helpers import make_token, use_fixtures
+
+
+class TestCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "corpus.bin")
+        self.first = Dependency([make_token(1, "Peter", "PROPN", 3, "nsubj"),
+                                 make_token(2, "Fred", "PROPN", 1, "conj"),
+                                 make_token(3, "went", "VERB", 0, "root"),
+                                 make_token(4, "France", "PROPN", 3, "obl")])
+        self.second = Dependency([make_token(1, "I", "PRON", 2, "nsubj:pass"),
+                                  make_token(2, "go", "VERB", 0, "root")])
+
+    def test_roundtrip(self):
+        with CorpusWriter(self.path) as writer:
+            assert_equal(writer.add(Document([self.first, self.second])), 0)
+            assert_equal(writer.add(self.second), 1)
+
+        with Corpus(self.path) as corpus:
+            assert_equal(len(corpus), 2)
+            document = corpus[0]
+            assert_equal(len(document), 2)
+            assert_equal(str(document.sentences[0]), str(self.first))
+            assert_equal(document.get_node("fred").lemma, "fred")
+            assert_equal(document.get_node("fred").parent.word, "Peter")
+            assert_equal(str(corpus[1]), str(self.second))
+            assert_raises(IndexError, corpus.get_document, 2)
+
+    def test_arrays(self):
+        with CorpusWriter(self.path) as writer:
+            writer.add(Document([self.first, self.second]))
+            writer.add(self.second)
+
+        with Corpus(self.path) as corpus:
+            # the columns are views on the mapped file
+            assert not corpus.get_column("head").flags.owndata
+            arrays = corpus.get_arrays()
+            expected = Document([self.first, self.second, self.second]).to_arrays()
+            assert_equal(list(arrays.heads), list(expected.heads))
+            assert_equal(list(arrays.pos), list(expected.pos))
+            assert_equal(list(arrays.deprel), list(expected.deprel))
+            assert_equal(list(corpus.get_arrays(1).heads), [1, 1])
+
+    def test_close_with_views(self):
+        with CorpusWriter(self.path) as writer:
+            writer.add(Document([self.first, self.second]))
+        corpus = Corpus(self.path)
+        heads = corpus.get_column("head")
+        corpus.close()
+        # the view stays readable after the corpus is closed
+        assert_equal(list(heads), [3, 1, 0, 3, 2, 0])
+
+    def test_failed_write(self):
+        def fail():
+            with CorpusWriter(self.path) as writer:
+                writer.add(self.first)
+                raise ValueError("Parsing failed.")
+        assert_raises(ValueError, fail)
+        assert not os.path.exists(self.path)
+
+    def test_build(self):
+        use_fixtures(self)
+        count = Corpus.build(self.path, ["Lynda owns a car. George drove to the factory.", "I went home."])
+        assert_equal(count, 2)
+        with Corpus(self.path) as corpus:
+            assert_equal(len(corpus[0]), 2)
+            assert_equal(corpus[0].sentences[0].root.word, "owns")
+            assert_equal(corpus[1].sentences[0].root.word, "went")
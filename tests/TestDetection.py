@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+
+import unittest
+from unittest import mock
+from nose.tools import assert_equal
+
+from ..Detection import LanguageDetector, Batch
+from ..Understanding import Understanding
+
+
+def make_conllu(sentences):
+    """
+        The CoNLL-U of sentences given as lists of words, each word depending on the first one.
+    """
+    rows = []
+    for words in sentences:
+        for i, word in enumerate(words, 1):
+            rows.append(f"{i}\t{word}\t{word}\tNOUN\t_\t_\t{0 if i == 1 else 1}\t{'root' if i == 1 else 'dep'}\t_\t_")
+        rows.append("")
+    return "\n".join(rows) + "\n"
+
+# short utterances which are not in the corpus of the profiles, see LanguageDetector.main
+HELD_OUT = {
+    "en": [
+        "thanks a lot", "okay", "see you tomorrow", "what time is it", "I would like to cancel my order",
+        "can you help me", "that sounds great", "where do you live", "my name is Peter", "the weather is nice today",
+        "how much does it cost", "I don't know", "good morning", "please call me back", "I lost my wallet",
+        "yes please", "the train is late again", "do you have any rooms left", "I am very happy with it", "what do you mean",
+        "nice to meet you", "never mind", "I'm hungry", "where is the station", "let me think about it"
+    ],
+    "nl": [
+        "dank je wel", "prima", "tot morgen", "hoe laat is het", "ik wil mijn bestelling annuleren",
+        "kun je me helpen", "dat klinkt goed", "waar woon je", "mijn naam is Peter", "het weer is mooi vandaag",
+        "hoeveel kost het", "ik weet het niet", "goedemorgen", "bel me alsjeblieft terug", "ik ben mijn portemonnee kwijt",
+        "ja graag", "de trein is weer te laat", "heeft u nog kamers vrij", "ik ben er heel blij mee", "wat bedoel je",
+        "leuk je te ontmoeten", "laat maar", "ik heb honger", "waar is het station", "ik zal erover nadenken"
+    ],
+    "fr": [
+        "merci beaucoup", "d'accord", "à demain", "quelle heure est-il", "je voudrais annuler ma commande",
+        "pouvez-vous m'aider", "ça a l'air super", "où habites-tu", "je m'appelle Pierre", "il fait beau aujourd'hui",
+        "combien ça coûte", "je ne sais pas", "bonjour", "rappelez-moi s'il vous plaît", "j'ai perdu mon portefeuille",
+        "oui s'il vous plaît", "le train est encore en retard", "avez-vous encore des chambres", "j'en suis très content", "que veux-tu dire",
+        "enchanté de faire votre connaissance", "laisse tomber", "j'ai faim", "où est la gare", "je vais y réfléchir"
+    ],
+    "de": [
+        "danke schön", "danke", "bis morgen", "wie spät ist es", "ich möchte meine Bestellung stornieren",
+        "kannst du mir helfen", "das klingt gut", "wo wohnst du", "ich heiße Peter", "das Wetter ist heute schön",
+        "wie viel kostet das", "ich weiß es nicht", "guten Morgen", "bitte ruf mich zurück", "ich habe meine Geldbörse verloren",
+        "ja bitte", "der Zug hat wieder Verspätung", "haben Sie noch Zimmer frei", "ich bin sehr zufrieden damit", "was meinst du",
+        "freut mich dich kennenzulernen", "vergiss es", "ich habe Hunger", "wo ist der Bahnhof", "ich denke darüber nach"
+    ]
+}
+
+
+class TestDetection(unittest.TestCase):
+
+    def test_detect(self):
+        samples = {
+            "en": ["where is my package", "I cannot open the door", "my phone is broken"],
+            "nl": ["waar is mijn pakje", "ik kan de deur niet openen", "Jan en Jos zijn met de wagen weggegaan"],
+            "fr": ["où est mon colis", "je ne peux pas ouvrir la porte", "je suis allé à la maison"],
+            "de": ["wo ist mein Paket", "ich kann die Tür nicht öffnen", "ich bin so glücklich mit meinem mann"]
+        }
+        for lang, texts in samples.items():
+            assert_equal(LanguageDetector.detect_batch(texts), [lang] * len(texts))
+        assert_equal(LanguageDetector.detect("12345 !!", default="nl"), "nl")
+        assert {"en", "nl", "fr", "de"} <= set(LanguageDetector.get_languages())
+
+    def test_held_out(self):
+        total = 0
+        for lang, texts in HELD_OUT.items():
+            right = LanguageDetector.detect_batch(texts).count(lang)
+            assert right >= 0.8 * len(texts), f"{right} of {len(texts)} right for '{lang}'"
+            total += right
+        assert total >= 0.9 * sum(len(texts) for texts in HELD_OUT.values())
+
+    def test_route(self):
+        texts = ["hallo, hoe gaat het met je", "hello, how are you", "bonjour, comment allez-vous", "goedemorgen allemaal"]
+        calls = []
+
+        def operation(group, lang):
+            calls.append(lang)
+            return [f"{lang}:{t}" for t in group]
+
+        found = Batch.route(texts, operation)
+        assert_equal(found, ["nl:" + texts[0], "en:" + texts[1], "fr:" + texts[2], "nl:" + texts[3]])
+        # one call per language
+        assert_equal(sorted(calls), ["en", "fr", "nl"])
+        assert_equal(Batch.route(texts, operation, "en"), ["en:" + t for t in texts])
+
+    def test_batch_parse(self):
+        texts = ["Lynda owns a car. She drives.", "I went home."]
+        conllu = make_conllu([["Lynda", "owns", "a", "car", "."], ["She", "drives", "."], ["I", "went", "home", "."]])
+        with mock.patch.object(Understanding, "_process", return_value=conllu) as process:
+            found = Batch.get_tokens(texts, "en")
+        # one UDPipe call for the group
+        assert_equal(process.call_args_list, [mock.call("\n\n".join(texts), "en")])
+        assert_equal([[t.word for t in tokens] for tokens in found], [["Lynda", "owns", "a", "car", ".", "She", "drives", "."], ["I", "went", "home", "."]])
+
+    def test_batch(self):
+        found = Batch.get_svo(["Lynda owns a car.", "Janna heeft een rode wagen en een fiets."])
+        assert_equal(found[1], [(['Janna'], 'heeft', ['wagen', 'fiets'])])
+        entities = Batch.get_entities(["John Walter went to Liverpool by train.", "Jan Bosman reisde dan verder naar Rome en Milaan."])
+        assert_equal({e.entity for e in entities[0]}, {"John Walter", "Liverpool"})
+        assert_equal({e.entity for e in entities[1]}, {"Jan Bosman", "Rome", "Milaan"})
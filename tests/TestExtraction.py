@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from nose.tools import assert_equal
+
+from ..Extraction import SVOPipeline
+
+
+class TestExtraction(unittest.TestCase):
+
+    def test_extract(self):
+        found = SVOPipeline.extract("Lynda owns a car. Peter and Fred went on holidays to France.")
+        assert_equal({i for i, triple in found}, {0, 1})
+        assert_equal(found[0][1][1], "owns")
+
+    def test_stream_jsonl(self):
+        out = io.StringIO()
+        count = SVOPipeline(lang="nl").run(["Janna heeft een rode wagen en een fiets."], out)
+        assert_equal(count, 1)
+        record = json.loads(out.getvalue().splitlines()[0])
+        assert_equal(record["source"], "<texts>")
+        assert_equal(record["offset"], 0)
+        assert_equal(record["subjects"], ["Janna"])
+        assert_equal(record["verb"], "heeft")
+        assert_equal(record["objects"], ["wagen", "fiets"])
+
+    def test_resume(self):
+        folder = tempfile.mkdtemp()
+        input = os.path.join(folder, "input.txt")
+        with open(input, "wt", encoding="utf-8") as f:
+            f.write("Lynda owns a car.\nGeorge drove to the factory.\nFred brought the kids to school!\n")
+        output = os.path.join(folder, "output.tsv")
+        checkpoint = os.path.join(folder, "checkpoint.json")
+
+        SVOPipeline(format="tsv", batch_size=1, checkpoint=checkpoint).run_files(input, output)
+        with open(output, "rt", encoding="utf-8") as f:
+            complete = f.read()
+        with open(checkpoint, "rt", encoding="utf-8") as f:
+            assert_equal(json.load(f)["done"], [input])
+
+        # pretend the job was interrupted after the first line
+        first = complete.splitlines(True)[0]
+        with open(output, "wt", encoding="utf-8") as f:
+            f.write(first)
+        with open(checkpoint, "wt", encoding="utf-8") as f:
+            json.dump({"source": input, "offset": len("Lynda owns a car.\n"), "done": [], "texts": 1, "triples": 1}, f)
+        SVOPipeline(format="tsv", batch_size=2, checkpoint=checkpoint).run_files([input], output)
+        with open(output, "rt", encoding="utf-8") as f:
+            assert_equal(f.read(), complete)
+
+    def test_resume_truncates(self):
+        folder = tempfile.mkdtemp()
+        input = os.path.join(folder, "input.txt")
+        with open(input, "wt", encoding="utf-8") as f:
+            f.write("Ürsula owns a car.\nGeorge drove to the factory.\nFred brought the kids to school!\n")
+        output = os.path.join(folder, "output.tsv")
+        checkpoint = os.path.join(folder, "checkpoint.json")
+
+        def extract(text, lang="en"):
+            return [(0, ([text.split()[0]], text.split()[1], [text.split()[-1]]))]
+
+        with mock.patch.object(SVOPipeline, "extract", side_effect=extract):
+            SVOPipeline(format="tsv", batch_size=1, checkpoint=checkpoint).run_files(input, output)
+            with open(output, "rt", encoding="utf-8") as f:
+                complete = f.read()
+            assert_equal(len(complete.splitlines()), 3)
+
+            # pretend the job was interrupted after the checkpoint of the first line, with the second written already
+            first = complete.splitlines(True)[0]
+            with open(output, "wt", encoding="utf-8") as f:
+                f.write(first + complete.splitlines(True)[1])
+            with open(checkpoint, "wt", encoding="utf-8") as f:
+                json.dump({"source": input, "offset": len("Ürsula owns a car.\n".encode("utf-8")), "done": [], "texts": 1,
+                           "triples": 1, "output": len(first.encode("utf-8"))}, f)
+            assert_equal(SVOPipeline(format="tsv", batch_size=1, checkpoint=checkpoint).run_files([input], output), 3)
+        with open(output, "rt", encoding="utf-8") as f:
+            assert_equal(f.read(), complete)
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+
+import unittest
+from types import SimpleNamespace
+from nose.tools import assert_equal
+
+from ..Features import Features, TreeArrays, POS_CODES, DEPREL_CODES, DEPRELS
+from ..Understanding import Understanding, Dependency, Document
+from .Helpers import make_token, use_fixtures
+
+
+class TestFeatures(unittest.TestCase):
+
+    def setUp(self):
+        self.first = Dependency([make_token(1, "Peter", "PROPN", 3, "nsubj"),
+                                 make_token(2, "Fred", "PROPN", 1, "conj"),
+                                 make_token(3, "went", "VERB", 0, "root"),
+                                 make_token(4, "France", "PROPN", 3, "obl")])
+        self.second = Dependency([make_token(1, "I", "PRON", 2, "nsubj:pass"),
+                                  make_token(2, "go", "VERB", 0, "root")])
+
+    def test_arrays(self):
+        arrays = Document([self.first, self.second]).to_arrays()
+        assert_equal(arrays.sentences, 2)
+        assert_equal(list(arrays.heads), [2, 0, 2, 2, 5, 5])
+        assert_equal(list(arrays.depth), [1, 2, 0, 1, 1, 0])
+        assert_equal(list(arrays.sentence), [0, 0, 0, 0, 1, 1])
+        assert_equal(list(arrays.offsets), [0, 4, 6])
+        # subtypes fall back to the universal relation
+        assert_equal(arrays.deprel[4], DEPREL_CODES["nsubj"])
+
+        joined = TreeArrays.concatenate([self.first.to_arrays(), self.second.to_arrays()])
+        assert_equal(list(joined.heads), list(arrays.heads))
+        assert_equal(list(joined.offsets), list(arrays.offsets))
+
+    def test_features(self):
+        arrays = TreeArrays.from_trees([self.first, self.second])
+        counts = Features.pos_counts(arrays)
+        assert_equal(counts[0, POS_CODES["PROPN"]], 3)
+        assert_equal(counts[1, POS_CODES["PRON"]], 1)
+
+        bigrams = Features.deprel_bigrams(arrays)
+        assert_equal(list(bigrams.sum(axis=1)), [3, 1])
+        assert_equal(bigrams[0, DEPREL_CODES["nsubj"] * len(DEPRELS) + DEPREL_CODES["conj"]], 1)
+
+        assert_equal(list(Features.tree_depth(arrays)), [2, 1])
+        assert_equal(Features.head_distances(arrays).tolist(), [[1.0, 2.0], [0.5, 1.0]])
+        assert_equal(Features.get_matrix(arrays).shape[0], 2)
+
+    def test_empty_sentences(self):
+        # a sentence without tokens, from_trees only reads the nodes
+        empty = SimpleNamespace(nodes=[])
+        for trees, depth in [([empty, self.first, empty, self.second], [0, 2, 0, 1]), ([self.second, empty], [1, 0]), ([empty], [0])]:
+            arrays = TreeArrays.from_trees(trees)
+            assert_equal(list(Features.tree_depth(arrays)), depth)
+            assert_equal(list(Features.head_distances(arrays)[:, 1]), [{0: 0.0, 1: 1.0, 2: 2.0}[d] for d in depth])
+
+    def test_parsed(self):
+        use_fixtures(self)
+        document = Understanding.get_document("John and Levi went to Brussels by car. Lynda owns a car.")
+        matrix = Features.get_matrix(document.sentences)
+        assert_equal(matrix.shape[0], 2)
+        assert all(Features.tree_depth(document.to_arrays()) >= 2)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import threading
+import time
+import unittest
+from nose.tools import assert_equal
+
+from ..Hosting import Supervisor
+from ..Understanding import Understanding
+from .Helpers import use_fixtures
+
+
+class TestHosting(unittest.TestCase):
+
+    def setUp(self):
+        # the workers are forked after the models of 'en' are warmed up
+        use_fixtures(self)
+        self.read, self.write = os.pipe()
+
+    def tearDown(self):
+        os.close(self.read)
+        os.close(self.write)
+
+    def _receive(self, count):
+        data = b""
+        while len(data) < count:
+            data += os.read(self.read, count - len(data))
+        return data
+
+    def test_shared_models(self):
+        def handler(number):
+            Understanding.get_tokens("Lynda owns a car.", "en")
+            os.write(self.write, str(number).encode("utf-8"))
+            time.sleep(60)
+
+        supervisor = Supervisor(handler, workers=3, languages=["en"], respawn=False)
+        supervisor.start()
+        try:
+            assert_equal(sorted(self._receive(3)), sorted(b"012"))
+            memory = supervisor.get_memory()
+            assert_equal(len(memory), 4)
+            for pid in supervisor.children:
+                # the model pages are shared with the parent
+                assert memory[pid]["uss"] < memory[pid]["rss"] / 2
+            assert_equal(len(supervisor.report().splitlines()), 5)
+        finally:
+            supervisor.stop()
+            supervisor.wait()
+        assert_equal(len(supervisor.children), 0)
+
+    def test_respawn(self):
+        def handler(number):
+            os.write(self.write, b"x")
+            raise Exception("Crashed.")
+
+        supervisor = Supervisor(handler, workers=1, languages=["en"], max_restarts=2, restart_delay=0.01)
+        supervisor.start()
+        waiting = threading.Thread(target=supervisor.wait)
+        waiting.start()
+        # the worker crashes straight away and is replaced twice, after which it's given up
+        waiting.join(10)
+        assert not waiting.is_alive()
+        assert_equal(self._receive(3), b"xxx")
+        assert_equal(supervisor.crashes[0], 2)
+        assert not supervisor.running
+
+    def test_no_respawn_on_exit(self):
+        def handler(number):
+            os.write(self.write, str(number).encode("utf-8"))
+
+        supervisor = Supervisor(handler, workers=2, languages=["en"], restart_delay=0.01)
+        supervisor.start()
+        supervisor.wait()
+        # the workers which end normally are not replaced
+        assert_equal(sorted(self._receive(2)), sorted(b"01"))
+        assert_equal(len(supervisor.children), 0)
+        assert_equal(supervisor.crashes, {})
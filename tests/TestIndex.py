@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import tempfile
+import unittest
+from nose.tools import assert_equal
+
+from ..Index import InvertedIndex, PostingList
+from ..Understanding import Dependency, Document
+from .Helpers import make_token
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.first = Dependency([make_token(1, "Peter", "PROPN", 2, "nsubj"),
+                                 make_token(2, "saw", "VERB", 0, "root"),
+                                 make_token(3, "car", "NOUN", 2, "obj")])
+        self.second = Dependency([make_token(1, "I", "PRON", 2, "nsubj"),
+                                  make_token(2, "go", "VERB", 0, "root"),
+                                  make_token(3, "car", "NOUN", 2, "obj")])
+
+    def test_postings(self):
+        positions = [(0, 0, 1), (0, 0, 5), (0, 3, 2), (2, 0, 0), (2, 0, 1), (200, 7, 300)]
+        posting = PostingList()
+        for p in positions:
+            posting.append(*p)
+        assert_equal(list(posting), positions)
+        assert_equal(posting.get_sentences(), [(0, 0), (0, 3), (2, 0), (200, 7)])
+        assert len(posting.data) < 3 * len(positions) + 3
+
+    def test_find(self):
+        index = InvertedIndex()
+        assert_equal(index.add(Document([self.first, self.second])), 0)
+        # the flat token list of Understanding.get_tokens is split where the ids start over
+        assert_equal(index.add(self.first.nodes + self.second.nodes), 1)
+        assert_equal(index.find_lemma("car", "NOUN"), [(0, 0, 2), (0, 1, 2), (1, 0, 2), (1, 1, 2)])
+        assert_equal(index.find_word("PETER"), [(0, 0, 0), (1, 0, 0)])
+        assert_equal(index.find_lemma("car", "VERB"), [])
+        assert_equal(index.find_sentences(("car", "NOUN"), "i"), [(0, 1), (1, 1)])
+        assert_equal(index.find_sentences(("see", "VERB"), "i"), [])
+
+    def test_persist(self):
+        index = InvertedIndex()
+        index.add(self.first)
+        path = os.path.join(tempfile.mkdtemp(), "index.bin")
+        index.save(path)
+        loaded = InvertedIndex.load(path)
+        assert_equal(loaded.documents, 1)
+        assert_equal(loaded.find_word("car"), [(0, 0, 2)])
+        # appending continues where the saved index stopped
+        assert_equal(loaded.add(self.second), 1)
+        assert_equal(loaded.find_word("car"), [(0, 0, 2), (1, 0, 2)])
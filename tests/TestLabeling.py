@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+
+import gc
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from nose.tools import assert_equal, assert_raises
+
+from ..Labeling import PatternLabeler
+from ..Patterns import PatternSet
+from ..Resources import Resources
+from .TestStress import StubModel
+
+PATTERNS = ["%who is home", "%who likes %what", "buy %amount of %item"]
+
+
+class TestLabeling(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.input = os.path.join(self.dir, "input.txt")
+        self.output = os.path.join(self.dir, "output.jsonl")
+        lines = []
+        for i in range(500):
+            lines.append(["John is home", f"Mary likes {i} apples", "nothing to see", "", "buy two of these", "Ürsula is home"][i % 6])
+        with open(self.input, "wt", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def read_output(self):
+        with open(self.output, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def expected(self):
+        patterns = PatternSet(PATTERNS, tokenizer="rules")
+        found = []
+        offset = 0
+        with open(self.input, "rb") as f:
+            for line in f:
+                text = line.decode("utf-8").strip()
+                if len(text) > 0:
+                    m = patterns.fit(text)
+                    found.append({"offset": offset, "pattern": m.pattern if m else None, "parameters": m.as_dict() if m else None})
+                offset += len(line)
+        return found
+
+    def test_shards(self):
+        size = os.path.getsize(self.input)
+        with open(self.input, "rb") as f:
+            data = f.read()
+        for shard_size in [1, 100, 1000, size, 10 * size]:
+            shards = PatternLabeler(PATTERNS, workers=3, shard_size=shard_size).get_shards(self.input)
+            assert_equal(shards[0][0], 0)
+            assert_equal(shards[-1][1], size)
+            assert len(shards) >= 3
+            for (start, end), (next, last) in zip(shards, shards[1:]):
+                assert_equal(end, next)
+            # every shard starts at a line
+            assert all(data[start - 1:start] == b"\n" for start, end in shards[1:])
+
+    def test_run(self):
+        expected = self.expected()
+        for workers in [1, 3]:
+            labeler = PatternLabeler(PATTERNS, tokenizer="rules", workers=workers, shard_size=500)
+            assert_equal(labeler.run(self.input, self.output), len(expected))
+            assert_equal(self.read_output(), expected)
+            assert_equal(labeler.matched, len([r for r in expected if r["pattern"] is not None]))
+            assert not os.path.exists(self.output + ".parts")
+
+    def test_no_words(self):
+        with open(self.input, "wt", encoding="utf-8") as f:
+            f.write("John is home\n...\n:)\nMary likes apples\n")
+        for workers in [1, 2]:
+            labeler = PatternLabeler(PATTERNS, tokenizer="rules", workers=workers, shard_size=10)
+            assert_equal(labeler.run(self.input, self.output), 4)
+            assert_equal([r["pattern"] for r in self.read_output()], ["%who is home", None, None, "%who likes %what"])
+            assert_equal(labeler.matched, 2)
+
+    def test_progress(self):
+        reports = []
+        PatternLabeler(PATTERNS, tokenizer="rules", workers=2, shard_size=1000).run(self.input, self.output, progress=lambda *args: reports.append(args))
+        assert len(reports) > 2
+        assert_equal(reports[-1][0], reports[-1][1])
+        assert_equal([r[0] for r in reports], sorted(r[0] for r in reports))
+
+    def test_resume(self):
+        expected = self.expected()
+        checkpoint = os.path.join(self.dir, "checkpoint.json")
+
+        def interrupt(done, total, lines, elapsed):
+            if done > total / 2:
+                raise KeyboardInterrupt()
+
+        labeler = PatternLabeler(PATTERNS, tokenizer="rules", workers=2, shard_size=500)
+        assert_raises(KeyboardInterrupt, labeler.run, self.input, self.output, checkpoint, interrupt)
+        assert os.path.exists(checkpoint)
+        assert len(self.read_output()) < len(expected)
+        # output written after the checkpoint is dropped
+        with open(self.output, "at", encoding="utf-8") as f:
+            f.write('{"offset": -1}\n')
+
+        resumed = PatternLabeler(PATTERNS, tokenizer="rules", workers=2, shard_size=500)
+        assert_equal(resumed.run(self.input, self.output, checkpoint), len(expected))
+        assert_equal(self.read_output(), expected)
+        assert_equal(resumed.matched, len([r for r in expected if r["pattern"] is not None]))
+        assert not os.path.exists(checkpoint)
+
+        # a checkpoint of other patterns is refused
+        assert_raises(KeyboardInterrupt, labeler.run, self.input, self.output, checkpoint, interrupt)
+        assert_raises(Exception, PatternLabeler(PATTERNS[:1], tokenizer="rules").run, self.input, self.output, checkpoint)
+
+    def test_preload_model(self):
+        assert not PatternSet(PATTERNS, tokenizer="auto").uses_spacy()
+        assert PatternSet(PATTERNS + ["%who is %what_verb"], tokenizer="auto").uses_spacy()
+        with mock.patch.object(Resources, "get_spacy_model", return_value=StubModel()) as get_model:
+            PatternLabeler(PATTERNS, tokenizer="auto", workers=2, shard_size=1000).run(self.input, self.output)
+            assert_equal(get_model.call_count, 0)
+            expected = self.read_output()
+            # the model is loaded before the workers are forked, which only inherit it
+            PatternLabeler(PATTERNS, workers=2, shard_size=1000).run(self.input, self.output)
+            assert_equal(get_model.call_args_list, [mock.call("en")])
+            assert_equal(self.read_output(), expected)
+
+    def test_freeze(self):
+        PatternLabeler(PATTERNS, tokenizer="rules", workers=2, shard_size=1000).run(self.input, self.output)
+        assert_equal(gc.get_freeze_count(), 0)
+        # what the host froze stays frozen
+        gc.freeze()
+        try:
+            frozen = gc.get_freeze_count()
+            PatternLabeler(PATTERNS, tokenizer="rules", workers=2, shard_size=1000).run(self.input, self.output)
+            assert_equal(gc.get_freeze_count(), frozen)
+        finally:
+            gc.unfreeze()
@@ -2,10 +2,11 @@
 
 
 import unittest
+from unittest import mock
 from nose.tools import assert_equal, nottest
 
 from ..Language import Language
-from ..Patterns import Patterns
+from ..Patterns import Patterns, PatternSet, Match, COMPILED_SIZE
 
 
 class TestPatterns(unittest.TestCase):
@@ -49,3 +50,91 @@ class TestPatterns(unittest.TestCase):
         m = Patterns.fit("%a:Sunday is sunny", "is sunny.")
         assert m is not None
         assert_equal(m.get_value("a"), "Sunday")
+
+    def test_rules_tokenizer(self):
+        assert_equal(Patterns.tokenize("my name is Lela.", tokenizer="rules"), ["my", "name", "is", "Lela"])
+        assert_equal(Patterns.tokenize("It costs $ 3.50, (well) e-mail me!", tokenizer="rules"), ["It", "costs", "$", "3.50", "well", "e-mail", "me"])
+        m = Patterns.fit("%a treat", "This cake is a real treat!", tokenizer="rules")
+        assert_equal("This cake is a real", m.get_value("a"))
+        m = Patterns.fit("I like %more:fresh bread", "I like bread.", tokenizer="rules")
+        assert_equal(m.get_value("more"), "fresh")
+        e = Patterns.fit("%a is %b_cool", "Jam is Cool", tokenizer="auto")
+        assert e.get_value("b") == "Cool"
+        self.assertRaises(Exception, Patterns.fit, "%a is %b", "...", "en", "rules")
+        self.assertRaises(Exception, Patterns.fit, "%a is %b", "a is b", "en", "regex")
+
+    def test_pattern_set(self):
+        patterns = PatternSet(["%a is %b_cool", "%a is %b", "%a treat"], tokenizer="rules")
+        assert_equal(len(patterns), 3)
+        m = patterns.fit("Whiskey is delicious")
+        assert_equal(m.pattern, "%a is %b_cool")
+        assert m.get_value("b") is None
+        assert_equal([m.pattern for m in patterns.fit_all("Jam is a treat")], ["%a is %b_cool", "%a is %b", "%a treat"])
+        assert patterns.fit("nothing here") is None
+        assert_equal(PatternSet(["%a is %b_verb"], tokenizer="auto")._get_tokenizer(PatternSet(["%a is %b_verb"]).patterns[0]), "spacy")
+
+    def test_word_boundaries(self):
+        assert not Patterns.is_match("%a is %b", "this island")
+        assert Patterns.is_match("%a is %b", "this  is   an island")
+        assert Patterns.is_match("a %x b %y c", "a b c")
+        assert Patterns.is_match("a %x b %y c", "a q b b r c")
+        assert not Patterns.is_match("a %x b %y c", "a b c d")
+        assert Patterns.is_match("50% of %a", "50% of it")
+
+    def test_prefilter(self):
+        compiled = Patterns.compile("I like %more:fresh bread")
+        assert_equal(compiled.required, {"I", "like", "bread"})
+        assert_equal(compiled.min_tokens, 3)
+        assert_equal(compiled.anchor, "bread")
+        assert not compiled.accepts(["I", "like", "cake"])
+        assert compiled.accepts(["I", "like", "bread"])
+        patterns = PatternSet(["%a is %b", "I like %x bread", "%a", "a %b treat"], tokenizer="rules")
+        assert_equal(patterns._get_candidates({"I", "like", "bread"}), [1, 2])
+        assert_equal(patterns.fit("I like bread").pattern, "I like %x bread")
+        assert_equal(patterns.fit("Whatever").pattern, "%a")
+
+    def test_compile_cache(self):
+        kept = Patterns.compile("%a keeps %b")
+        for i in range(COMPILED_SIZE + 10):
+            Patterns.compile(f"%a pattern{i}")
+            # a pattern in use stays cached
+            assert Patterns.compile("%a keeps %b") is kept
+        assert_equal(len(Patterns._compiled), COMPILED_SIZE)
+        assert "%a pattern0" not in Patterns._compiled
+        assert f"%a pattern{COMPILED_SIZE + 9}" in Patterns._compiled
+
+    def test_match_template(self):
+        compiled = Patterns.compile("%a is %b:nothing")
+        m = Patterns.fit("%a is %b:nothing", "Jam is", tokenizer="rules")
+        assert_equal(m.as_dict(), {"a": "Jam", "b": "nothing"})
+        assert m.has_value("a")
+        assert not m.has_value("c")
+        # the template is left untouched
+        assert_equal([p.value for p in compiled.parameters], [None, None])
+        empty = Match("%a is %b:nothing", "")
+        assert empty._parameters is compiled.parameters
+        assert_equal(empty.as_dict(), {"a": None, "b": None})
+        # changing what the accessors hand out leaves the template alone
+        empty.get_parameter("a").value = "changed"
+        empty.parameters[1].default = "changed"
+        assert_equal(empty.get_value("a"), "changed")
+        assert_equal([(p.value, p.default) for p in compiled.parameters], [(None, None), (None, "nothing")])
+        m.get_parameter("b").value = "changed"
+        m.set_value("a", "Marmalade")
+        assert_equal(m.as_dict(), {"a": "Marmalade", "b": "changed"})
+        assert_equal(Patterns.fit("%a is %b:nothing", "Jam is", tokenizer="rules").as_dict(), {"a": "Jam", "b": "nothing"})
+
+    def test_best_fit(self):
+        patterns = ["%a", "%a is %b", "%a is %b_cool", "I like %x:fresh bread", "I like %x bread"]
+        assert_equal(Patterns.best_fit(patterns, "Jam is Cool", tokenizer="rules").pattern, "%a is %b_cool")
+        assert_equal(Patterns.best_fit(patterns, "Whiskey is delicious", tokenizer="rules").pattern, "%a is %b")
+        assert_equal(Patterns.best_fit(patterns, "I like bread", tokenizer="rules").pattern, "I like %x:fresh bread")
+        assert_equal(Patterns.best_fit(patterns, "I like rye bread", tokenizer="rules").as_dict(), {"x": "rye"})
+        assert_equal(Patterns.best_fit(patterns, "Hello", tokenizer="rules").pattern, "%a")
+        assert Patterns.best_fit(patterns[1:], "Hello", tokenizer="rules") is None
+
+    def test_best_fit_short_circuit(self):
+        with mock.patch.object(Patterns, "_extract", wraps=Patterns._extract) as extract:
+            m = Patterns.best_fit(["%a", "%a is %b", "%a is %b_cool"], "Jam is Cool", tokenizer="rules")
+        assert_equal(m.pattern, "%a is %b_cool")
+        assert_equal([c[0][0] for c in extract.call_args_list], ["%a is %b_cool"])
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import tempfile
+import unittest
+from nose.tools import assert_equal, assert_raises
+
+from ..Corpus import Corpus, CorpusWriter
+from ..Query import TreeQuery, TreeIndex, CorpusTreeIndex
+from ..Understanding import Understanding, Dependency, Document
+from .Helpers import make_token, use_fixtures
+
+
+def words(matches):
+    return [[t.word for t in m] for m in matches]
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.first = Dependency([make_token(1, "Peter", "PROPN", 3, "nsubj"),
+                                 make_token(2, "Fred", "PROPN", 1, "conj"),
+                                 make_token(3, "saw", "VERB", 0, "root"),
+                                 make_token(4, "car", "NOUN", 3, "obj"),
+                                 make_token(5, "Ford", "PROPN", 4, "nmod")])
+        self.second = Dependency([make_token(1, "I", "PRON", 2, "nsubj"),
+                                  make_token(2, "go", "VERB", 0, "root")])
+
+    def test_find(self):
+        query = TreeQuery("[pos=VERB] (> [dep=nsubj]) > [dep=obj] > [pos=PROPN]")
+        assert_equal(words(query.find(self.first)), [["saw", "Peter", "car", "Ford"]])
+        assert not query.matches(self.second)
+
+        assert_equal(words(TreeQuery("[dep=conj] < [] ~ [lemma=car]").find(self.first)), [["Fred", "Peter", "car"]])
+        assert_equal(words(TreeQuery("[pos=PROPN, dep!=conj|nmod]").find(self.first)), [["Peter"]])
+        assert_equal(words(TreeQuery('[word="Fred"]').find(self.first)), [["Fred"]])
+
+    def test_syntax_errors(self):
+        assert_raises(Exception, TreeQuery, "[pos=VERB")
+        assert_raises(Exception, TreeQuery, "[color=red]")
+        assert_raises(Exception, TreeQuery, "[pos=VERB] >")
+        assert_raises(Exception, TreeQuery, "[pos=VERB] (? [dep=obj])")
+
+    def test_index(self):
+        query = TreeQuery("[pos=VERB] > [dep=obj] > [pos=PROPN]")
+        index = TreeIndex([self.first, self.second, self.first])
+        assert_equal(index.get_candidates(query), [0, 2])
+        assert_equal([id for id, match in query.search(index)], [0, 2])
+        assert_equal(index.get_candidates(TreeQuery("[pos=PRON]")), [1])
+
+    def test_corpus_index(self):
+        path = os.path.join(tempfile.mkdtemp(), "corpus.bin")
+        with CorpusWriter(path) as writer:
+            writer.add(Document([self.first, self.second]))
+            writer.add(self.second)
+            writer.add(self.first)
+        with Corpus(path) as corpus:
+            index = CorpusTreeIndex(corpus)
+            query = TreeQuery("[pos=VERB] > [dep=obj] > [pos=PROPN]")
+            assert_equal(index.get_candidates(query), [0, 3])
+            assert_equal(words([m for id, m in query.search(index)]), [["saw", "car", "Ford"]] * 2)
+            assert_equal(index.get_candidates(TreeQuery("[lemma=unknown]")), [])
+
+    def test_parsed(self):
+        use_fixtures(self)
+        tree = Understanding.get_dependency("Lynda owns a car.")
+        found = TreeQuery("[lemma=own] > [dep=obj]").find(tree)
+        assert_equal(words(found), [["owns", "car"]])
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+
+
+import json
+import os
+import tempfile
+import unittest
+from nose.tools import assert_equal, assert_raises
+
+from ..Language import Language
+from ..Resources import Resources, FixtureBackend
+from ..Understanding import Understanding
+
+CONLLU = """# text = Lynda owns a car.
+1\tLynda\tLynda\tPROPN\tNNP\t_\t2\tnsubj\t_\t_
+2\towns\town\tVERB\tVBZ\t_\t0\troot\t_\t_
+3\ta\ta\tDET\tDT\t_\t4\tdet\t_\t_
+4\tcar\tcar\tNOUN\tNN\t_\t2\tobj\t_\tSpaceAfter=No
+5\t.\t.\tPUNCT\t.\t_\t2\tpunct\t_\t_
+
+"""
+
+DOC = {"words": ["Lynda", "owns", "a", "car", "."], "spaces": [True, True, True, False, False],
+       "lemmas": ["Lynda", "own", "a", "car", "."], "tags": ["NNP", "VBZ", "DT", "NN", "."],
+       "pos": ["PROPN", "VERB", "DET", "NOUN", "PUNCT"], "heads": [1, 1, 3, 1, 1],
+       "deps": ["nsubj", "ROOT", "det", "dobj", "punct"], "iobs": [3, 2, 2, 2, 2], "types": ["PERSON", "", "", "", ""]}
+
+
+class TestResources(unittest.TestCase):
+
+    def test_manifest(self):
+        manifest = Resources.get_manifest()
+        for lang in ["en", "nl", "de", "fr"]:
+            assert "udpipe" in manifest[lang]
+            assert "spacy" in manifest[lang]
+        assert len(Resources.get_languages()) > 40
+        assert_raises(Exception, Resources.get_udpipe_model, "xx")
+        assert_raises(Exception, Resources.get_spacy_model, "xx")
+        # no Spacy model for Vietnamese
+        assert_raises(Exception, Resources.get_spacy_model, "vi")
+
+    def test_lazy_loading(self):
+        Understanding.get_tokens("ik ga naar huis", "nl")
+        assert "nl" in Resources._udpipe_models
+        assert Resources.get_udpipe_model("nl") is Resources._udpipe_models["nl"]
+        assert "ar" not in Resources._udpipe_models
+
+    def test_register(self):
+        original = dict(Resources.get_manifest()["de"])
+        Resources.register("de-gsd", udpipe=original["udpipe"], name="German GSD")
+        try:
+            assert_equal(Resources.get_manifest()["de-gsd"]["name"], "German GSD")
+            tokens = Understanding.get_tokens("ich bin so glücklich mit meinem mann", "de-gsd")
+            assert_equal(len(tokens), 7)
+        finally:
+            del Resources.get_manifest()["de-gsd"]
+            Resources._udpipe_models.pop("de-gsd", None)
+
+    def test_fixtures(self):
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        with os.fdopen(fd, "wt", encoding="utf-8") as f:
+            f.write(json.dumps({"kind": "udpipe", "lang": "en", "text": "Lynda owns a car.", "data": CONLLU}) + "\n")
+            f.write(json.dumps({"kind": "spacy", "lang": "en", "text": "Lynda owns a car.", "data": DOC}) + "\n")
+        previous = Resources.use_fixtures(path)
+        try:
+            # no model is loaded
+            assert_equal([t.word for t in Understanding.get_tokens("Lynda owns a car.")], ["Lynda", "owns", "a", "car", "."])
+            assert_equal(Understanding.get_dependency("Lynda owns a car.").root.word, "owns")
+            assert_equal([t.text for t in Language.get_verbs("Lynda owns a car.")], ["owns"])
+            assert_equal(Language.cleanup_text("Lynda owns a car."), "Lynda owns a car")
+            entities = Understanding.get_entities("Lynda owns a car.")
+            assert_equal([(e.entity, e.type) for e in entities], [("Lynda", "PERSON")])
+            assert_raises(Exception, Understanding.get_tokens, "Something else.")
+            assert_raises(Exception, Language.get_verbs, "Something else.")
+        finally:
+            Resources.set_backend(previous)
+            os.remove(path)
+
+    def test_recording(self):
+        path = os.path.join(tempfile.mkdtemp(), "fixtures.jsonl")
+        text = "Peter and Fred went on holidays to France."
+        expected = [t.to_dict() for t in Understanding.get_tokens(text)]
+        nouns = [t.text for t in Language.get_nouns(text)]
+        previous = Resources.use_fixtures(path, record=True)
+        try:
+            Understanding.get_tokens(text)
+            Language.get_nouns(text)
+            replayed = FixtureBackend(path)
+            assert_equal(len(replayed), 2)
+            Resources.set_backend(replayed)
+            assert_equal([t.to_dict() for t in Understanding.get_tokens(text)], expected)
+            assert_equal([t.text for t in Language.get_nouns(text)], nouns)
+        finally:
+            Resources.set_backend(previous)
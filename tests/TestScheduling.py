@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+
+
+import threading
+import time
+import unittest
+from unittest import mock
+from nose.tools import assert_equal, assert_raises
+
+from ..Scheduling import Scheduler, OPERATIONS
+from ..Understanding import Understanding
+
+
+class TestScheduling(unittest.TestCase):
+
+    def setUp(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.batches = []
+
+        def block(texts, lang, options):
+            self.started.set()
+            self.release.wait(10)
+            return texts
+
+        def words(texts, lang, options):
+            self.batches.append(list(texts))
+            if "bad" in texts:
+                raise Exception("Bad text.")
+            return [text.split() for text in texts]
+
+        def slow(texts, lang, options):
+            time.sleep(0.02)
+            self.batches.append(list(texts))
+            return texts
+
+        self.operations = {"block": (block, False), "words": (words, True), "slow": (slow, True)}
+
+    def test_batching(self):
+        with Scheduler(batch_size=4, operations=self.operations) as scheduler:
+            blocked = scheduler.submit("block", "")
+            self.started.wait(10)
+            futures = [scheduler.submit("words", f"text {i}") for i in range(6)]
+            other = scheduler.submit("words", "text", lang="nl")
+            self.release.set()
+            assert_equal([f.result() for f in futures], [["text", str(i)] for i in range(6)])
+            assert_equal(other.result(), ["text"])
+            blocked.result()
+        assert_equal([len(b) for b in self.batches], [4, 2, 1])
+
+    def test_chunking(self):
+        text = "One sentence here. " * 100
+        with Scheduler(chunk_size=200, operations=self.operations) as scheduler:
+            assert_equal(scheduler.run("words", text, lane="bulk"), text.split())
+        assert len(self.batches) >= 10
+        assert all(len(b) == 1 and len(b[0]) <= 200 for b in self.batches)
+
+    def test_priority(self):
+        with Scheduler(chunk_size=100, short_length=10, bulk_share=4, operations=self.operations) as scheduler:
+            bulk = scheduler.submit("slow", "A bulk sentence. " * 200, lane="bulk")
+            time.sleep(0.05)
+            start = time.monotonic()
+            scheduler.run("slow", "Quick", lane="interactive")
+            # the interactive request only waits for the chunk being processed
+            assert time.monotonic() - start < 0.2
+            assert not bulk.done()
+            bulk.result()
+            metrics = scheduler.get_metrics()
+        assert_equal(metrics["interactive"]["completed"], 1)
+        assert_equal(metrics["bulk"]["completed"], 1)
+        assert metrics["bulk"]["batches"] > 10
+
+    def test_bulk_progress(self):
+        with Scheduler(bulk_share=3, operations=self.operations) as scheduler:
+            blocked = scheduler.submit("block", "")
+            self.started.wait(10)
+            bulk = scheduler.submit("slow", "bulk", lane="bulk")
+            interactive = [scheduler.submit("slow", f"i{i}", lang=str(i)) for i in range(4)]
+            self.release.set()
+            for f in interactive + [bulk]:
+                f.result()
+        # every third batch comes from the bulk lane when both have work, the blocking one counting as the first
+        assert_equal(self.batches.index(["bulk"]), 1)
+
+    def test_deadline(self):
+        with Scheduler(operations=self.operations) as scheduler:
+            blocked = scheduler.submit("block", "")
+            self.started.wait(10)
+            expired = scheduler.submit("words", "too late", deadline=0.01)
+            fine = scheduler.submit("words", "in time", deadline=10)
+            assert_equal(scheduler.get_metrics()["interactive"]["depth"], 2)
+            time.sleep(0.05)
+            self.release.set()
+            assert_raises(Exception, expired.result)
+            assert_equal(fine.result(), ["in", "time"])
+            metrics = scheduler.get_metrics()
+        assert_equal(metrics["interactive"]["expired"], 1)
+        assert_equal(self.batches, [["in time"]])
+        assert metrics["interactive"]["wait"]["max"] >= 0.05
+
+    def test_errors(self):
+        with Scheduler(operations=self.operations) as scheduler:
+            blocked = scheduler.submit("block", "")
+            self.started.wait(10)
+            bad = scheduler.submit("words", "bad")
+            good = scheduler.submit("words", "good")
+            self.release.set()
+            assert_raises(Exception, bad.result)
+            assert_equal(good.result(), ["good"])
+            assert_raises(Exception, scheduler.submit, "unknown", "text")
+            assert_raises(Exception, lambda: scheduler.submit("words", "text", lane="urgent"))
+        assert_raises(Exception, scheduler.submit, "words", "text")
+
+    def test_batched_parse(self):
+        conllu = "1\tLynda\tLynda\tPROPN\t_\t_\t2\tnsubj\t_\t_\n2\towns\town\tVERB\t_\t_\t0\troot\t_\t_\n\n" \
+                 "1\tI\tI\tPRON\t_\t_\t2\tnsubj\t_\t_\n2\twent\tgo\tVERB\t_\t_\t0\troot\t_\t_\n\n"
+        with mock.patch.object(Understanding, "_process", return_value=conllu) as parse:
+            found = OPERATIONS["tokens"][0](["Lynda owns", "I went"], "en", {})
+        # the batch is parsed with one call
+        assert_equal(parse.call_count, 1)
+        assert_equal([[t.word for t in tokens] for tokens in found], [["Lynda", "owns"], ["I", "went"]])
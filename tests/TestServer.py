@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+
+import http.client
+import json
+import os
+import signal
+import threading
+import time
+import unittest
+from unittest import mock
+from nose.tools import assert_equal, assert_raises
+
+from ..Client import Client
+from ..Server import Server, RequestHandler, ThreadingHTTPServer, ENDPOINTS
+
+PORT = 18765
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pid = os.fork()
+        if cls.pid == 0:
+            try:
+                Server(port=PORT, languages=["en", "nl"], workers=2).serve()
+            finally:
+                os._exit(0)
+        cls.client = Client(port=PORT)
+        for i in range(600):
+            try:
+                cls.client.health()
+                return
+            except OSError:
+                time.sleep(0.1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        os.kill(cls.pid, signal.SIGTERM)
+        os.waitpid(cls.pid, 0)
+
+    def test_tokens(self):
+        tokens = self.client.tokens("Lynda owns a car.")
+        assert_equal([t["word"] for t in tokens], ["Lynda", "owns", "a", "car", "."])
+        sentences = self.client.dependency("Lynda owns a car. I went home.")
+        assert_equal(len(sentences), 2)
+
+    def test_batch(self):
+        found = self.client.svo(["Janna heeft een rode wagen en een fiets."] * 3, lang="nl")
+        assert_equal(len(found), 3)
+        assert_equal(found[0], [[["Janna"], "heeft", ["wagen", "fiets"]]])
+
+    def test_fit(self):
+        assert_equal(self.client.fit("%a is %b", "a tree is a plant"), {"a": "a tree", "b": "a plant"})
+        assert_equal(self.client.fit("%a is %b", ["a tree is a plant", "nothing here"]), [{"a": "a tree", "b": "a plant"}, None])
+
+    def test_errors(self):
+        assert_raises(Exception, self.client.tokens, "Hello", "xx")
+        assert_equal(self.client.health()["status"], "ok")
+
+
+class TestStatus(unittest.TestCase):
+    """
+        The status codes of a server in this process, with handlers which don't need the models.
+    """
+
+    def setUp(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def post(self, path, data):
+        connection = http.client.HTTPConnection("127.0.0.1", self.httpd.server_address[1], timeout=10)
+        try:
+            connection.request("POST", path, body=data if isinstance(data, bytes) else json.dumps(data).encode("utf-8"))
+            response = connection.getresponse()
+            return response.status, json.loads(response.read().decode("utf-8"))
+        finally:
+            connection.close()
+
+    def test_status(self):
+        def fail(item):
+            raise Exception("The model broke down.")
+
+        with mock.patch.dict(ENDPOINTS, {"/tokens": lambda item: item["text"].split(), "/svo": fail}):
+            assert_equal(self.post("/tokens", {"text": "a b"}), (200, {"result": ["a", "b"]}))
+            assert_equal(self.post("/tokens", {"items": [{"text": "a"}, {"text": "b c"}]}), (200, {"results": [["a"], ["b", "c"]]}))
+            # requests which are not valid
+            for data in [b"{broken", b"\xff", [1], {"items": "a"}, {"items": [1]}, {"txt": "a"}, {"text": 1}, {"text": "a", "lang": "xx"}]:
+                assert_equal(self.post("/tokens", data)[0], 400)
+            # a failure of the server itself
+            status, body = self.post("/svo", {"text": "a"})
+            assert_equal(status, 500)
+            assert_equal(body["error"], "The model broke down.")
+            assert_equal(self.post("/unknown", {"text": "a"})[0], 404)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+from nose.tools import assert_equal
+
+import spacy
+
+from ..Language import Language
+from ..Resources import Resources
+from ..Store import DocStore
+from ..Understanding import Understanding
+
+
+class TestStore(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_roundtrip(self):
+        texts = ["Lynda owns a red car.", "Peter and Fred went on holidays to France.", "Lynda owns a red car."]
+        with DocStore(self.path, batch_size=2) as store:
+            analyzed = store.analyze_batch(texts)
+            assert_equal(len(store), 2)
+            nouns = [[t.text for t in Language.get_nouns(a)] for a in analyzed]
+            entities = [e.text for e in Understanding.get_entities(analyzed[1])]
+
+        store = DocStore(self.path)
+        for text in texts:
+            assert text in store
+        found = store.get(texts[0])
+        assert_equal([t.text for t in Language.get_nouns(found)], nouns[0])
+        assert_equal([(t.text, t.pos_, t.lemma_, t.dep_, t.head.i) for t in found.doc],
+                     [(t.text, t.pos_, t.lemma_, t.dep_, t.head.i) for t in analyzed[0].doc])
+        assert_equal([e.text for e in Understanding.get_entities(store.get(texts[1]))], entities)
+        assert_equal(found.doc.text, texts[0])
+        assert store.get("Not analyzed before.") is None
+        store.close()
+
+    def test_versions(self):
+        with DocStore(self.path, version="a") as store:
+            store.analyze("Lynda owns a red car.")
+        with DocStore(self.path, version="b") as store:
+            assert "Lynda owns a red car." not in store
+            assert_equal(len(store), 0)
+
+    def test_interrupted(self):
+        with DocStore(self.path, version="a") as store:
+            store.analyze("Lynda owns a red car.")
+        # a partial index line left behind by a crash
+        with open(os.path.join(self.path, "index.tsv"), "at") as f:
+            f.write("0123\ta\t4")
+        store = DocStore(self.path, version="a")
+        assert_equal(len(store), 1)
+        store.analyze("Peter and Fred went on holidays to France.")
+        store.close()
+        store = DocStore(self.path, version="a")
+        assert_equal(len(store), 2)
+        assert_equal(store.get("Lynda owns a red car.").doc.text, "Lynda owns a red car.")
+        store.close()
+
+    def test_frame_cache(self):
+        texts = [f"Text number {i} here." for i in range(6)]
+        with mock.patch.object(Resources, "get_spacy_model", return_value=spacy.blank("en")):
+            with DocStore(self.path, version="a", batch_size=1) as store:
+                store.analyze_batch(texts)
+            store = DocStore(self.path, version="a", frame_cache=3)
+            with mock.patch("zlib.decompress", side_effect=zlib.decompress) as decompress:
+                # every doc has its own frame, the three used last stay decompressed
+                for text in texts[:3] * 4:
+                    assert_equal(store.get(text).doc.text, text)
+                assert_equal(decompress.call_count, 3)
+                store.get(texts[3])
+                store.get(texts[2])
+                assert_equal(decompress.call_count, 4)
+                # the least recently used frame went
+                store.get(texts[0])
+                assert_equal(decompress.call_count, 5)
+            store.close()
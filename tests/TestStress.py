@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+
+import gc
+import math
+import random
+import time
+import unittest
+from unittest import mock
+from nose.tools import assert_equal
+
+from ..Patterns import Patterns
+from ..Resources import Resources
+from ..Understanding import Understanding, Dependency, SVOExtractor, Token
+from .Helpers import make_token, make_coordinated_tree, timed
+
+# the largest growth exponent accepted for code which should scale linearly;
+# linear code measures around 1, anything quadratic around 2
+MAX_EXPONENT = 1.4
+
+
+# the amount of runs per size, of which the fastest counts; the others absorb the noise of a busy machine
+REPEAT = 7
+
+
+def get_exponent(prepare, sizes, repeat=REPEAT):
+    """
+        Fits the growth of the running time, the slope of log(time) over log(size).
+
+    :param prepare: A function taking a size and returning the function to time, so that generating the input is not timed.
+    :param sizes: The input sizes, each double the previous one.
+    :return: The exponent and the timings.
+    """
+    functions = [prepare(size) for size in sizes]
+    timings = [None] * len(sizes)
+    # a collection in the middle of a run would count for that size only
+    gc.disable()
+    try:
+        # the sizes take turns, so that a busy moment of the machine doesn't hit one size only
+        for r in range(repeat):
+            for i, fn in enumerate(functions):
+                # the processor time of this process leaves out the time other processes run
+                t = timed(fn, 1, time.process_time)
+                timings[i] = t if timings[i] is None else min(timings[i], t)
+    finally:
+        gc.enable()
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-7)) for t in timings]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / sum((x - mx) ** 2 for x in xs)
+    return slope, timings
+
+
+def make_random_tree(size, rnd):
+    """
+        A random sentence tree of the given amount of tokens without UDPipe; every token hangs under an earlier one.
+    """
+    root = rnd.randint(1, size)
+    parents = {}
+    order = [root] + rnd.sample([i for i in range(1, size + 1) if i != root], size - 1)
+    for i, id in enumerate(order[1:]):
+        parents[id] = order[rnd.randint(0, i)]
+    return [make_token(id, f"w{id}", rnd.choice(["NOUN", "VERB", "ADJ", "DET"]), parents.get(id, 0), "dep" if id != root else "root")
+            for id in range(1, size + 1)]
+
+
+def make_conllu(sentences, size):
+    """
+        The CoNLL-U of sentences with a chain of tokens each, as the stubbed UDPipe returns it.
+    """
+    rows = []
+    for s in range(sentences):
+        for i in range(1, size + 1):
+            rows.append(f"{i}\tw{i}\tw{i}\t{'VERB' if i == 1 else 'NOUN'}\t_\t_\t{i - 1}\t{'root' if i == 1 else 'obj'}\t_\t_")
+        rows.append("")
+    return "\n".join(rows) + "\n"
+
+
+class StubToken():
+    def __init__(self, text):
+        self.text = text
+        self.is_punct = not text[0].isalnum()
+        self.is_space = text.isspace()
+        self.pos_ = "VERB" if text.endswith("ing") or text.endswith("ed") else "NOUN"
+
+
+class StubModel():
+    """
+        Stands in for a Spacy model: splits on spaces and tags words ending in 'ing' or 'ed' as verbs.
+    """
+
+    def __call__(self, text):
+        return [StubToken(t) for t in text.split()]
+
+
+class TestStress(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(42)
+
+    def assert_linear(self, name, prepare, sizes):
+        exponent, timings = get_exponent(prepare, sizes)
+        assert exponent < MAX_EXPONENT, f"{name} grows with exponent {exponent:.2f}: " + ", ".join(f"{t * 1000:.2f}ms for {s}" for s, t in zip(sizes, timings))
+
+    # region Dependency
+    def test_tree_properties(self):
+        for i in range(50):
+            size = self.rnd.randint(1, 200)
+            nodes = make_random_tree(size, self.rnd)
+            tree = Dependency(nodes)
+            assert_equal(tree.root.parentId, 0)
+            # every node hangs under its parent and reaches the root
+            assert_equal(sum(len(n.children) for n in nodes), size - 1)
+            for node in nodes:
+                assert node.root is tree.root
+                if node is not tree.root:
+                    assert node in node.parent.children
+                    assert_equal(node.parent.id, node.parentId)
+            seen = set()
+            stack = [tree.root]
+            while len(stack) > 0:
+                node = stack.pop()
+                seen.add(node.id)
+                stack.extend(node.children)
+            assert_equal(len(seen), size)
+
+    def test_tree_scaling(self):
+        def prepare(size):
+            rows = [[str(t.id), t.word, t.lemma, t.pos, "_", "_", str(t.parentId), t.dep] for t in make_random_tree(size, self.rnd)]
+            return lambda: Dependency([Token(row) for row in rows])
+
+        self.assert_linear("Dependency", prepare, [1000, 2000, 4000, 8000])
+
+    def test_conllu_scaling(self):
+        def prepare(size):
+            conllu = make_conllu(10, size)
+
+            def run():
+                with mock.patch.object(Understanding, "_process", return_value=conllu):
+                    document = Understanding.get_document("stubbed")
+                assert_equal(len(document.nodes), 10 * size)
+
+            return run
+
+        self.assert_linear("Understanding.get_document", prepare, [250, 500, 1000, 2000])
+
+    # endregion
+
+    # region SVO
+    def test_svo_properties(self):
+        for i in range(20):
+            conjuncts = self.rnd.randint(0, 30)
+            branches = self.rnd.randint(1, 5)
+            tree = make_coordinated_tree(conjuncts, branches, nested=self.rnd.random() < 0.5)
+            found = SVOExtractor(tree).extract_svo()
+            assert_equal(len(found), 1)
+            subjects, verb, objects = found[0]
+            assert_equal(subjects, ["Ann", "Bob"])
+            assert_equal(len(objects), branches * (conjuncts + 1))
+            assert_equal(len(objects), len(set(objects)))
+
+    def test_svo_scaling(self):
+        def prepare(size):
+            tree = make_coordinated_tree(size, branches=4, nested=False)
+            return lambda: SVOExtractor(tree).extract_svo()
+
+        self.assert_linear("SVOExtractor", prepare, [100, 200, 400, 800])
+
+    # endregion
+
+    # region Patterns
+    @staticmethod
+    def make_pattern(parameters):
+        """
+            A pattern with the given amount of parameters separated by literals and an input it fits.
+        """
+        pattern = " ".join(f"%p{i} k{i}" for i in range(parameters))
+        input = " ".join(f"v{i} v{i}b k{i}" for i in range(parameters))
+        return pattern, input
+
+    def test_pattern_properties(self):
+        for i in range(100):
+            parameters = self.rnd.randint(1, 8)
+            values = [" ".join(f"w{self.rnd.randint(0, 9)}" for j in range(self.rnd.randint(1, 3))) for p in range(parameters)]
+            pattern = " ".join(f"%p{p} k{p}" for p in range(parameters))
+            input = " ".join(f"{values[p]} k{p}" for p in range(parameters))
+            match = Patterns.fit(pattern, input, tokenizer="rules")
+            assert match is not None
+            assert_equal([match.get_value(f"p{p}") for p in range(parameters)], values)
+            # a literal missing from the input never fits
+            assert Patterns.fit(pattern, input.replace(f"k{parameters - 1}", "x"), tokenizer="rules") is None
+
+    def test_parameter_scaling(self):
+        def prepare(size):
+            pattern, input = TestStress.make_pattern(size)
+            compiled = Patterns.compile(pattern)
+            tokens = input.split()
+            return lambda: [compiled.is_match(input), Patterns._extract(pattern, input, "en", tokens, compiled)]
+
+        self.assert_linear("Patterns parameters", prepare, [25, 50, 100, 200])
+
+    def test_input_scaling(self):
+        def prepare(size):
+            input = " ".join(f"w{i % 50}" for i in range(size)) + " is home"
+            return lambda: Patterns.fit("%who is home", input, tokenizer="rules")
+
+        self.assert_linear("Patterns input", prepare, [1000, 2000, 4000, 8000])
+
+    def test_stubbed_spacy(self):
+        with mock.patch.object(Resources, "get_spacy_model", return_value=StubModel()):
+            match = Patterns.fit("%who is %what_verb", "the cat is sleeping")
+            assert_equal(match.get_value("what"), "sleeping")
+            # a value failing its constraint is left out
+            assert Patterns.fit("%who is %what_verb", "the cat is home").get_value("what") is None
+
+            def prepare(size):
+                input = " ".join(f"w{i % 50}" for i in range(size)) + " is running"
+                return lambda: Patterns.fit("%who is %what_verb", input)
+
+            self.assert_linear("Patterns with a verb constraint", prepare, [500, 1000, 2000, 4000])
+
+    # endregion
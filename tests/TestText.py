@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+
+import unittest
+from unittest import mock
+from nose.tools import assert_equal
+
+from ..Language import Language
+from ..Patterns import Patterns
+from ..Resources import Resources
+from ..Text import AnalyzedText
+from ..Understanding import Understanding, SVOExtractor
+
+
+class TestText(unittest.TestCase):
+
+    def test_language(self):
+        text = AnalyzedText("Lynda owns a red car, and a bike!")
+        assert_equal(Language.cleanup_text(text), Language.cleanup_text(text.text))
+        assert_equal([t.text for t in Language.get_nouns(text)], ["car", "bike"])
+        assert_equal([t.text for t in Language.get_verbs(text)], ["owns"])
+        assert not Language.is_verb(text)
+        assert_equal(len(text.get_indices()), 8)
+        assert_equal(len(text.get_indices(cleanup=False)), 10)
+
+    def test_single_parse(self):
+        text = AnalyzedText("Lynda owns a red car.")
+        with mock.patch.object(Resources, "get_spacy_model", wraps=Resources.get_spacy_model) as get_model:
+            Language.cleanup_text(text)
+            Language.get_nouns(text)
+            Understanding.get_entities(text)
+            m = Patterns.fit("%a owns %b", text)
+        assert_equal(get_model.call_count, 1)
+        assert_equal(m.as_dict(), {"a": "Lynda", "b": "a red car"})
+
+    def test_understanding(self):
+        text = AnalyzedText("Peter and Fred went on holidays to France. Lynda owns a car.")
+        assert_equal(len(Understanding.get_document(text)), 2)
+        assert Understanding.get_document(text) is text.document
+        assert Understanding.analyze(text) is text.analysis
+        assert SVOExtractor(text).tree is text.document
+        assert_equal(len(Understanding.get_sentences(text)), 2)
+        assert_equal(Understanding.get_svo(text), Understanding.analyze(text.text).svo)
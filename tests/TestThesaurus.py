@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from nose.tools import assert_equal
+
+from ..Thesaurus import Thesaurus
+
+
+class TestThesaurus(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "thesaurus.txt")
+        with open(self.path, "wt", encoding="utf-8") as f:
+            f.write("# A test thesaurus\neten;voedsel;kost\nEten;nuttigen\nwijsheid;inzicht\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_search(self):
+        thesaurus = Thesaurus(self.path)
+        # the first row of a word, like the plain file search
+        assert_equal(thesaurus.search("ETEN"), ["eten", "voedsel", "kost"])
+        assert_equal(len(thesaurus.get_rows("eten")), 2)
+        assert thesaurus.search("drinken") is None
+        assert thesaurus.search("# A test thesaurus") is None
+        assert_equal(len(thesaurus), 3)
+
+    def test_edit(self):
+        thesaurus = Thesaurus(self.path)
+        thesaurus.add("drinken", ["zuipen", "nippen"])
+        assert_equal(thesaurus.search("drinken"), ["drinken", "zuipen", "nippen"])
+        assert thesaurus.remove("eten", ["voedsel", "kost"])
+        # the next row of the word comes up
+        assert_equal(thesaurus.search("eten"), ["Eten", "nuttigen"])
+        assert not thesaurus.remove("eten", ["voedsel"])
+        assert thesaurus.remove("wijsheid")
+        assert thesaurus.search("wijsheid") is None
+
+        # the edits are in the journal, not in the file
+        reloaded = Thesaurus(self.path)
+        assert_equal(reloaded.get_rows("eten"), [["Eten", "nuttigen"]])
+        assert_equal(reloaded.search("drinken"), ["drinken", "zuipen", "nippen"])
+        assert reloaded.search("wijsheid") is None
+
+        thesaurus.compact()
+        assert not os.path.exists(thesaurus.journal)
+        with open(self.path, "rt", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert_equal(lines, ["# A test thesaurus", "Eten;nuttigen", "drinken;zuipen;nippen"])
+
+    def test_remove_empty(self):
+        thesaurus = Thesaurus(self.path)
+        thesaurus.add("bank", ["zetel"])
+        thesaurus.add("bank", [])
+        assert thesaurus.remove("bank", [])
+        assert_equal(thesaurus.get_rows("bank"), [["bank", "zetel"]])
+        # the journal replays to the same rows
+        assert_equal(Thesaurus(self.path).get_rows("bank"), thesaurus.get_rows("bank"))
+
+    def test_partial_journal(self):
+        thesaurus = Thesaurus(self.path)
+        thesaurus.add("drinken", ["zuipen"])
+        with open(thesaurus.journal, "at", encoding="utf-8") as f:
+            f.write("+;lopen;wandel")
+        reloaded = Thesaurus(self.path)
+        assert "drinken" in reloaded
+        assert "lopen" not in reloaded
+
+    def test_watch(self):
+        thesaurus = Thesaurus(self.path)
+        # own edits don't trigger a reload
+        thesaurus.add("drinken", ["zuipen"])
+        assert not thesaurus.check()
+        index = thesaurus._index
+        thesaurus.watch(0.01)
+        try:
+            with open(self.path, "at", encoding="utf-8") as f:
+                f.write("lopen;wandelen\n")
+            for i in range(500):
+                if thesaurus.search("lopen") is not None:
+                    break
+                time.sleep(0.01)
+            assert_equal(thesaurus.search("lopen"), ["lopen", "wandelen"])
+            # the journal is replayed on top of the changed file
+            assert_equal(thesaurus.search("drinken"), ["drinken", "zuipen"])
+            # the old index is swapped out, not changed
+            assert "lopen" not in index
+        finally:
+            thesaurus.stop()
+
+    def test_shared(self):
+        assert Thesaurus.get_thesaurus(self.path) is Thesaurus.get_thesaurus(self.path)
+        Thesaurus._instances.pop(self.path)
+        assert Thesaurus.get_thesaurus().search("wijsheid") is not None
+
+    def test_normalize(self):
+        for word, stem in [("auto's", "auto"), ("Katten", "kat"), ("bomen", "boom"), ("huizen", "huis"), ("brieven", "brief"),
+                           ("wandelen", "wandel"), ("tafels", "tafel"), ("meisjes", "meisje"), ("boek", "boek")]:
+            assert_equal(Thesaurus.normalize(word), stem)
+
+    def test_distance(self):
+        assert_equal(Thesaurus.get_distance("wijsheid", "wijsheid"), 0)
+        assert_equal(Thesaurus.get_distance("wijshied", "wijsheid"), 1)
+        assert_equal(Thesaurus.get_distance("wijsheid", "wijshed"), 1)
+        assert_equal(Thesaurus.get_distance("kat", "kast"), 1)
+        assert_equal(Thesaurus.get_distance("eten", "ooit"), 3)
+        assert_equal(Thesaurus.get_distance("eten", "ooit", 5), 4)
+
+    def test_lemmas(self):
+        with open(self.path, "at", encoding="utf-8") as f:
+            f.write("auto;wagen\nboom;stam\n")
+        thesaurus = Thesaurus(self.path)
+        assert_equal(thesaurus.search("auto's"), ["auto", "wagen"])
+        assert_equal(thesaurus.search("Bomen"), ["boom", "stam"])
+        # an exact row comes first
+        thesaurus.add("bomen", ["bossen"])
+        assert_equal(thesaurus.search("bomen"), ["bomen", "bossen"])
+        thesaurus.add("katten", ["poezen"])
+        assert_equal(thesaurus.search("kat"), ["katten", "poezen"])
+        thesaurus.remove("katten")
+        assert thesaurus.search("kat") is None
+
+    def test_fuzzy(self):
+        thesaurus = Thesaurus(self.path)
+        assert thesaurus.search("wijshied") is None
+        assert_equal(thesaurus.search("wijshied", fuzzy=True), ["wijsheid", "inzicht"])
+        assert_equal(thesaurus.search("eetn", fuzzy=True), ["eten", "voedsel", "kost"])
+        assert thesaurus.search("wsjhied", fuzzy=True, max_distance=1) is None
+        assert thesaurus.search("xyz", fuzzy=True) is None
+        # the deletion index follows the edits
+        thesaurus.add("verstand", ["rede"])
+        assert_equal(thesaurus.get_candidates("verstnad"), ["verstand"])
+        thesaurus.remove("verstand")
+        assert_equal(thesaurus.get_candidates("verstnad"), [])
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 
 
+import io
+import itertools
+import re
 import unittest
-from nose.tools import assert_equal, nottest
+from unittest import mock
+from nose.tools import assert_equal, assert_raises, nottest
 
 from ..Language import Language
-from ..Understanding import Understanding, SVOExtractor
+from ..Understanding import Understanding, SVOExtractor, Dependency
 
 
 class TestUnderstanding(unittest.TestCase):
@@ -205,3 +209,115 @@ class TestUnderstanding(unittest.TestCase):
         print(svo.tree)
         print(found)
         assert_equal([(['je'], 'allé', ['maison'])], found)
+
+    def test_reuse_dependency(self):
+        input = "Janna heeft een rode wagen en een fiets."
+        dep = Understanding.get_dependency(input, lang="nl")
+        svo = SVOExtractor(dep, "nl")
+        assert svo.tree is dep
+        assert_equal(svo.extract_svo(), SVOExtractor(input, "nl").extract_svo())
+        views = svo.extract()
+        assert_equal(views["svo"], [(['Janna'], 'heeft', ['wagen', 'fiets'])])
+        assert_equal(set(views["vo"][0]["object"]), {"wagen", "fiets"})
+        assert_equal(Understanding.get_svo(dep, "nl"), views["svo"])
+
+    def test_analyze(self):
+        analysis = Understanding.analyze("Peter and Fred went on holidays to France. Lynda owns a car.")
+        assert_equal(len(analysis.document), 2)
+        assert_equal(analysis.document.sentences[0].root.word, "went")
+        assert_equal(analysis.document.sentences[1].root.word, "owns")
+        assert_equal(set(analysis.sv[0]["subject"]), {"Fred", "Peter"})
+        assert_equal(set(analysis.vo[1]["object"]), {"car"})
+        assert_equal(len(analysis.svo), 2)
+        # the views share the single parse
+        assert analysis.extractor.tree is analysis.document
+
+    def test_dependency_type(self):
+        def process(text, lang):
+            # a sentence per line, every word under the first
+            rows = []
+            for line in text.splitlines():
+                rows.extend(f"{i + 1}\t{w}\t{w}\tNOUN\t_\t_\t{min(i, 1)}\t{'dep' if i > 0 else 'root'}\t_\t_" for i, w in enumerate(line.split()))
+                rows.append("")
+            return "\n".join(rows) + "\n"
+
+        with mock.patch.object(Understanding, "_process", side_effect=process):
+            for tree in [Understanding.get_dependency("Lynda owns cars"), Understanding.analyze("Lynda owns cars").dependency]:
+                assert isinstance(tree, Dependency)
+                assert_equal(tree.root.word, "Lynda")
+            text = "Lynda owns cars\nI went home"
+            assert_raises(Exception, Understanding.get_dependency, text)
+            assert_raises(Exception, lambda: Understanding.analyze(text).dependency)
+            assert_equal(len(Understanding.get_document(text)), 2)
+            # the text based functions take any amount of sentences
+            assert_equal(len(SVOExtractor("Lynda owns cars\nI went home").tree), 2)
+
+    def test_sentences_batch(self):
+        def process(text, lang):
+            # a sentence per line
+            rows = []
+            for line in text.splitlines():
+                rows.extend(f"{i + 1}\t{w}\t{w}\tNOUN\t_\t_\t{min(i, 1)}\t{'dep' if i > 0 else 'root'}\t_\t_" for i, w in enumerate(line.split()))
+                rows.append("")
+            return "\n".join(rows) + "\n"
+
+        texts = ["Lynda owns cars\nI went home", "", "Lynda owns cars"]
+        with mock.patch.object(Understanding, "_process", side_effect=process) as parse:
+            found = Understanding.get_sentences_batch(texts)
+        assert_equal(parse.call_count, 1)
+        assert_equal([[[n.word for n in nodes] for nodes in sentences] for sentences in found],
+                     [[["Lynda", "owns", "cars"], ["I", "went", "home"]], [], [["Lynda", "owns", "cars"]]])
+        assert_equal(Understanding.get_sentences_batch([]), [])
+
+    def test_chunks(self):
+        text = "Hello there Mr. Smith. How are you? I'm fine!\n\nA new paragraph. " * 200
+        for input in [text, io.StringIO(text), text.splitlines(keepends=True)]:
+            chunks = list(Understanding._get_chunks(input, 200))
+            assert_equal("".join(chunks), text)
+            assert all(len(c) <= 200 for c in chunks)
+            # cut at a paragraph or a sentence
+            assert all(c.endswith("\n\n") or c.endswith(". ") for c in chunks[:-1])
+        assert_equal([len(c) for c in Understanding._get_chunks("x" * 450, 200)], [200, 200, 50])
+
+    def test_stream_lazily(self):
+        def lines():
+            while True:
+                yield "Lynda owns a car.\n"
+
+        def process(chunk, lang):
+            rows = [f"{i + 1}\tw{i}\tw{i}\tNOUN\t_\t_\t0\troot\t_\t_" for i in range(len(chunk.split()))]
+            return "\n".join(rows) + "\n\n"
+
+        with mock.patch.object(Understanding, "_process", side_effect=process):
+            trees = list(itertools.islice(Understanding.stream_sentences(lines(), chunk_size=100), 3))
+        assert_equal(len(trees), 3)
+        assert all(isinstance(t, Dependency) for t in trees)
+
+    def test_stream_abbreviation(self):
+        sentence = "Yesterday Mr. Smith bought a car."
+        text = (sentence + " ") * 20
+        # the punctuation puts a cut right after 'Mr.'
+        assert any(c.endswith("Mr. ") for c in Understanding._get_chunks(text, 48))
+
+        def process(chunk, lang):
+            # segments like UDPipe, which knows the abbreviation
+            rows = []
+            for part in re.split(r"(?<!Mr\.)(?<=\.)\s+", chunk.strip()):
+                rows.extend(f"{i + 1}\t{w}\t{w}\tNOUN\t_\t_\t{i}\t{'dep' if i > 0 else 'root'}\t_\t_" for i, w in enumerate(part.split()))
+                rows.append("")
+            return "\n".join(rows) + "\n"
+
+        with mock.patch.object(Understanding, "_process", side_effect=process):
+            trees = list(Understanding.stream_sentences(text, chunk_size=48))
+        assert_equal(len(trees), 20)
+        for tree in trees:
+            assert_equal([n.word for n in tree.nodes], sentence.split())
+            assert_equal(tree.root.word, "Yesterday")
+            assert_equal([n.parentId for n in tree.nodes], list(range(len(tree.nodes))))
+
+    def test_stream_sentences(self):
+        text = "Peter and Fred went on holidays to France. Lynda owns a car.\n\n" * 50
+        trees = list(Understanding.stream_sentences(io.StringIO(text), chunk_size=256))
+        assert_equal(len(trees), 100)
+        assert_equal(trees[0].root.word, "went")
+        assert_equal(trees[-1].root.word, "owns")